@@ -1,7 +1,7 @@
-"""
-TimelyCabs FastAPI Application
-Enterprise-level taxi booking and management system.
-"""
-
-__version__ = "1.0.0"
-__author__ = "TimelyCabs Team"
+"""
+TimelyCabs FastAPI Application
+Enterprise-level taxi booking and management system.
+"""
+
+__version__ = "1.0.0"
+__author__ = "TimelyCabs Team"
@@ -1,3 +1,3 @@
-"""
-API package for route handlers
-"""
+"""
+API package for route handlers
+"""
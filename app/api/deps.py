@@ -0,0 +1,55 @@
+"""
+Authentication and authorization dependencies for API routes
+
+    @router.get("/admin/stats")
+    async def stats(user: CachedUser = Depends(require_roles("admin", "support"))):
+        ...
+
+The caller's roles come from the session cache as a bitmask, so a role check
+on a cached session is one bitwise AND with no database access.
+"""
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.services.auth_service import AsyncAuthService
+from app.services.role_registry import role_mask
+from app.services.session_cache import CachedUser
+
+auth_service = AsyncAuthService()
+bearer = HTTPBearer(auto_error=False)
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer),
+    db: AsyncSession = Depends(get_async_db)
+) -> CachedUser:
+    """User for the ``Authorization: Bearer <auth_token>`` header"""
+    user = None
+    if credentials is not None:
+        user = await auth_service.validate_session(db, credentials.credentials)
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
+
+
+def require_roles(*role_names: str) -> Callable:
+    """Dependency admitting users with any of ``role_names``; the mask is computed once here"""
+    mask = role_mask(role_names)
+
+    async def check_roles(user: CachedUser = Depends(get_current_user)) -> CachedUser:
+        if not user.has_any_role(mask):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Insufficient role"
+            )
+        return user
+
+    return check_roles
@@ -1,50 +1,69 @@
-"""
-Health check API endpoints
-"""
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from datetime import datetime
-
-from app.core.database import get_db, check_db_connection
-from app.core.config import get_settings
-from app.schemas.common import HealthCheckResponse
-import logging
-
-logger = logging.getLogger(__name__)
-router = APIRouter()
-settings = get_settings()
-
-
-@router.get("/", response_model=HealthCheckResponse)
-async def health_check(db: Session = Depends(get_db)) -> HealthCheckResponse:
-    """
-    Health check endpoint
-    """
-    try:
-        # Check database connection
-        db_status = check_db_connection()
-        
-        # TODO: Add Redis health check when implemented
-        redis_status = None
-        
-        return HealthCheckResponse(
-            status="healthy" if db_status else "unhealthy",
-            timestamp=datetime.utcnow(),
-            version=settings.app_version,
-            environment=settings.environment,
-            database=db_status,
-            redis=redis_status
-        )
-        
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return HealthCheckResponse(
-            status="unhealthy",
-            timestamp=datetime.utcnow(),
-            version=settings.app_version,
-            environment=settings.environment,
-            database=False,
-            redis=None
-        )
-
-
+"""
+Health check API endpoints
+
+All endpoints serve the state cached by the background HealthProber and
+never touch the connection pool.
+"""
+from fastapi import APIRouter, Response, status
+from datetime import datetime
+
+from app.core.config import get_settings
+from app.core.health import get_health_prober
+from app.schemas.common import HealthCheckResponse, ReadinessResponse
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+settings = get_settings()
+
+
+@router.get("/", response_model=HealthCheckResponse)
+async def health_check() -> HealthCheckResponse:
+    """
+    Health check endpoint
+    """
+    state = get_health_prober().state
+    healthy = state.database and state.redis is not False
+    
+    return HealthCheckResponse(
+        status="healthy" if healthy else "unhealthy",
+        timestamp=datetime.utcnow(),
+        version=settings.app_version,
+        environment=settings.environment,
+        database=state.database,
+        redis=state.redis
+    )
+
+
+@router.get("/live")
+async def liveness() -> dict:
+    """
+    Liveness probe: the process is serving requests
+    """
+    return {"status": "alive"}
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness(response: Response) -> ReadinessResponse:
+    """
+    Readiness probe: dependencies were reachable at the last probe and the
+    connection pool has not stayed saturated; a briefly saturated pool is
+    reported as degraded but still ready
+    """
+    prober = get_health_prober()
+    state = prober.state
+    reasons = prober.readiness()
+    warnings = prober.warnings()
+    
+    if reasons:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    
+    return ReadinessResponse(
+        status="not_ready" if reasons else "degraded" if warnings else "ready",
+        database=state.database,
+        redis=state.redis,
+        checked_at=state.checked_at,
+        pool_saturation=state.pool_saturation,
+        reasons=reasons,
+        warnings=warnings
+    )
@@ -1,3 +1,3 @@
-"""
-Core application components
-"""
+"""
+Core application components
+"""
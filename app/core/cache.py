@@ -0,0 +1,113 @@
+"""
+In-process caching utilities
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with per-entry expiry.
+
+    All operations are O(1). Entries are evicted least-recently-used first once
+    ``max_entries`` is reached, and expired entries are dropped when touched.
+    An optional ``on_remove(key, value)`` callback fires whenever an entry leaves
+    the cache so callers can maintain secondary indexes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 60.0,
+        on_remove: Optional[Callable[[Hashable, Any], None]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._on_remove = on_remove
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None if missing/expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                self._removed(key, value)
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry if full"""
+        ttl = self.ttl_seconds if ttl is None else min(ttl, self.ttl_seconds)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._removed(key, previous[1])
+
+            self._data[key] = (self._clock() + ttl, value)
+
+            while len(self._data) > self.max_entries:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                self.evictions += 1
+                self._removed(old_key, old_value)
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop a single entry"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return False
+            self.invalidations += 1
+            self._removed(key, entry[1])
+            return True
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            items = list(self._data.items())
+            self._data.clear()
+            for key, (_, value) in items:
+                self._removed(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters"""
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _removed(self, key: Hashable, value: Any) -> None:
+        if self._on_remove is not None:
+            self._on_remove(key, value)
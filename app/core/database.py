@@ -1,101 +1,675 @@
-"""
-Database configuration and connection management
-"""
-from sqlalchemy import create_engine, event, text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
-from contextlib import contextmanager
-from typing import Generator
-import logging
-
-from app.core.config import get_settings
-
-logger = logging.getLogger(__name__)
-
-settings = get_settings()
-
-# Create SQLAlchemy engine with optimized settings
-engine = create_engine(
-    settings.database_url,
-    poolclass=QueuePool,
-    pool_size=settings.database_pool_size,
-    max_overflow=settings.database_max_overflow,
-    pool_recycle=settings.database_pool_recycle,
-    pool_pre_ping=True,
-    echo=settings.database_echo,
-    echo_pool=settings.database_echo,
-)
-
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Create Base class for models
-Base = declarative_base()
-
-
-@event.listens_for(engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
-    """Set SQLite pragmas for better performance"""
-    if "sqlite" in settings.database_url:
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA synchronous=NORMAL")
-        cursor.execute("PRAGMA cache_size=10000")
-        cursor.execute("PRAGMA temp_store=MEMORY")
-        cursor.close()
-
-
-def get_db() -> Generator[Session, None, None]:
-    """
-    Dependency to get database session
-    """
-    db = SessionLocal()
-    try:
-        yield db
-    except Exception as e:
-        logger.error(f"Database session error: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
-
-
-@contextmanager
-def get_db_session() -> Generator[Session, None, None]:
-    """
-    Context manager for database sessions
-    """
-    db = SessionLocal()
-    try:
-        yield db
-        db.commit()
-    except Exception as e:
-        logger.error(f"Database session error: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
-
-
-def init_db():
-    """Initialize database tables"""
-    try:
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully")
-    except Exception as e:
-        logger.error(f"Failed to create database tables: {e}")
-        raise
-
-
-def check_db_connection() -> bool:
-    """Check database connection"""
-    try:
-        with get_db_session() as db:
-            db.execute(text("SELECT 1"))
-        logger.info("Database connection successful")
-        return True
-    except Exception as e:
-        logger.error(f"Database connection failed: {e}")
-        return False
+"""
+Database configuration and connection management
+"""
+from sqlalchemy import Column, DateTime, MetaData, String, Table, create_engine, event, func, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, Optional, Sequence, TypeVar
+import asyncio
+import functools
+import hashlib
+import itertools
+import logging
+import time
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that reports how long each checkout waited for a connection.
+    
+    ``wait_listeners`` get the wait in seconds after every checkout attempt,
+    ``checkin_listeners`` are called once a connection is back in the pool.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_listeners: List[Callable[[float], None]] = []
+        self.checkin_listeners: List[Callable[[], None]] = []
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            for listener in self.wait_listeners:
+                listener(waited)
+    
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        for listener in self.checkin_listeners:
+            listener()
+    
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_listeners = self.wait_listeners
+        pool.checkin_listeners = self.checkin_listeners
+        return pool
+
+
+class TimedAsyncAdaptedQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """TimedQueuePool for asyncio engines"""
+
+
+class ReplicaSet:
+    """
+    Read replicas picked round-robin.
+    
+    A replica that fails to connect or drops its connection is marked down and
+    skipped for ``retry_after`` seconds, then tried again.
+    """
+    
+    def __init__(self, engines: Sequence[Engine], retry_after: float = 30.0):
+        self.engines = list(engines)
+        self.retry_after = retry_after
+        self._down_until: Dict[Engine, float] = {}
+        self._turn = itertools.count()
+        for replica in self.engines:
+            event.listen(replica, "handle_error", self._on_error)
+    
+    def is_up(self, replica: Engine) -> bool:
+        return self._down_until.get(replica, 0.0) <= time.monotonic()
+    
+    def pick(self) -> Optional[Engine]:
+        """Next healthy replica in turn, None if all are down"""
+        for _ in range(len(self.engines)):
+            replica = self.engines[next(self._turn) % len(self.engines)]
+            if self.is_up(replica):
+                return replica
+        return None
+    
+    def mark_down(self, replica: Engine) -> None:
+        if self.is_up(replica):
+            logger.warning(f"Read replica {replica.url!r} marked down for {self.retry_after}s")
+        self._down_until[replica] = time.monotonic() + self.retry_after
+    
+    def mark_up(self, replica: Engine) -> None:
+        self._down_until.pop(replica, None)
+    
+    def _on_error(self, context) -> None:
+        # No connection means the connect itself failed
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.engine)
+
+
+READ_ONLY_KEY = "read_only"
+PRIMARY_PINNED_KEY = "primary_pinned"
+
+
+class RoutingSession(Session):
+    """
+    Session that sends SELECTs issued by read_only() service methods to a replica.
+    
+    A session sticks to one replica while it is up. Reads stay on the primary
+    inside a unit of work, with pending changes, and for the rest of the
+    session once it has written anything, so a request reads its own writes.
+    """
+    
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas if replicas is not None and replicas.engines else None
+        self.replica: Optional[Engine] = None
+        self.replica_connected = False
+    
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if self._reads_from_replica(clause):
+            if self.replica is None or not self.replicas.is_up(self.replica):
+                self.replica = self.replicas.pick()
+            if self.replica is not None:
+                return self.replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+    
+    def _reads_from_replica(self, clause) -> bool:
+        return (
+            self.replicas is not None
+            and self.info.get(READ_ONLY_KEY, False)
+            and not self.info.get(PRIMARY_PINNED_KEY, False)
+            and getattr(clause, "is_select", False)
+            and not self._flushing
+            and not in_unit_of_work(self)
+            and not (self.new or self.deleted or self.dirty)
+        )
+    
+    def replica_failed(self) -> bool:
+        """The current replica went down before this transaction got a connection from it"""
+        return self.replica is not None and not self.replicas.is_up(self.replica) and not self.replica_connected
+
+
+@event.listens_for(RoutingSession, "after_begin")
+def _track_replica_connection(session, transaction, connection):
+    if connection.engine is session.replica:
+        session.replica_connected = True
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_replica_connection(session, transaction):
+    if transaction.parent is None:
+        session.replica_connected = False
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session, flush_context):
+    session.info[PRIMARY_PINNED_KEY] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _pin_after_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[PRIMARY_PINNED_KEY] = True
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def read_only(method: F) -> F:
+    """
+    Mark a service method ``(self, db, ...)`` as read-only so its SELECTs may
+    go to a replica. If the replica cannot be reached the call is retried
+    once, on the next healthy replica or the primary.
+    """
+    @functools.wraps(method)
+    def wrapper(self, db: Session, *args, **kwargs):
+        if not isinstance(db, RoutingSession) or db.replicas is None or db.info.get(READ_ONLY_KEY):
+            return method(self, db, *args, **kwargs)
+        
+        db.info[READ_ONLY_KEY] = True
+        try:
+            try:
+                return method(self, db, *args, **kwargs)
+            except Exception:
+                if not db.replica_failed():
+                    raise
+                logger.warning(f"Retrying {method.__qualname__} after read replica failure")
+                return method(self, db, *args, **kwargs)
+        finally:
+            db.info[READ_ONLY_KEY] = False
+    
+    return wrapper
+
+
+def create_db_engine(database_url: str) -> Engine:
+    """Create a sync engine with the configured pool settings"""
+    return create_engine(
+        database_url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_recycle=settings.database_pool_recycle,
+        pool_pre_ping=True,
+        echo=settings.database_echo,
+        echo_pool=settings.database_echo,
+    )
+
+
+# Create SQLAlchemy engine with optimized settings
+engine = create_db_engine(settings.database_url)
+replica_engines = [create_db_engine(url) for url in settings.database_replica_urls]
+replicas = ReplicaSet(replica_engines, settings.database_replica_retry_seconds)
+
+# Create SessionLocal class
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=RoutingSession,
+    replicas=replicas
+)
+
+# asyncio drivers for each sync driver we ship
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def create_async_db_engine(database_url: str, **kwargs):
+    """Create an async engine with the same pool settings as the sync engine"""
+    async_url = get_async_database_url(database_url)
+    if not async_url.startswith("sqlite"):
+        kwargs.setdefault("poolclass", TimedAsyncAdaptedQueuePool)
+        kwargs.setdefault("pool_size", settings.database_pool_size)
+        kwargs.setdefault("max_overflow", settings.database_max_overflow)
+    return create_async_engine(
+        async_url,
+        pool_recycle=settings.database_pool_recycle,
+        pool_pre_ping=True,
+        echo=settings.database_echo,
+        **kwargs
+    )
+
+
+async_engine = create_async_db_engine(settings.database_url)
+async_replica_engines = [create_async_db_engine(url) for url in settings.database_replica_urls]
+async_replicas = ReplicaSet(
+    [replica.sync_engine for replica in async_replica_engines],
+    settings.database_replica_retry_seconds
+)
+
+# Objects are not expired on commit: lazy refreshes cannot run outside run_sync
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+    sync_session_class=RoutingSession,
+    replicas=async_replicas
+)
+
+# Declarative base shared with the models package
+from app.models.base import Base  # noqa: E402
+
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    """Set SQLite pragmas for better performance"""
+    if "sqlite" in settings.database_url:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=10000")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+for _replica in replica_engines + [replica.sync_engine for replica in async_replica_engines]:
+    event.listen(_replica, "connect", set_sqlite_pragma)
+
+
+def get_db() -> Generator[Session, None, None]:
+    """
+    Dependency to get database session
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    except Exception as e:
+        logger.error(f"Database session error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get an async database session
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await db.rollback()
+            raise
+
+
+@contextmanager
+def get_db_session() -> Generator[Session, None, None]:
+    """
+    Context manager for database sessions
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception as e:
+        logger.error(f"Database session error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+UNIT_OF_WORK_KEY = "unit_of_work"
+AFTER_COMMIT_KEY = "after_commit_callbacks"
+
+
+def in_unit_of_work(db: Session) -> bool:
+    """Check whether the session is inside unit_of_work()"""
+    return bool(db.info.get(UNIT_OF_WORK_KEY))
+
+
+def _begin_unit_of_work(db: Session) -> bool:
+    if in_unit_of_work(db):
+        return False
+    db.info[UNIT_OF_WORK_KEY] = True
+    db.info[AFTER_COMMIT_KEY] = []
+    return True
+
+
+def _run_after_commit(db: Session) -> None:
+    for callback in db.info.pop(AFTER_COMMIT_KEY, []):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"After-commit callback failed: {e}")
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Generator[Session, None, None]:
+    """
+    Run several service calls as one transaction with a single commit.
+    
+    Service methods defer their commits while the unit of work is open and
+    only flush when they need a generated primary key. Loaded objects are not
+    expired by the final commit, so callers can keep using them without a
+    refresh. Nested units of work join the outermost one.
+    """
+    if not _begin_unit_of_work(db):
+        yield db
+        return
+    
+    expire_on_commit = db.expire_on_commit
+    try:
+        yield db
+        db.expire_on_commit = False
+        db.commit()
+    except Exception:
+        db.rollback()
+        db.info.pop(AFTER_COMMIT_KEY, None)
+        raise
+    finally:
+        db.expire_on_commit = expire_on_commit
+        db.info.pop(UNIT_OF_WORK_KEY, None)
+    
+    _run_after_commit(db)
+
+
+@asynccontextmanager
+async def async_unit_of_work(db: AsyncSession) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async counterpart of unit_of_work() for AsyncSession
+    """
+    sync_db = db.sync_session
+    if not _begin_unit_of_work(sync_db):
+        yield db
+        return
+    
+    expire_on_commit = sync_db.expire_on_commit
+    try:
+        yield db
+        sync_db.expire_on_commit = False
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        sync_db.info.pop(AFTER_COMMIT_KEY, None)
+        raise
+    finally:
+        sync_db.expire_on_commit = expire_on_commit
+        sync_db.info.pop(UNIT_OF_WORK_KEY, None)
+    
+    _run_after_commit(sync_db)
+
+
+@dataclass
+class QueryStats:
+    """SQL statements issued on behalf of one request"""
+    request_id: Optional[str] = None
+    count: int = 0
+    total_time: float = 0.0
+    slowest_time: float = 0.0
+    slowest_statement: Optional[str] = None
+    statements: Counter = field(default_factory=Counter)
+    identity_hits: int = 0
+    identity_misses: int = 0
+    
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] += 1
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+    
+    def repeated(self, threshold: int) -> Optional[str]:
+        """The most repeated statement if it ran at least ``threshold`` times (likely N+1)"""
+        if not self.statements:
+            return None
+        statement, count = self.statements.most_common(1)[0]
+        return statement if count >= threshold else None
+    
+    def record_identity(self, hit: bool) -> None:
+        if hit:
+            self.identity_hits += 1
+        else:
+            self.identity_misses += 1
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """Statistics of the request being handled, if it is being tracked"""
+    return _query_stats.get()
+
+
+@contextmanager
+def track_queries(request_id: Optional[str] = None) -> Generator[QueryStats, None, None]:
+    """Count statements issued in this context (request middleware, scripts, tests)"""
+    stats = QueryStats(request_id=request_id)
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def record_identity_lookup(hit: bool) -> None:
+    """Count a primary-key lookup against the tracked request's identity map"""
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record_identity(hit)
+
+
+def in_identity_map(db: Session, model: Any, ident: Any) -> Optional[Any]:
+    """The loaded instance for a primary key, without emitting SQL; None if absent or (partly) expired"""
+    obj = db.identity_map.get(identity_key(model, ident))
+    if obj is None:
+        return None
+    state = inspect(obj)
+    if state.expired or state.expired_attributes:
+        return None
+    return obj
+
+
+def get_by_pk(db: Session, model: Any, ident: Any, **kwargs: Any) -> Optional[Any]:
+    """
+    ``Session.get`` that records whether the identity map answered it.
+    
+    Instances already loaded in this session are returned without a SELECT;
+    ``kwargs`` (``options``, ``with_for_update``...) go to ``Session.get``.
+    """
+    record_identity_lookup(in_identity_map(db, model, ident) is not None)
+    return db.get(model, ident, **kwargs)
+
+
+# Registered on the Engine class so the async engine and test engines are covered too
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _query_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _query_stats.get()
+    start_times = conn.info.get("query_start_time")
+    if stats is not None and start_times:
+        stats.record(statement, time.perf_counter() - start_times.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+# Kept out of Base.metadata so the stamp does not change the fingerprint it records
+schema_version_table = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", String(64), primary_key=True),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+
+def schema_fingerprint() -> str:
+    """Hash of the model tables, columns and indexes; changes whenever the models do"""
+    import app.models  # noqa: F401  (register every model on Base.metadata)
+    
+    parts = []
+    for table in Base.metadata.sorted_tables:
+        parts.append(f"table {table.name}")
+        for column in table.columns:
+            parts.append(f"column {column.name} {column.type} {column.nullable} {column.primary_key}")
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            parts.append(f"index {index.name} {index.unique} {[column.name for column in index.columns]}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def get_schema_version(bind=None):
+    """Version stamped by the last init_db(), or None if the database was never stamped"""
+    try:
+        with (bind or engine).connect() as connection:
+            return connection.execute(select(schema_version_table.c.version)).scalar()
+    except DBAPIError as e:
+        if e.connection_invalidated or "schema_version" not in str(e):
+            raise
+        return None
+
+
+def stamp_schema_version(version: str, bind=None) -> None:
+    with (bind or engine).begin() as connection:
+        schema_version_table.create(connection, checkfirst=True)
+        connection.execute(schema_version_table.delete())
+        connection.execute(schema_version_table.insert().values(version=version))
+
+
+def missing_indexes(bind=None) -> List[str]:
+    """Model indexes with no index or key on the same leading columns in the database"""
+    inspector = inspect(bind or engine)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        existing = [index["column_names"] for index in inspector.get_indexes(table.name)]
+        existing += [constraint["column_names"] for constraint in inspector.get_unique_constraints(table.name)]
+        existing.append(inspector.get_pk_constraint(table.name)["constrained_columns"])
+        for index in table.indexes:
+            columns = [column.name for column in index.columns]
+            if not any(names[:len(columns)] == columns for names in existing):
+                missing.append(index.name)
+    return missing
+
+
+def init_db(fast_boot: Optional[bool] = None):
+    """
+    Initialize database tables
+    
+    With ``database_fast_boot`` a database stamped with the current schema
+    fingerprint is left alone: one query instead of create_all's catalog
+    round trip per table.
+    
+    create_all only adds missing tables, never indexes on existing ones, so
+    an existing database must run the SQL migrations in scripts/ first; until
+    every model index exists the schema version is not stamped and the full
+    check runs on every boot.
+    """
+    fast_boot = settings.database_fast_boot if fast_boot is None else fast_boot
+    try:
+        version = schema_fingerprint()
+        if fast_boot and get_schema_version() == version:
+            logger.info(f"Database schema is at version {version[:12]}; skipping create_all")
+            return
+        
+        Base.metadata.create_all(bind=engine)
+        missing = missing_indexes()
+        if missing:
+            logger.error(
+                f"Database is missing indexes {missing}; run the SQL migrations in scripts/. "
+                f"Schema version not stamped"
+            )
+            return
+        stamp_schema_version(version)
+        logger.info(f"Database tables created successfully (schema version {version[:12]})")
+    except Exception as e:
+        logger.error(f"Failed to create database tables: {e}")
+        raise
+
+
+def check_db_connection() -> bool:
+    """Check database connection"""
+    try:
+        with get_db_session() as db:
+            db.execute(text("SELECT 1"))
+        logger.info("Database connection successful")
+        return True
+    except Exception as e:
+        logger.error(f"Database connection failed: {e}")
+        return False
+
+
+def _warmup_size(pool, connections: int) -> int:
+    """Connections worth pre-opening: only queue pools keep them, and only up to pool_size"""
+    if not isinstance(pool, QueuePool):
+        return 0
+    return max(0, min(connections, pool.size()))
+
+
+def warm_pool(bind: Engine, connections: int) -> int:
+    """
+    Open up to ``connections`` pooled connections and return them to the pool
+    
+    They are held together so the pool has to open each one, paying the
+    connect/TLS/auth handshake now instead of on a request. Returns how many
+    were opened.
+    """
+    count = _warmup_size(bind.pool, connections)
+    opened = []
+    try:
+        for _ in range(count):
+            opened.append(bind.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+async def warm_async_pool(bind: AsyncEngine, connections: int) -> int:
+    """Async ``warm_pool``; handshakes run concurrently"""
+    count = _warmup_size(bind.sync_engine.pool, connections)
+    results = await asyncio.gather(
+        *(bind.connect().start() for _ in range(count)),
+        return_exceptions=True
+    )
+    opened = [result for result in results if not isinstance(result, BaseException)]
+    for connection in opened:
+        await connection.close()
+    
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        raise errors[0]
+    return len(opened)
@@ -0,0 +1,165 @@
+"""
+Background health prober
+
+Dependencies are checked on an interval by one background task; health
+endpoints read the cached result, so probes from Kubernetes, Docker and load
+balancers never check out a pooled connection themselves. Readiness also
+waits for the startup warmup. A saturated connection pool only reports the
+instance degraded; it turns unready once saturation persists for
+``health_pool_saturation_probes`` rounds, so a load spike across the fleet
+does not pull every pod out of the Service at once.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Sequence
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import get_settings
+from app.core.database import async_engine, engine
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class HealthState:
+    """Result of one probe round"""
+    database: bool
+    redis: Optional[bool] = None
+    checked_at: Optional[datetime] = None
+    checked_monotonic: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    pool_saturation: float = 0.0
+
+
+def check_database() -> bool:
+    """Run ``SELECT 1`` on one pooled connection"""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return True
+
+
+def pool_saturation(pools: Sequence[Any]) -> float:
+    """Highest checked-out/capacity ratio across queue pools (0.0 - 1.0), read without a checkout"""
+    capacity = settings.database_pool_size + settings.database_max_overflow
+    saturation = 0.0
+    for pool in pools:
+        if isinstance(pool, QueuePool) and capacity > 0:
+            saturation = max(saturation, pool.checkedout() / capacity)
+    return saturation
+
+
+class HealthProber:
+    """Checks the database and Redis every ``interval`` seconds and caches the result"""
+
+    def __init__(
+        self,
+        interval: float = 5.0,
+        database_check: Callable[[], bool] = check_database,
+        redis_client: Any = None,
+        pools: Optional[Sequence[Any]] = None
+    ):
+        self.interval = interval
+        self.database_check = database_check
+        self.redis_client = redis_client
+        self.pools = pools if pools is not None else (engine.pool, async_engine.sync_engine.pool)
+        self.state = HealthState(database=False, errors=["not probed yet"])
+        self.warmed_up = False  # set once startup warmup (app.core.warmup) has run
+        self.saturated_rounds = 0  # consecutive probe rounds at or above the saturation threshold
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stale(self) -> bool:
+        """No successful probe round within three intervals"""
+        return time.monotonic() - self.state.checked_monotonic > self.interval * 3
+
+    async def probe(self) -> HealthState:
+        """Run one probe round off the event loop and cache it"""
+        errors = []
+        database = await self._check("database", self.database_check, errors)
+        redis = None
+        if self.redis_client is not None:
+            redis = await self._check("redis", self.redis_client.ping, errors)
+        saturation = pool_saturation(self.pools)
+        if saturation >= settings.health_pool_saturation_threshold:
+            self.saturated_rounds += 1
+        else:
+            self.saturated_rounds = 0
+
+        previous = self.state
+        self.state = HealthState(
+            database=database,
+            redis=redis,
+            checked_at=datetime.utcnow(),
+            checked_monotonic=time.monotonic(),
+            errors=errors,
+            pool_saturation=saturation
+        )
+        if (previous.database, previous.redis) != (database, redis):
+            logger.info(f"Health changed: database={database} redis={redis}")
+        return self.state
+
+    async def _check(self, name: str, check: Callable[[], Any], errors: List[str]) -> bool:
+        try:
+            return bool(await asyncio.wait_for(asyncio.to_thread(check), timeout=self.interval))
+        except Exception as e:
+            errors.append(f"{name}: {e or type(e).__name__}")
+            return False
+
+    async def start(self) -> None:
+        """Probe once, then keep probing in the background"""
+        if self._task is not None and not self._task.done():
+            return
+        await self.probe()
+        self._task = asyncio.create_task(self._run(), name="health-prober")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"Health probe failed: {e}")
+
+    def readiness(self) -> List[str]:
+        """Reasons the instance should not receive traffic; empty when ready"""
+        state = self.state
+        reasons = list(state.errors)
+        if not self.warmed_up:
+            reasons.append("warming up")
+        if not state.database and not any(error.startswith("database") for error in reasons):
+            reasons.append("database: unavailable")
+        if self.stale:
+            reasons.append("health state is stale")
+        limit = settings.health_pool_saturation_probes
+        if limit and self.saturated_rounds >= limit:
+            reasons.append(f"connection pool saturated for {self.saturated_rounds} probes")
+        return reasons
+
+    def warnings(self) -> List[str]:
+        """Conditions that degrade the instance without taking it out of rotation"""
+        if self.saturated_rounds:
+            return [f"connection pool {self.state.pool_saturation:.0%} checked out"]
+        return []
+
+
+@lru_cache()
+def get_health_prober() -> HealthProber:
+    """Get the process-wide prober"""
+    return HealthProber(
+        interval=settings.health_check_interval_seconds,
+        redis_client=get_redis_client()
+    )
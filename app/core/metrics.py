@@ -0,0 +1,251 @@
+"""
+Prometheus metrics
+
+Every worker process records into its own metric values; when
+``PROMETHEUS_MULTIPROC_DIR`` is set (gunicorn with several workers) values are
+written to per-process mmap files and /metrics aggregates them. Call
+``mark_process_dead(worker.pid)`` from gunicorn's ``child_exit`` hook so
+live gauges of exited workers are dropped.
+
+Hot-path recording goes through pre-resolved label children, so a request
+costs a few uncontended per-value locks and no registry lookups.
+"""
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.routing import Match
+from starlette.types import Scope
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = "<unmatched>"
+MAX_ROUTE_CACHE_ENTRIES = 1024
+# Request methods get their own label value; anything else is OTHER
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+OTHER_METHOD = "OTHER"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency until the response starts",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being handled",
+    ["method", "route"],
+    multiprocess_mode="livesum"
+)
+RESPONSES = Counter(
+    "http_responses_total",
+    "Responses by status code",
+    ["method", "route", "status"]
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements issued per request",
+    ["route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100)
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per request",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by the rate limiter",
+    ["scope"]
+)
+OTP_SENT = Counter(
+    "otp_sent_total",
+    "OTP messages handed to the SMS provider",
+    ["result"]
+)
+OTP_VERIFICATIONS = Counter(
+    "otp_verifications_total",
+    "OTP verification attempts",
+    ["result"]
+)
+OTP_LOG_ROWS = Counter(
+    "otp_log_rows_total",
+    "otp_logs rows from the write-behind writer (written, failed, dropped)",
+    ["result"]
+)
+SMS_MESSAGES = Counter(
+    "sms_messages_total",
+    "SMS outbox outcomes per message (sent, retried, failed, dropped)",
+    ["result"]
+)
+SMS_QUEUE_DEPTH = Gauge(
+    "sms_outbox_depth",
+    "Messages waiting in the SMS outbox",
+    multiprocess_mode="livesum"
+)
+SMS_SEND_LATENCY = Histogram(
+    "sms_send_duration_seconds",
+    "Provider call latency per batch",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size (negative while the pool is filling)",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+
+RETENTION_ROWS = Counter(
+    "retention_rows_deleted_total",
+    "Expired rows deleted by the retention sweeper",
+    ["table"]
+)
+ARCHIVE_ROWS = Counter(
+    "archive_rows_total",
+    "Rows written to the archive and purged from the hot tables",
+    ["table"]
+)
+RETENTION_ROWS_PER_SECOND = Gauge(
+    "retention_rows_per_second",
+    "Delete rate of the last retention sweep",
+    ["table"],
+    multiprocess_mode="livemax"
+)
+RETENTION_LAG = Gauge(
+    "retention_lag_seconds",
+    "How far the oldest expired row left after the last sweep is behind the cutoff",
+    ["table"],
+    multiprocess_mode="livemax"
+)
+
+_routes: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_request_children: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+_status_children: Dict[Tuple[str, str, int], Any] = {}
+_db_children: Dict[str, Tuple[Any, Any]] = {}
+
+
+def method_label(method: str) -> str:
+    """Request method as a label value; unknown methods collapse to OTHER"""
+    return method if method in HTTP_METHODS else OTHER_METHOD
+
+
+def route_label(scope: Scope) -> str:
+    """Route template for a request (``/api/v1/users/{user_id}``), cached per path"""
+    key = (method_label(scope["method"]), scope["path"])
+    label = _routes.get(key)
+    if label is not None:
+        _routes.move_to_end(key)
+        return label
+
+    label = UNMATCHED_ROUTE
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            label = getattr(route, "path", UNMATCHED_ROUTE)
+            break
+        if match == Match.PARTIAL and label == UNMATCHED_ROUTE:
+            label = getattr(route, "path", UNMATCHED_ROUTE)
+
+    # Unmatched paths are attacker-controlled and never cached; paths of
+    # parameterized routes are, least recently used first out
+    if label != UNMATCHED_ROUTE:
+        _routes[key] = label
+        if len(_routes) > MAX_ROUTE_CACHE_ENTRIES:
+            _routes.popitem(last=False)
+    return label
+
+
+def request_started(method: str, route: str) -> None:
+    children = _request_children.get((method, route))
+    if children is None:
+        children = (
+            REQUESTS_IN_PROGRESS.labels(method, route),
+            REQUEST_LATENCY.labels(method, route),
+        )
+        _request_children[(method, route)] = children
+    children[0].inc()
+
+
+def request_finished(method: str, route: str, status: Optional[int], elapsed: Optional[float]) -> None:
+    """Record a finished request; ``status``/``elapsed`` are None if no response was started"""
+    in_progress, latency = _request_children[(method, route)]
+    in_progress.dec()
+    if elapsed is not None:
+        latency.observe(elapsed)
+    if status is not None:
+        counter = _status_children.get((method, route, status))
+        if counter is None:
+            counter = RESPONSES.labels(method, route, str(status))
+            _status_children[(method, route, status)] = counter
+        counter.inc()
+
+
+def observe_request_queries(route: str, count: int, seconds: float) -> None:
+    children = _db_children.get(route)
+    if children is None:
+        children = (REQUEST_DB_QUERIES.labels(route), REQUEST_DB_SECONDS.labels(route))
+        _db_children[route] = children
+    children[0].observe(count)
+    children[1].observe(seconds)
+
+
+def instrument_pool(engine: Any, name: str) -> None:
+    """Export checked-out/overflow gauges and wait time for an engine with a TimedQueuePool"""
+    pool = engine.pool
+    if not hasattr(pool, "wait_listeners"):
+        return
+    checked_out = POOL_CHECKED_OUT.labels(name)
+    overflow = POOL_OVERFLOW.labels(name)
+    wait = POOL_WAIT.labels(name)
+
+    def update() -> None:
+        checked_out.set(pool.checkedout())
+        overflow.set(pool.overflow())
+
+    def on_checkout(waited: float) -> None:
+        wait.observe(waited)
+        update()
+
+    pool.wait_listeners.append(on_checkout)
+    pool.checkin_listeners.append(update)
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Exposition payload and content type, aggregated across workers in multiprocess mode"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop live gauges of an exited worker (gunicorn ``child_exit`` hook)"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
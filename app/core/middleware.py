@@ -1,114 +1,335 @@
-"""
-Custom middleware for the application
-"""
-import time
-import logging
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.middleware.base import RequestResponseEndpoint
-from starlette.responses import Response as StarletteResponse
-import uuid
-
-logger = logging.getLogger(__name__)
-
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for request/response logging"""
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> StarletteResponse:
-        # Generate request ID
-        request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
-        
-        # Log request
-        start_time = time.time()
-        logger.info(
-            f"Request {request_id}: {request.method} {request.url.path} "
-            f"from {request.client.host if request.client else 'unknown'}"
-        )
-        
-        # Process request
-        try:
-            response = await call_next(request)
-            
-            # Log response
-            process_time = time.time() - start_time
-            logger.info(
-                f"Response {request_id}: {response.status_code} "
-                f"processed in {process_time:.4f}s"
-            )
-            
-            # Add request ID to response headers
-            response.headers["X-Request-ID"] = request_id
-            response.headers["X-Process-Time"] = str(process_time)
-            
-            return response
-            
-        except Exception as e:
-            process_time = time.time() - start_time
-            logger.error(
-                f"Error {request_id}: {str(e)} "
-                f"after {process_time:.4f}s"
-            )
-            raise
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware to add security headers"""
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> StarletteResponse:
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-        
-        return response
-
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple rate limiting middleware"""
-    
-    def __init__(self, app, calls: int = 100, period: int = 60):
-        super().__init__(app)
-        self.calls = calls
-        self.period = period
-        self.clients = {}
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> StarletteResponse:
-        client_ip = request.client.host if request.client else "unknown"
-        current_time = time.time()
-        
-        # Clean old entries
-        self.clients = {
-            ip: timestamps for ip, timestamps in self.clients.items()
-            if any(ts > current_time - self.period for ts in timestamps)
-        }
-        
-        # Check rate limit
-        if client_ip in self.clients:
-            # Remove old timestamps
-            self.clients[client_ip] = [
-                ts for ts in self.clients[client_ip]
-                if ts > current_time - self.period
-            ]
-            
-            if len(self.clients[client_ip]) >= self.calls:
-                logger.warning(f"Rate limit exceeded for {client_ip}")
-                return StarletteResponse(
-                    content="Rate limit exceeded",
-                    status_code=429,
-                    headers={"Retry-After": str(self.period)}
-                )
-        else:
-            self.clients[client_ip] = []
-        
-        # Add current request timestamp
-        self.clients[client_ip].append(current_time)
-        
-        response = await call_next(request)
-        return response
+"""
+Custom middleware for the application
+
+All middleware here is raw ASGI: no per-request task, body stream or
+Request/Response objects are created. RequestPipelineMiddleware fuses rate
+limiting, request logging and security headers into a single pass; the
+individual classes remain available for composing stacks by hand.
+
+The logging middleware also tracks the SQL statements each request issues
+(see app.core.database.track_queries) and reports them in the response log
+line and, in debug mode, as X-DB-Query-Count/X-DB-Query-Time/X-DB-Slowest-Query-Time
+headers.
+"""
+import ipaddress
+import time
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from starlette.responses import Response as StarletteResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import uuid
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.database import QueryStats, track_queries
+from app.core.rate_limit import RateLimit, RateLimitResult, SlidingWindowRateLimiter, get_rate_limiter, get_route_limits
+from app.utils.logging import request_id_var
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SECURITY_HEADERS: List[Tuple[bytes, bytes]] = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+]
+
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def trusted_networks(proxies: Iterable[str]) -> Tuple[Network, ...]:
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+TRUSTED_PROXIES = trusted_networks(settings.trusted_proxies)
+
+
+def _is_trusted(address: str, trusted: Sequence[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted)
+
+
+def client_in_networks(scope: Scope, networks: Sequence[Network]) -> bool:
+    """Whether the client address resolved by ``_client_ip`` is in one of ``networks``"""
+    return _is_trusted(_client_ip(scope), networks)
+
+
+def _client_ip(scope: Scope, trusted: Sequence[Network] = TRUSTED_PROXIES) -> str:
+    """
+    Address of the client that sent the request.
+
+    When the peer is a trusted proxy, the client is the right-most
+    X-Forwarded-For entry that is not a trusted proxy itself. The header of
+    any other peer is ignored, so clients cannot pick their own address.
+    """
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if not trusted or not _is_trusted(peer, trusted):
+        return peer
+
+    forwarded = ",".join(
+        value.decode("latin-1") for name, value in scope.get("headers", ()) if name == b"x-forwarded-for"
+    )
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted):
+            return hop
+    return hops[0] if hops else peer
+
+
+def _set_headers(message: Message, new_headers: List[Tuple[bytes, bytes]]) -> None:
+    """Set headers on an http.response.start message, replacing existing values"""
+    names = {name for name, _ in new_headers}
+    headers = [(name, value) for name, value in message.get("headers", ()) if name.lower() not in names]
+    headers.extend(new_headers)
+    message["headers"] = headers
+
+
+def _query_headers(stats: QueryStats) -> List[Tuple[bytes, bytes]]:
+    return [
+        (b"x-db-query-count", str(stats.count).encode("latin-1")),
+        (b"x-db-query-time", f"{stats.total_time * 1000:.3f}".encode("latin-1")),
+        (b"x-db-slowest-query-time", f"{stats.slowest_time * 1000:.3f}".encode("latin-1")),
+        (b"x-db-identity-map-hits", str(stats.identity_hits).encode("latin-1")),
+        (b"x-db-identity-map-misses", str(stats.identity_misses).encode("latin-1")),
+    ]
+
+
+def _log_response(request_id: str, status: int, process_time: float, stats: QueryStats) -> None:
+    logger.info(
+        f"Response {request_id}: {status} "
+        f"processed in {process_time:.4f}s "
+        f"({stats.count} queries, {stats.total_time:.4f}s in db, "
+        f"{stats.identity_hits}/{stats.identity_hits + stats.identity_misses} identity map hits)"
+    )
+    repeated = stats.repeated(settings.database_repeated_query_threshold)
+    if repeated is not None:
+        logger.warning(
+            f"Request {request_id} ran the same statement {stats.statements[repeated]} times "
+            f"(possible N+1): {repeated}"
+        )
+
+
+class LoggingMiddleware:
+    """Middleware for request/response logging"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        query_headers: Optional[bool] = None,
+        trusted_proxies: Optional[Sequence[str]] = None
+    ):
+        self.app = app
+        self.query_headers = (settings.debug or settings.database_query_headers) if query_headers is None else query_headers
+        self.trusted_proxies = TRUSTED_PROXIES if trusted_proxies is None else trusted_networks(trusted_proxies)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Generate request ID (exposed as request.state.request_id and on log records)
+        request_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+
+        # Log request
+        start_time = time.time()
+        logger.info(
+            f"Request {request_id}: {scope['method']} {scope['path']} "
+            f"from {_client_ip(scope, self.trusted_proxies)}"
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Log response
+                process_time = time.time() - start_time
+                _log_response(request_id, message["status"], process_time, stats)
+
+                # Add request ID to response headers
+                headers = [
+                    (b"x-request-id", request_id.encode("latin-1")),
+                    (b"x-process-time", str(process_time).encode("latin-1")),
+                ]
+                if self.query_headers:
+                    headers.extend(_query_headers(stats))
+                _set_headers(message, headers)
+            await send(message)
+
+        try:
+            with track_queries(request_id) as stats:
+                await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            process_time = time.time() - start_time
+            logger.error(
+                f"Error {request_id}: {str(e)} "
+                f"after {process_time:.4f}s"
+            )
+            raise
+        finally:
+            request_id_var.reset(token)
+
+
+class SecurityHeadersMiddleware:
+    """Middleware to add security headers"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                _set_headers(message, SECURITY_HEADERS)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class RateLimitMiddleware:
+    """Sliding-window rate limiting per client IP, with stricter per-route limits"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        calls: int = 100,
+        period: int = 60,
+        route_limits: Optional[Dict[str, str]] = None,
+        limiter: Optional[SlidingWindowRateLimiter] = None,
+        query_headers: Optional[bool] = None,
+        trusted_proxies: Optional[Sequence[str]] = None
+    ):
+        self.app = app
+        self.rate = RateLimit(limit=calls, window=period)
+        self.route_limits = get_route_limits(route_limits)
+        self.limiter = limiter or get_rate_limiter()
+        self.query_headers = (settings.debug or settings.database_query_headers) if query_headers is None else query_headers
+        self.trusted_proxies = TRUSTED_PROXIES if trusted_proxies is None else trusted_networks(trusted_proxies)
+
+    def check(self, scope: Scope) -> RateLimitResult:
+        """
+        Count the request against the per-route and global limits
+
+        A request rejected by one limit is not counted against the other.
+        """
+        client_ip = _client_ip(scope, self.trusted_proxies)
+        path = scope["path"]
+
+        route_rate = self.route_limits.get(path)
+        route_key = f"{path}:{client_ip}"
+        result = None
+        limit_scope = "route"
+        if route_rate is not None:
+            result = self.limiter.hit(route_key, route_rate)
+        if result is None or result.allowed:
+            result = self.limiter.hit(client_ip, self.rate)
+            limit_scope = "global"
+            if not result.allowed and route_rate is not None:
+                self.limiter.refund(route_key, route_rate)
+
+        if not result.allowed:
+            logger.warning(f"Rate limit exceeded for {client_ip} on {path}")
+            metrics.RATE_LIMIT_REJECTIONS.labels(limit_scope).inc()
+        return result
+
+    async def reject(self, result: RateLimitResult, scope: Scope, receive: Receive, send: Send) -> None:
+        response = StarletteResponse(
+            content="Rate limit exceeded",
+            status_code=429,
+            headers={"Retry-After": str(result.retry_after)}
+        )
+        await response(scope, receive, send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        result = self.check(scope)
+        if not result.allowed:
+            await self.reject(result, scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+class RequestPipelineMiddleware(RateLimitMiddleware):
+    """
+    Rate limiting, request logging and security headers in one pass.
+
+    Equivalent to stacking RateLimitMiddleware, SecurityHeadersMiddleware and
+    LoggingMiddleware (outermost first): rejected requests get the same bare
+    429, everything else gets X-Request-ID, X-Process-Time and the security
+    headers from a single send wrapper. Request metrics (latency, in-flight,
+    status codes, statements per request) are recorded here as well.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = metrics.method_label(scope["method"])
+        route = metrics.route_label(scope)
+        metrics.request_started(method, route)
+        start_time = time.time()
+
+        result = self.check(scope)
+        if not result.allowed:
+            try:
+                await self.reject(result, scope, receive, send)
+            finally:
+                metrics.request_finished(method, route, 429, time.time() - start_time)
+            return
+
+        request_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+
+        logger.info(
+            f"Request {request_id}: {scope['method']} {scope['path']} "
+            f"from {_client_ip(scope, self.trusted_proxies)}"
+        )
+        status: Optional[int] = None
+        process_time: Optional[float] = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, process_time
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                process_time = time.time() - start_time
+                _log_response(request_id, status, process_time, stats)
+                headers = SECURITY_HEADERS + [
+                    (b"x-request-id", request_id.encode("latin-1")),
+                    (b"x-process-time", str(process_time).encode("latin-1")),
+                ]
+                if self.query_headers:
+                    headers.extend(_query_headers(stats))
+                _set_headers(message, headers)
+            await send(message)
+
+        try:
+            with track_queries(request_id) as stats:
+                await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            elapsed = time.time() - start_time
+            if status is None:
+                status, process_time = 500, elapsed
+            logger.error(
+                f"Error {request_id}: {str(e)} "
+                f"after {elapsed:.4f}s"
+            )
+            raise
+        finally:
+            request_id_var.reset(token)
+            metrics.request_finished(method, route, status, process_time)
+            metrics.observe_request_queries(route, stats.count, stats.total_time)
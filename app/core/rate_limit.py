@@ -0,0 +1,197 @@
+"""
+Sliding-window rate limiting with pluggable counter backends
+"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+from app.core.config import get_settings
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """``limit`` requests per ``window`` seconds"""
+    limit: int
+    window: int
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Parse ``"<limit>/<window seconds>"``, e.g. ``"5/60"``"""
+        limit, _, window = value.partition("/")
+        return cls(limit=int(limit), window=int(window or 60))
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of a single rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int
+
+
+class RateLimitBackend(ABC):
+    """Per-key fixed-window counters"""
+
+    @abstractmethod
+    def hit(self, key: str, window_index: int, window: int) -> Tuple[int, int]:
+        """Count a request in ``window_index``; return (current, previous) window counts"""
+
+    @abstractmethod
+    def undo(self, key: str, window_index: int, window: int) -> None:
+        """Take back a counted request that was rejected"""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Process-local counters: three numbers per key.
+
+    Keys idle for two windows are swept at most once per window, so the sweep
+    cost is amortised over the requests of that window.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, list] = {}
+        self._last_sweep: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, window_index: int, window: int) -> Tuple[int, int]:
+        with self._lock:
+            if self._last_sweep.get(window, window_index) < window_index:
+                self._sweep(window_index, window)
+            self._last_sweep[window] = window_index
+
+            entry = self._counters.get(key)
+            if entry is None or entry[0] < window_index - 1:
+                entry = [window_index, 0, 0]
+                self._counters[key] = entry
+            elif entry[0] == window_index - 1:
+                entry[0], entry[1], entry[2] = window_index, 0, entry[1]
+
+            entry[1] += 1
+            return entry[1], entry[2]
+
+    def undo(self, key: str, window_index: int, window: int) -> None:
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is not None and entry[0] == window_index and entry[1] > 0:
+                entry[1] -= 1
+
+    def _sweep(self, window_index: int, window: int) -> None:
+        stale = [
+            key for key, entry in self._counters.items()
+            if entry[0] < window_index - 1 and key.endswith(f"/{window}")
+        ]
+        for key in stale:
+            del self._counters[key]
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Counters shared by every worker and pod: one ``INCR`` + ``EXPIRE`` + ``GET``
+    round trip per request.
+    """
+
+    def __init__(self, client: Any, key_prefix: str = "ratelimit:"):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def _key(self, key: str, window_index: int) -> str:
+        return f"{self.key_prefix}{key}:{window_index}"
+
+    def hit(self, key: str, window_index: int, window: int) -> Tuple[int, int]:
+        pipe = self.client.pipeline()
+        pipe.incr(self._key(key, window_index))
+        pipe.expire(self._key(key, window_index), window * 2)
+        pipe.get(self._key(key, window_index - 1))
+        current, _, previous = pipe.execute()
+        return int(current), int(previous or 0)
+
+    def undo(self, key: str, window_index: int, window: int) -> None:
+        self.client.incrby(self._key(key, window_index), -1)
+
+
+class SlidingWindowRateLimiter:
+    """
+    Sliding-window counter limiter.
+
+    The request rate is estimated from the current and previous fixed windows,
+    weighting the previous one by how much of it still overlaps the sliding
+    window. Time and memory per key are constant.
+    """
+
+    def __init__(self, backend: RateLimitBackend, clock: Callable[[], float] = time.time):
+        self.backend = backend
+        self._clock = clock
+        self.rejections = 0
+
+    def hit(self, key: str, rate: RateLimit) -> RateLimitResult:
+        """Count a request for ``key`` and decide whether it is allowed"""
+        now = self._clock()
+        window_index = int(now // rate.window)
+        elapsed = now - window_index * rate.window
+        counter_key = f"{key}/{rate.window}"
+
+        current, previous = self.backend.hit(counter_key, window_index, rate.window)
+        estimated = previous * (1 - elapsed / rate.window) + current
+
+        if estimated <= rate.limit:
+            return RateLimitResult(
+                allowed=True,
+                limit=rate.limit,
+                remaining=max(0, int(rate.limit - estimated)),
+                retry_after=0
+            )
+
+        self.backend.undo(counter_key, window_index, rate.window)
+        self.rejections += 1
+
+        # Wait until the previous window's weight has decayed enough, or the window rolls over
+        retry_after = rate.window - elapsed
+        if previous and current - 1 < rate.limit:
+            needed = (previous + current - rate.limit) / previous
+            retry_after = min(retry_after, max(0.0, needed * rate.window - elapsed))
+        return RateLimitResult(
+            allowed=False,
+            limit=rate.limit,
+            remaining=0,
+            retry_after=max(1, math.ceil(retry_after))
+        )
+
+    def refund(self, key: str, rate: RateLimit) -> None:
+        """Take back an allowed hit for ``key``, e.g. when another limit rejected the request"""
+        window_index = int(self._clock() // rate.window)
+        self.backend.undo(f"{key}/{rate.window}", window_index, rate.window)
+
+
+@lru_cache()
+def get_rate_limiter() -> SlidingWindowRateLimiter:
+    """Get the limiter for the configured backend (memory, redis)"""
+    backend_name = settings.rate_limit_backend.lower()
+    if backend_name == "redis":
+        client = get_redis_client()
+        if client is not None:
+            return SlidingWindowRateLimiter(RedisRateLimitBackend(client))
+        logger.warning("rate_limit_backend is 'redis' but redis_url is not set; limits are per process")
+    elif backend_name != "memory":
+        raise ValueError(f"Unsupported rate limit backend: {settings.rate_limit_backend}")
+
+    return SlidingWindowRateLimiter(MemoryRateLimitBackend())
+
+
+def get_route_limits(routes: Optional[Dict[str, str]] = None) -> Dict[str, RateLimit]:
+    """Parse per-route limits (path -> "limit/window")"""
+    routes = settings.rate_limit_routes if routes is None else routes
+    return {path: RateLimit.parse(value) for path, value in routes.items()}
@@ -0,0 +1,250 @@
+"""
+Redis client management
+"""
+import fnmatch
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# redis_url value that selects the in-process FakeRedis
+MEMORY_REDIS_URL = "memory://"
+
+# Atomic read-modify-write commands, run with EVAL (FakeRedis.eval runs these
+# exact scripts in Python)
+INCR_EXPIRE_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+local ttl = redis.call('TTL', KEYS[1])
+if ttl < 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+    ttl = tonumber(ARGV[1])
+end
+return {count, ttl}
+"""
+COMPARE_DELETE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+COMPARE_PEXPIRE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def incr_with_expiry(client: Any, name: str, ttl: int) -> Tuple[int, int]:
+    """INCR ``name``, starting a ``ttl`` expiry on the first hit; returns (count, seconds left)"""
+    count, remaining = client.eval(INCR_EXPIRE_SCRIPT, 1, name, int(ttl))
+    return int(count), int(remaining)
+
+
+def compare_and_delete(client: Any, name: str, expected: str) -> bool:
+    """DEL ``name`` only while it still holds ``expected``"""
+    return bool(client.eval(COMPARE_DELETE_SCRIPT, 1, name, expected))
+
+
+def compare_and_pexpire(client: Any, name: str, expected: str, milliseconds: int) -> bool:
+    """Reset the expiry of ``name`` only while it still holds ``expected``"""
+    return bool(client.eval(COMPARE_PEXPIRE_SCRIPT, 1, name, expected, int(milliseconds)))
+
+
+class FakeRedis:
+    """
+    In-process stand-in for the subset of redis-py used by the application.
+
+    Values are stored as strings (like ``decode_responses=True``) and keys
+    expire lazily. It lets tests and benchmarks exercise the Redis code paths
+    without a server; it is not shared between processes.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._lock = threading.RLock()
+
+    # Keys
+
+    def _live(self, name: str) -> Optional[str]:
+        entry = self._data.get(name)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[name]
+            return None
+        return value
+
+    def ping(self) -> bool:
+        return True
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            return self._live(name)
+
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        with self._lock:
+            return [self._live(key) for key in keys]
+
+    def set(
+        self,
+        name: str,
+        value: Any,
+        ex: Optional[float] = None,
+        px: Optional[float] = None,
+        nx: bool = False,
+        xx: bool = False,
+        exat: Optional[float] = None
+    ) -> Optional[bool]:
+        with self._lock:
+            exists = self._live(name) is not None
+            if (nx and exists) or (xx and not exists):
+                return None
+
+            expires_at = None
+            if ex is not None:
+                expires_at = time.time() + ex
+            elif px is not None:
+                expires_at = time.time() + px / 1000.0
+            elif exat is not None:
+                expires_at = float(exat)
+
+            self._data[name] = (str(value), expires_at)
+            return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            deleted = 0
+            for name in names:
+                if self._live(name) is not None:
+                    del self._data[name]
+                    deleted += 1
+            return deleted
+
+    def exists(self, *names: str) -> int:
+        with self._lock:
+            return sum(1 for name in names if self._live(name) is not None)
+
+    def keys(self, pattern: str = "*") -> List[str]:
+        with self._lock:
+            return [key for key in list(self._data) if self._live(key) is not None and fnmatch.fnmatchcase(key, pattern)]
+
+    def expire(self, name: str, time_seconds: float) -> bool:
+        with self._lock:
+            value = self._live(name)
+            if value is None:
+                return False
+            self._data[name] = (value, time.time() + time_seconds)
+            return True
+
+    def ttl(self, name: str) -> int:
+        with self._lock:
+            if self._live(name) is None:
+                return -2
+            expires_at = self._data[name][1]
+            if expires_at is None:
+                return -1
+            return max(0, int(round(expires_at - time.time())))
+
+    # Counters
+
+    def incrby(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            value = self._live(name)
+            expires_at = self._data[name][1] if value is not None else None
+            new_value = int(value or 0) + amount
+            self._data[name] = (str(new_value), expires_at)
+            return new_value
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        return self.incrby(name, amount)
+
+    # Scripts
+
+    def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        with self._lock:
+            if script == INCR_EXPIRE_SCRIPT:
+                count = self.incr(keys[0])
+                remaining = self.ttl(keys[0])
+                if remaining < 0:
+                    self.expire(keys[0], int(args[0]))
+                    remaining = int(args[0])
+                return [count, remaining]
+            if script in (COMPARE_DELETE_SCRIPT, COMPARE_PEXPIRE_SCRIPT):
+                if self._live(keys[0]) != str(args[0]):
+                    return 0
+                if script == COMPARE_DELETE_SCRIPT:
+                    return self.delete(keys[0])
+                return int(self.expire(keys[0], int(args[1]) / 1000.0))
+        raise NotImplementedError("FakeRedis only runs the scripts defined in app.core.redis_client")
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def flushall(self) -> bool:
+        with self._lock:
+            self._data.clear()
+            return True
+
+
+class FakePipeline:
+    """Buffers FakeRedis commands and runs them atomically on execute()"""
+
+    def __init__(self, client: FakeRedis):
+        self._client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        if not hasattr(self._client, name):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> List[Any]:
+        with self._client._lock:
+            results = [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+    def __enter__(self) -> "FakePipeline":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._commands = []
+
+
+@lru_cache()
+def get_redis_client() -> Optional[Any]:
+    """
+    Get the shared Redis client, or None when Redis is not configured.
+
+    ``redis_url = "memory://"`` returns a process-local FakeRedis.
+    """
+    if not settings.redis_url:
+        return None
+
+    if settings.redis_url == MEMORY_REDIS_URL:
+        logger.info("Using in-process FakeRedis")
+        return FakeRedis()
+
+    import redis
+
+    return redis.Redis.from_url(
+        settings.redis_url,
+        decode_responses=True,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_timeout,
+        health_check_interval=30
+    )
@@ -1,87 +1,102 @@
-"""
-Security utilities and authentication helpers
-"""
-import secrets
-import hashlib
-import hmac
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import HTTPException, status
-import logging
-
-from app.core.config import get_settings
-
-logger = logging.getLogger(__name__)
-settings = get_settings()
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def generate_secure_token(length: int = 32) -> str:
-    """Generate a secure random token"""
-    return secrets.token_urlsafe(length)
-
-
-def hash_password(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
-    """Create JWT access token"""
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
-    
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm="HS256")
-    return encoded_jwt
-
-
-def verify_token(token: str) -> Optional[Dict[str, Any]]:
-    """Verify and decode JWT token"""
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
-        return payload
-    except JWTError as e:
-        logger.warning(f"Token verification failed: {e}")
-        return None
-
-
-def generate_otp(length: int = 6) -> str:
-    """Generate OTP code"""
-    return ''.join([str(secrets.randbelow(10)) for _ in range(length)])
-
-
-def create_hmac_signature(data: str, secret: str) -> str:
-    """Create HMAC signature for data integrity"""
-    return hmac.new(
-        secret.encode('utf-8'),
-        data.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest()
-
-
-def verify_hmac_signature(data: str, signature: str, secret: str) -> bool:
-    """Verify HMAC signature"""
-    expected_signature = create_hmac_signature(data, secret)
-    return hmac.compare_digest(signature, expected_signature)
-
-
-class SecurityException(HTTPException):
-    """Custom security exception"""
-    def __init__(self, detail: str = "Security violation"):
-        super().__init__(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=detail
-        )
+"""
+Security utilities and authentication helpers
+"""
+import secrets
+import hashlib
+import hmac
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Dict, Any
+from fastapi import HTTPException, status
+import logging
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+# passlib/bcrypt and jose are imported on first use to keep them off the startup path
+@lru_cache()
+def get_pwd_context():
+    """Password hashing context"""
+    from passlib.context import CryptContext
+    
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def __getattr__(name: str) -> Any:
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def generate_secure_token(length: int = 32) -> str:
+    """Generate a secure random token"""
+    return secrets.token_urlsafe(length)
+
+
+def hash_password(password: str) -> str:
+    """Hash a password"""
+    return get_pwd_context().hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash"""
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+    """Create JWT access token"""
+    from jose import jwt
+    
+    to_encode = data.copy()
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+    
+    to_encode.update({"exp": expire})
+    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm="HS256")
+    return encoded_jwt
+
+
+def verify_token(token: str) -> Optional[Dict[str, Any]]:
+    """Verify and decode JWT token"""
+    from jose import JWTError, jwt
+    
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
+        return payload
+    except JWTError as e:
+        logger.warning(f"Token verification failed: {e}")
+        return None
+
+
+def generate_otp(length: int = 6) -> str:
+    """Generate OTP code"""
+    return ''.join([str(secrets.randbelow(10)) for _ in range(length)])
+
+
+def create_hmac_signature(data: str, secret: str) -> str:
+    """Create HMAC signature for data integrity"""
+    return hmac.new(
+        secret.encode('utf-8'),
+        data.encode('utf-8'),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def verify_hmac_signature(data: str, signature: str, secret: str) -> bool:
+    """Verify HMAC signature"""
+    expected_signature = create_hmac_signature(data, secret)
+    return hmac.compare_digest(signature, expected_signature)
+
+
+class SecurityException(HTTPException):
+    """Custom security exception"""
+    def __init__(self, detail: str = "Security violation"):
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=detail
+        )
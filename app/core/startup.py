@@ -0,0 +1,46 @@
+"""
+Startup profiling
+
+Records how long each boot phase takes (imports, settings, engine creation,
+schema check, pool warmup, ...) and logs one summary line once the
+application is ready, so cold-start regressions show up in pod logs.
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Generator, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """Ordered phase -> seconds timings for one boot"""
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Generator[None, None, None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def report(self) -> str:
+        """Log and return the summary line"""
+        timings = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        summary = f"Startup completed in {self.total * 1000:.0f}ms ({timings})"
+        logger.info(summary)
+        return summary
+
+
+startup_profiler = StartupProfiler()
@@ -0,0 +1,58 @@
+"""
+Startup warmup
+
+Runs after the lifespan startup, in the background: pre-opens pooled
+database connections and primes in-process caches so the first requests
+routed to a new instance do not pay connection handshakes or cache misses.
+The health prober reports "warming up" until every step has run.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import logging
+
+from app.core.startup import StartupProfiler, startup_profiler
+
+logger = logging.getLogger(__name__)
+
+WarmupStep = Callable[[], Awaitable[Any]]
+
+
+class Warmup:
+    """Ordered named warmup steps; a failing step is logged and skipped"""
+
+    def __init__(self, profiler: Optional[StartupProfiler] = None):
+        self.profiler = profiler if profiler is not None else startup_profiler
+        self.steps: List[Tuple[str, WarmupStep]] = []
+        self.results: Dict[str, Any] = {}
+        self.completed = False
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, name: str, step: WarmupStep) -> None:
+        self.steps.append((name, step))
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every step in order; returns step name -> result (None if it failed)"""
+        for name, step in self.steps:
+            with self.profiler.phase(f"warmup {name}"):
+                try:
+                    self.results[name] = await step()
+                except Exception as e:
+                    logger.warning(f"Warmup step '{name}' failed: {e}")
+                    self.results[name] = None
+        self.completed = True
+        return self.results
+
+    def start(self, on_complete: Optional[Callable[[], None]] = None) -> None:
+        """Run in a background task, then call ``on_complete``"""
+        async def run_and_notify() -> None:
+            await self.run()
+            if on_complete is not None:
+                on_complete()
+
+        self._task = asyncio.create_task(run_and_notify(), name="warmup")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
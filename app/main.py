@@ -1,129 +1,232 @@
-"""
-Main FastAPI application entry point
-"""
-from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from contextlib import asynccontextmanager
-import logging
-
-from app.core.config import get_settings
-from app.core.database import init_db, check_db_connection
-from app.core.middleware import LoggingMiddleware, SecurityHeadersMiddleware, RateLimitMiddleware
-from app.core.exceptions import TimelyCabsException, create_http_exception
-from app.api.v1 import api_router
-from app.utils.logging import setup_logging
-
-# Setup logging
-setup_logging()
-logger = logging.getLogger(__name__)
-
-settings = get_settings()
-
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """
-    Application lifespan events
-    """
-    # Startup
-    logger.info("Starting TimelyCabs application...")
-    
-    # Initialize database
-    try:
-        init_db()
-        if check_db_connection():
-            logger.info("Database connection established")
-        else:
-            logger.error("Database connection failed")
-    except Exception as e:
-        logger.error(f"Database initialization failed: {e}")
-    
-    yield
-    
-    # Shutdown
-    logger.info("Shutting down TimelyCabs application...")
-
-
-# Create FastAPI instance
-app = FastAPI(
-    title=settings.app_name,
-    description="A comprehensive taxi booking and management system",
-    version=settings.app_version,
-    docs_url="/docs" if settings.debug else None,
-    redoc_url="/redoc" if settings.debug else None,
-    lifespan=lifespan
-)
-
-# Add middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Add custom middleware
-app.add_middleware(LoggingMiddleware)
-app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(RateLimitMiddleware, calls=settings.rate_limit_requests, period=settings.rate_limit_window)
-
-
-# Global exception handler
-@app.exception_handler(TimelyCabsException)
-async def timelycabs_exception_handler(request: Request, exc: TimelyCabsException):
-    """Handle TimelyCabs exceptions"""
-    logger.error(f"TimelyCabs exception: {exc.message}")
-    return JSONResponse(
-        status_code=400,
-        content={
-            "success": False,
-            "message": exc.message,
-            "error_code": exc.error_code,
-            "details": exc.details
-        }
-    )
-
-
-@app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception):
-    """Handle global exceptions"""
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
-    return JSONResponse(
-        status_code=500,
-        content={
-            "success": False,
-            "message": "Internal server error",
-            "error_code": "INTERNAL_ERROR"
-        }
-    )
-
-
-# Include API routers
-app.include_router(api_router, prefix=settings.api_v1_prefix)
-
-
-# Root endpoint
-@app.get("/")
-async def root():
-    """Root endpoint"""
-    return {
-        "message": "Welcome to TimelyCabs",
-        "version": settings.app_version,
-        "environment": settings.environment,
-        "docs_url": "/docs" if settings.debug else "Documentation not available in production"
-    }
-
-
-
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=settings.debug,
-        log_level=settings.log_level.lower()
+"""
+Main FastAPI application entry point
+"""
+from app.core.startup import startup_profiler
+
+# Imports are grouped into profiled boot phases (see app.core.startup)
+with startup_profiler.phase("settings"):
+    from app.core.config import get_settings
+    settings = get_settings()
+
+with startup_profiler.phase("engine"):
+    from app.core.database import (
+        AsyncSessionLocal,
+        async_engine,
+        async_replica_engines,
+        engine,
+        init_db,
+        replica_engines,
+        warm_async_pool,
+        warm_pool
+    )
+
+with startup_profiler.phase("imports"):
+    from fastapi import FastAPI, Request
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse, Response
+    from contextlib import asynccontextmanager
+    import asyncio
+    import logging
+    
+    from app.core import metrics
+    from app.core.health import get_health_prober
+    from app.core.middleware import RequestPipelineMiddleware, client_in_networks, trusted_networks
+    from app.core.warmup import Warmup
+    from app.core.exceptions import NotFoundError, TimelyCabsException, create_http_exception
+    from app.api.v1 import api_router
+    from app.services.auth_service import AsyncAuthService
+    from app.services.otp_store import get_otp_log_writer
+    from app.services.retention import get_retention_sweeper
+    from app.services.role_registry import get_role_registry
+    from app.services.sms_service import get_sms_outbox
+    from app.utils.logging import setup_logging, stop_logging
+
+# Setup logging
+with startup_profiler.phase("logging"):
+    setup_logging()
+logger = logging.getLogger(__name__)
+
+
+async def warm_connection_pools() -> dict:
+    """Pre-open pooled connections on the primary and replica engines"""
+    connections = settings.database_pool_warmup_connections
+    sync_engines = [engine] + replica_engines
+    async_engines = [async_engine] + async_replica_engines
+    opened = await asyncio.gather(
+        *(asyncio.to_thread(warm_pool, bind, connections) for bind in sync_engines),
+        *(warm_async_pool(bind, connections) for bind in async_engines)
+    )
+    return {"sync": sum(opened[:len(sync_engines)]), "async": sum(opened[len(sync_engines):])}
+
+
+async def prime_session_cache() -> int:
+    """Load recent live sessions into the session validation cache"""
+    async with AsyncSessionLocal() as db:
+        return await AsyncAuthService().prime_session_cache(db, settings.session_cache_warmup_entries)
+
+
+async def load_role_catalog() -> int:
+    """Load the role catalog so signups and role checks never query roles"""
+    async with AsyncSessionLocal() as db:
+        catalog = await db.run_sync(get_role_registry().load)
+    return len(catalog.by_name)
+
+
+def create_warmup() -> Warmup:
+    warmup = Warmup()
+    warmup.add("connection pools", warm_connection_pools)
+    warmup.add("role catalog", load_role_catalog)
+    warmup.add("session cache", prime_session_cache)
+    return warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan events
+    """
+    # Startup
+    logger.info("Starting TimelyCabs application...")
+    
+    # Initialize database (a schema version check when fast boot is on)
+    try:
+        with startup_profiler.phase("schema"):
+            init_db()
+    except Exception as e:
+        logger.error(f"Database initialization failed: {e}")
+    
+    with startup_profiler.phase("sms outbox"):
+        sms_outbox = get_sms_outbox()
+        sms_outbox.start()
+    
+    # The first probe also opens the first pooled connection
+    with startup_profiler.phase("health probe"):
+        health_prober = get_health_prober()
+        await health_prober.start()
+    if health_prober.state.database:
+        logger.info("Database connection established")
+    else:
+        logger.error(f"Database connection failed: {health_prober.state.errors}")
+    
+    # Warm pools and caches in the background; readiness waits for it
+    def warmup_completed() -> None:
+        health_prober.warmed_up = True
+        logger.info(f"Warmup completed: {warmup.results}")
+        startup_profiler.report()
+    
+    warmup = create_warmup()
+    warmup.start(on_complete=warmup_completed)
+    
+    # Expired otp_logs and sessions are swept by whichever instance holds the lease
+    retention_sweeper = get_retention_sweeper()
+    if settings.retention_enabled:
+        await retention_sweeper.start()
+    
+    yield
+    
+    # Shutdown
+    logger.info("Shutting down TimelyCabs application...")
+    await warmup.stop()
+    await retention_sweeper.stop()
+    await health_prober.stop()
+    await sms_outbox.stop()
+    await asyncio.to_thread(get_otp_log_writer().stop)
+    stop_logging()
+
+
+# Create FastAPI instance
+app = FastAPI(
+    title=settings.app_name,
+    description="A comprehensive taxi booking and management system",
+    version=settings.app_version,
+    docs_url="/docs" if settings.debug else None,
+    redoc_url="/redoc" if settings.debug else None,
+    lifespan=lifespan
+)
+
+# Add middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.cors_origins,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Add custom middleware (rate limiting, request logging and security headers in one ASGI pass)
+app.add_middleware(RequestPipelineMiddleware, calls=settings.rate_limit_requests, period=settings.rate_limit_window)
+
+
+# Global exception handler
+@app.exception_handler(TimelyCabsException)
+async def timelycabs_exception_handler(request: Request, exc: TimelyCabsException):
+    """Handle TimelyCabs exceptions"""
+    logger.error(f"TimelyCabs exception: {exc.message}")
+    return JSONResponse(
+        status_code=400,
+        content={
+            "success": False,
+            "message": exc.message,
+            "error_code": exc.error_code,
+            "details": exc.details
+        }
+    )
+
+
+@app.exception_handler(Exception)
+async def global_exception_handler(request: Request, exc: Exception):
+    """Handle global exceptions"""
+    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
+    return JSONResponse(
+        status_code=500,
+        content={
+            "success": False,
+            "message": "Internal server error",
+            "error_code": "INTERNAL_ERROR"
+        }
+    )
+
+
+# Include API routers
+app.include_router(api_router, prefix=settings.api_v1_prefix)
+
+# Connection pool gauges and wait-time histograms
+metrics.instrument_pool(engine, "sync")
+metrics.instrument_pool(async_engine.sync_engine, "async")
+
+
+# Root endpoint
+@app.get("/")
+async def root():
+    """Root endpoint"""
+    return {
+        "message": "Welcome to TimelyCabs",
+        "version": settings.app_version,
+        "environment": settings.environment,
+        "docs_url": "/docs" if settings.debug else "Documentation not available in production"
+    }
+
+
+METRICS_NETWORKS = trusted_networks(settings.metrics_allowed_networks)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint, only served to clients in ``metrics_allowed_networks``"""
+    if not client_in_networks(request.scope, METRICS_NETWORKS):
+        raise NotFoundError()
+    payload, content_type = metrics.render_latest()
+    return Response(content=payload, media_type=content_type)
+
+
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=settings.debug,
+        log_level=settings.log_level.lower()
     )
\ No newline at end of file
@@ -1,15 +1,15 @@
-"""
-Database models package
-"""
-from .user import User, Role, UserRole
-from .auth import OTPLog, Session
-from .base import Base
-
-__all__ = [
-    "Base",
-    "User", 
-    "Role", 
-    "UserRole",
-    "OTPLog",
-    "Session"
-]
+"""
+Database models package
+"""
+from .user import User, Role, UserRole
+from .auth import OTPLog, Session
+from .base import Base
+
+__all__ = [
+    "Base",
+    "User", 
+    "Role", 
+    "UserRole",
+    "OTPLog",
+    "Session"
+]
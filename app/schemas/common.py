@@ -1,69 +1,113 @@
-"""
-Common schemas used across the application
-"""
-from pydantic import BaseModel, Field
-from typing import Optional, Any, Generic, TypeVar, List
-from datetime import datetime
-
-T = TypeVar('T')
-
-
-class SuccessResponse(BaseModel, Generic[T]):
-    """Standard success response"""
-    success: bool = True
-    message: str
-    data: Optional[T] = None
-
-
-class ErrorResponse(BaseModel):
-    """Standard error response"""
-    success: bool = False
-    message: str
-    error_code: Optional[str] = None
-    details: Optional[dict] = None
-
-
-class PaginationParams(BaseModel):
-    """Pagination parameters"""
-    page: int = Field(1, ge=1, description="Page number")
-    size: int = Field(20, ge=1, le=100, description="Page size")
-    
-    @property
-    def skip(self) -> int:
-        return (self.page - 1) * self.size
-
-
-class PaginatedResponse(BaseModel, Generic[T]):
-    """Paginated response"""
-    items: List[T]
-    total: int
-    page: int
-    size: int
-    pages: int
-    
-    @classmethod
-    def create(
-        cls,
-        items: List[T],
-        total: int,
-        page: int,
-        size: int
-    ) -> "PaginatedResponse[T]":
-        pages = (total + size - 1) // size
-        return cls(
-            items=items,
-            total=total,
-            page=page,
-            size=size,
-            pages=pages
-        )
-
-
-class HealthCheckResponse(BaseModel):
-    """Health check response"""
-    status: str
-    timestamp: datetime
-    version: str
-    environment: str
-    database: bool
-    redis: Optional[bool] = None
+"""
+Common schemas used across the application
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, Any, Generic, TypeVar, List
+from datetime import datetime
+
+T = TypeVar('T')
+
+
+class SuccessResponse(BaseModel, Generic[T]):
+    """Standard success response"""
+    success: bool = True
+    message: str
+    data: Optional[T] = None
+
+
+class ErrorResponse(BaseModel):
+    """Standard error response"""
+    success: bool = False
+    message: str
+    error_code: Optional[str] = None
+    details: Optional[dict] = None
+
+
+class PaginationParams(BaseModel):
+    """Pagination parameters"""
+    page: int = Field(1, ge=1, description="Page number")
+    size: int = Field(20, ge=1, le=100, description="Page size")
+    
+    @property
+    def skip(self) -> int:
+        return (self.page - 1) * self.size
+
+
+class PaginatedResponse(BaseModel, Generic[T]):
+    """Paginated response"""
+    items: List[T]
+    total: int
+    page: int
+    size: int
+    pages: int
+    
+    @classmethod
+    def create(
+        cls,
+        items: List[T],
+        total: int,
+        page: int,
+        size: int
+    ) -> "PaginatedResponse[T]":
+        pages = (total + size - 1) // size
+        return cls(
+            items=items,
+            total=total,
+            page=page,
+            size=size,
+            pages=pages
+        )
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """Keyset-paginated response; pass ``next_cursor`` back to get the next page"""
+    items: List[T]
+    size: int
+    next_cursor: Optional[str] = None
+    has_more: bool
+    total: Optional[int] = None
+    total_exact: bool = True
+    
+    @classmethod
+    def create(
+        cls,
+        items: List[T],
+        size: int,
+        next_cursor: Optional[str] = None,
+        total: Optional[int] = None,
+        total_exact: bool = True
+    ) -> "CursorPage[T]":
+        return cls(
+            items=items,
+            size=size,
+            next_cursor=next_cursor,
+            has_more=next_cursor is not None,
+            total=total,
+            total_exact=total_exact
+        )
+    
+    @classmethod
+    def from_page(cls, page: Any) -> "CursorPage[T]":
+        """Build from app.utils.helpers.KeysetPage"""
+        return cls.create(page.items, page.size, page.next_cursor, page.total, page.total_exact)
+
+
+class HealthCheckResponse(BaseModel):
+    """Health check response"""
+    status: str
+    timestamp: datetime
+    version: str
+    environment: str
+    database: bool
+    redis: Optional[bool] = None
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response"""
+    status: str
+    database: bool
+    redis: Optional[bool] = None
+    checked_at: Optional[datetime] = None
+    pool_saturation: float
+    reasons: List[str] = []
+    warnings: List[str] = []
@@ -1,10 +1,17 @@
-"""
-Services package for business logic
-"""
-from .auth_service import AuthService
-from .otp_service import OTPService
-
-__all__ = [
-    "AuthService",
-    "OTPService"
-]
+"""
+Services package for business logic
+"""
+from .auth_service import AuthService, AsyncAuthService
+from .otp_service import OTPService, AsyncOTPService
+from .sms_service import SMSMessage, SMSOutbox, SMSProvider, get_sms_outbox
+
+__all__ = [
+    "AuthService",
+    "AsyncAuthService",
+    "OTPService",
+    "AsyncOTPService",
+    "SMSMessage",
+    "SMSOutbox",
+    "SMSProvider",
+    "get_sms_outbox"
+]
@@ -0,0 +1,262 @@
+"""
+Archival of expired otp_logs and sessions to compressed NDJSON files
+
+Rows leave the hot tables through Archiver: they are streamed with a
+server-side cursor into gzipped NDJSON files partitioned by day of
+``expires_at`` (``<root>/<table>/<YYYY-MM-DD>/<run>.ndjson.gz``), the files
+are read back and their row counts checked against the database, and only
+then are the rows purged in chunks. Session rows carry the user's phone, and
+their auth token only as a SHA-256 digest. OTP codes are not archived at all:
+a six-digit code is brute-forced from any digest.
+
+ArchiveReader scans the files line by line, so looking up a phone never
+loads a whole file.
+"""
+import gzip
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, Iterator, Optional, Sequence, Tuple, Union
+import logging
+
+from sqlalchemy import Table, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.database import engine
+from app.core.exceptions import DatabaseError
+from app.models.auth import Session as UserSession
+from app.models.user import User
+from .retention import expired_chunk_statement
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+ARCHIVE_SUFFIX = ".ndjson.gz"
+OMITTED_COLUMNS = frozenset({"otp_code"})  # never written to archive files
+
+
+def archive_query(table: Table) -> Select:
+    """Columns archived for ``table``; session rows get the user's phone so they can be found by it"""
+    columns = [column for column in table.c if column.name not in OMITTED_COLUMNS]
+    if table is UserSession.__table__:
+        users = User.__table__
+        return select(*columns, users.c.phone).outerjoin(users, users.c.user_id == table.c.user_id)
+    return select(*columns)
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot archive {type(value).__name__}")
+
+
+def archive_line(row: Dict[str, Any]) -> bytes:
+    if row.get("auth_token") is not None:
+        row["auth_token"] = hashlib.sha256(row["auth_token"].encode()).hexdigest()
+    return json.dumps(row, default=_encode, separators=(",", ":")).encode() + b"\n"
+
+
+def _fsync_directories(directories: Iterable[Path]) -> None:
+    """Persist renames and newly created entries in ``directories``"""
+    for directory in directories:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class Archiver:
+    """
+    Moves rows of a table past a cutoff from the database to ``root``.
+
+    One run archives the rows that exist when it starts (up to the highest
+    primary key then), from at most ``max_days`` days counted from the oldest
+    row, so a backlog is worked off over several runs. Files are fsynced
+    before they are renamed into place and the rows purged. If the purge is
+    interrupted after the files were written, the remaining rows are archived
+    again by the next run.
+    """
+
+    def __init__(
+        self,
+        bind: Engine,
+        root: Union[str, Path],
+        batch_size: int = 5000,
+        purge_chunk_size: int = 1000,
+        pause: float = 0.05,
+        max_days: Optional[int] = None
+    ):
+        self.bind = bind
+        self.root = Path(root)
+        self.batch_size = batch_size
+        self.purge_chunk_size = purge_chunk_size
+        self.pause = pause
+        self.max_days = max_days
+
+    def archive(self, table: Table, column: str, cutoff: datetime) -> int:
+        """Archive and purge rows with ``column`` before ``cutoff``; returns the rows purged"""
+        pk = next(iter(table.primary_key.columns))
+        expires_at = table.c[column]
+        with self.bind.connect() as connection:
+            if self.max_days:
+                oldest = connection.execute(select(func.min(expires_at)).where(expires_at < cutoff)).scalar()
+                if oldest is None:
+                    return 0
+                first_day = datetime.combine(oldest.date(), datetime.min.time())
+                cutoff = min(cutoff, first_day + timedelta(days=self.max_days))
+            max_pk, expected = connection.execute(
+                select(func.max(pk), func.count()).where(expires_at < cutoff)
+            ).one()
+        if not expected:
+            return 0
+
+        run = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{max_pk}"
+        files = self._write(table, column, cutoff, max_pk, run)
+        try:
+            written = {path: self._count_lines(path) for path in files}
+            if sum(written.values()) != expected:
+                raise DatabaseError(
+                    f"Archive of {table.name} has {sum(written.values())} rows, expected {expected}",
+                    error_code="ARCHIVE_MISMATCH"
+                )
+        except Exception:
+            for path in files:
+                path.unlink(missing_ok=True)
+            raise
+
+        for path in files:
+            os.replace(path, path.with_name(path.name[:-len(".tmp")]))
+        # The renames, and the day directories they may have created, must be
+        # on disk before the rows are gone
+        directories = {path.parent for path in files}
+        _fsync_directories(directories | {directory.parent for directory in directories})
+        logger.info(f"Archived {expected} {table.name} rows into {len(files)} files")
+
+        purged = self._purge(table, column, cutoff, pk <= max_pk)
+        if purged != expected:
+            logger.warning(f"Purged {purged} {table.name} rows after archiving {expected}")
+        metrics.ARCHIVE_ROWS.labels(table.name).inc(purged)
+        return purged
+
+    def _write(self, table: Table, column: str, cutoff: datetime, max_pk: Any, run: str) -> Sequence[Path]:
+        """Stream the rows into one temporary file per day, fsynced once complete"""
+        pk = next(iter(table.primary_key.columns))
+        expires_at = table.c[column]
+        query = archive_query(table).where(expires_at < cutoff, pk <= max_pk).order_by(pk)
+        outputs: Dict[date, Tuple[Path, IO[bytes], gzip.GzipFile]] = {}
+        try:
+            with self.bind.connect() as connection:
+                result = connection.execution_options(stream_results=True, yield_per=self.batch_size).execute(query)
+                for row in result.mappings():
+                    day = row[column].date()
+                    if day not in outputs:
+                        directory = self.root / table.name / day.isoformat()
+                        directory.mkdir(parents=True, exist_ok=True)
+                        path = directory / f"{run}{ARCHIVE_SUFFIX}.tmp"
+                        raw = open(path, "wb")
+                        outputs[day] = (path, raw, gzip.GzipFile(fileobj=raw, mode="wb"))
+                    outputs[day][2].write(archive_line(dict(row)))
+            for _, raw, output in outputs.values():
+                output.close()
+                raw.flush()
+                os.fsync(raw.fileno())
+        finally:
+            for _, raw, output in outputs.values():
+                output.close()
+                raw.close()
+        return [path for path, _, _ in outputs.values()]
+
+    @staticmethod
+    def _count_lines(path: Path) -> int:
+        with gzip.open(path, "rb") as archive:
+            return sum(1 for _ in archive)
+
+    def _purge(self, table: Table, column: str, cutoff: datetime, *criteria: Any) -> int:
+        purged = 0
+        while True:
+            statement = expired_chunk_statement(table, column, cutoff, self.purge_chunk_size, *criteria)
+            with self.bind.begin() as connection:
+                count = connection.execute(statement).rowcount
+            purged += count
+            if count < self.purge_chunk_size:
+                return purged
+            time.sleep(self.pause)
+
+
+@dataclass(frozen=True)
+class ArchivedRow:
+    """A row found in the archive"""
+    table: str
+    day: date
+    data: Dict[str, Any]
+
+
+class ArchiveReader:
+    """Streams rows back out of an Archiver's files"""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+    def files(self, table: str, since: Optional[date] = None, until: Optional[date] = None) -> Iterator[Tuple[date, Path]]:
+        """Archive files of ``table`` for days in [since, until], oldest first"""
+        directory = self.root / table
+        if not directory.is_dir():
+            return
+        for day_directory in sorted(directory.iterdir()):
+            try:
+                day = date.fromisoformat(day_directory.name)
+            except ValueError:
+                continue
+            if (since and day < since) or (until and day > until):
+                continue
+            for path in sorted(day_directory.glob(f"*{ARCHIVE_SUFFIX}")):
+                yield day, path
+
+    def scan(
+        self,
+        phone: str,
+        tables: Sequence[str] = ("otp_logs", "sessions"),
+        since: Optional[date] = None,
+        until: Optional[date] = None
+    ) -> Iterator[ArchivedRow]:
+        """Archived rows for ``phone``, decompressed and parsed one line at a time"""
+        needle = json.dumps(phone).encode()
+        for table in tables:
+            for day, path in self.files(table, since, until):
+                with gzip.open(path, "rb") as archive:
+                    for line in archive:
+                        # Cheap substring test first; only candidate lines are parsed
+                        if needle not in line:
+                            continue
+                        data = json.loads(line)
+                        if data.get("phone") == phone:
+                            yield ArchivedRow(table, day, data)
+
+
+@lru_cache()
+def get_archiver() -> Archiver:
+    """Get the process-wide archiver (on the primary engine)"""
+    return Archiver(
+        engine,
+        settings.archive_dir,
+        batch_size=settings.archive_batch_size,
+        purge_chunk_size=settings.retention_chunk_size,
+        pause=settings.retention_chunk_pause_seconds,
+        max_days=settings.archive_max_days_per_run
+    )
+
+
+def get_archive_reader() -> ArchiveReader:
+    return ArchiveReader(settings.archive_dir)
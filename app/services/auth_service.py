@@ -1,197 +1,467 @@
-"""
-Authentication service for user authentication and session management
-"""
-from typing import Optional, Tuple
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-
-from app.models.user import User, Role, UserRole
-from app.models.auth import Session as UserSession
-from app.core.security import generate_secure_token
-from app.core.config import get_settings
-from app.core.exceptions import AuthenticationError, DatabaseError
-from .base import BaseService
-import logging
-
-logger = logging.getLogger(__name__)
-settings = get_settings()
-
-
-class AuthService(BaseService[User]):
-    """Authentication service"""
-    
-    def __init__(self):
-        super().__init__(User)
-        self.session_expiry_days = settings.refresh_token_expire_days
-        self.temp_token_expiry_minutes = 10
-    
-    def get_user_by_phone(self, db: Session, phone: str) -> Optional[User]:
-        """Get user by phone number"""
-        try:
-            return db.query(User).filter(User.phone == phone).first()
-        except Exception as e:
-            logger.error(f"Error getting user by phone {phone}: {e}")
-            raise DatabaseError("Failed to retrieve user")
-    
-    def create_user(self, db: Session, phone: str) -> User:
-        """Create a new user"""
-        try:
-            user = User(phone=phone, phone_verified=True)
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-            
-            # Assign default rider role
-            self.assign_default_role(db, user.user_id)
-            return user
-        except Exception as e:
-            logger.error(f"Error creating user with phone {phone}: {e}")
-            db.rollback()
-            raise DatabaseError("Failed to create user")
-    
-    def assign_default_role(self, db: Session, user_id: int) -> bool:
-        """Assign default rider role to user"""
-        try:
-            rider_role = db.query(Role).filter(Role.role_name == "rider").first()
-            if not rider_role:
-                # Create default roles if they don't exist
-                self.create_default_roles(db)
-                rider_role = db.query(Role).filter(Role.role_name == "rider").first()
-            
-            if rider_role:
-                user_role = UserRole(user_id=user_id, role_id=rider_role.role_id)
-                db.add(user_role)
-                db.commit()
-                return True
-            return False
-        except Exception as e:
-            logger.error(f"Error assigning default role to user {user_id}: {e}")
-            db.rollback()
-            raise DatabaseError("Failed to assign default role")
-    
-    def create_default_roles(self, db: Session) -> None:
-        """Create default roles if they don't exist"""
-        try:
-            default_roles = [
-                {"role_name": "rider", "description": "Regular user who books rides"},
-                {"role_name": "driver", "description": "Driver who provides rides"},
-                {"role_name": "owner", "description": "Fleet owner"},
-                {"role_name": "admin", "description": "System administrator"},
-                {"role_name": "support", "description": "Customer support"}
-            ]
-            
-            for role_data in default_roles:
-                existing_role = db.query(Role).filter(Role.role_name == role_data["role_name"]).first()
-                if not existing_role:
-                    role = Role(**role_data)
-                    db.add(role)
-            
-            db.commit()
-        except Exception as e:
-            logger.error(f"Error creating default roles: {e}")
-            db.rollback()
-            raise DatabaseError("Failed to create default roles")
-    
-    def update_user_profile(
-        self, 
-        db: Session, 
-        user_id: int, 
-        full_name: str, 
-        gender: str
-    ) -> Optional[User]:
-        """Update user profile information"""
-        try:
-            user = db.query(User).filter(User.user_id == user_id).first()
-            if user:
-                user.full_name = full_name
-                user.gender = gender
-                user.phone_verified = True
-                db.commit()
-                db.refresh(user)
-                return user
-            return None
-        except Exception as e:
-            logger.error(f"Error updating user profile {user_id}: {e}")
-            db.rollback()
-            raise DatabaseError("Failed to update user profile")
-    
-    def create_session(
-        self, 
-        db: Session, 
-        user_id: int, 
-        device_info: Optional[str] = None, 
-        is_temp: bool = False
-    ) -> UserSession:
-        """Create a new user session"""
-        try:
-            auth_token = generate_secure_token()
-            
-            if is_temp:
-                expires_at = datetime.utcnow() + timedelta(minutes=self.temp_token_expiry_minutes)
-            else:
-                expires_at = datetime.utcnow() + timedelta(days=self.session_expiry_days)
-            
-            session = UserSession(
-                user_id=user_id,
-                auth_token=auth_token,
-                device_info=device_info,
-                expires_at=expires_at
-            )
-            
-            db.add(session)
-            db.commit()
-            db.refresh(session)
-            return session
-        except Exception as e:
-            logger.error(f"Error creating session for user {user_id}: {e}")
-            db.rollback()
-            raise DatabaseError("Failed to create session")
-    
-    def get_session_by_token(self, db: Session, auth_token: str) -> Optional[UserSession]:
-        """Get session by authentication token"""
-        try:
-            return db.query(UserSession).filter(
-                and_(
-                    UserSession.auth_token == auth_token,
-                    or_(
-                        UserSession.expires_at > datetime.utcnow(),
-                        UserSession.expires_at.is_(None)
-                    )
-                )
-            ).first()
-        except Exception as e:
-            logger.error(f"Error getting session by token: {e}")
-            raise DatabaseError("Failed to retrieve session")
-    
-    def delete_session(self, db: Session, auth_token: str) -> bool:
-        """Delete a session by token"""
-        try:
-            session = db.query(UserSession).filter(UserSession.auth_token == auth_token).first()
-            if session:
-                db.delete(session)
-                db.commit()
-                return True
-            return False
-        except Exception as e:
-            logger.error(f"Error deleting session: {e}")
-            db.rollback()
-            raise DatabaseError("Failed to delete session")
-    
-    def get_user_with_roles(self, db: Session, user_id: int) -> Optional[User]:
-        """Get user with their roles"""
-        try:
-            from sqlalchemy.orm import joinedload
-            return db.query(User).options(
-                joinedload(User.user_roles).joinedload(UserRole.role)
-            ).filter(User.user_id == user_id).first()
-        except Exception as e:
-            logger.error(f"Error getting user with roles {user_id}: {e}")
-            raise DatabaseError("Failed to retrieve user with roles")
-    
-    def validate_session(self, db: Session, auth_token: str) -> Optional[User]:
-        """Validate session and return user"""
-        session = self.get_session_by_token(db, auth_token)
-        if session:
-            return self.get_user_with_roles(db, session.user_id)
-        return None
+"""
+Authentication service for user authentication and session management
+"""
+from typing import List, Optional, Sequence, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, delete, exists, insert, inspect, or_, select, true
+
+from app.models.user import User, Role, UserRole
+from app.models.auth import Session as UserSession
+from app.core.security import generate_secure_token
+from app.core.config import get_settings
+from app.core.database import in_identity_map, read_only, record_identity_lookup
+from app.core.exceptions import AuthenticationError, DatabaseError
+from .base import AsyncBaseService, BaseService
+from .role_registry import RoleCatalog, RoleRegistry, get_role_registry, role_mask
+from .session_cache import CachedUser, SessionCache, get_session_cache
+from .session_store import SessionRecord, SessionStore, get_session_store
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Eager load for a user's roles (responses and the session cache read them)
+WITH_ROLES = joinedload(User.user_roles).joinedload(UserRole.role)
+
+
+def _roles_loaded(user: User) -> bool:
+    """Whether user.user_roles and each role can be read without a lazy load"""
+    if "user_roles" in inspect(user).unloaded:
+        return False
+    return all("role" not in inspect(user_role).unloaded for user_role in user.user_roles)
+
+
+class AuthService(BaseService[User]):
+    """Authentication service"""
+    
+    def __init__(
+        self,
+        session_cache: Optional[SessionCache] = None,
+        session_store: Optional[SessionStore] = None,
+        roles: Optional[RoleRegistry] = None
+    ):
+        super().__init__(User)
+        self.session_expiry_days = settings.refresh_token_expire_days
+        self.temp_token_expiry_minutes = 10
+        self.session_cache = session_cache if session_cache is not None else get_session_cache()
+        self.session_store = session_store if session_store is not None else get_session_store()
+        self.roles = roles if roles is not None else get_role_registry()
+    
+    @read_only
+    def get_user_by_phone(self, db: Session, phone: str) -> Optional[User]:
+        """Get user by phone number"""
+        try:
+            return db.query(User).filter(User.phone == phone).first()
+        except Exception as e:
+            logger.error(f"Error getting user by phone {phone}: {e}")
+            raise DatabaseError("Failed to retrieve user")
+    
+    def create_user(self, db: Session, phone: str) -> User:
+        """Create a new user"""
+        try:
+            user = User(phone=phone, phone_verified=True)
+            db.add(user)
+            self._commit(db, user, flush=True)
+            
+            # Assign default rider role
+            self.assign_default_role(db, user.user_id)
+            return user
+        except Exception as e:
+            logger.error(f"Error creating user with phone {phone}: {e}")
+            db.rollback()
+            raise DatabaseError("Failed to create user")
+    
+    def assign_default_role(self, db: Session, user_id: int) -> bool:
+        """Assign default rider role to user (role id from the role catalog)"""
+        try:
+            rider_role_id = self.roles.catalog(db).role_id("rider")
+            if rider_role_id is None:
+                # Create default roles if they don't exist
+                rider_role_id = self.create_default_roles(db).role_id("rider")
+            
+            if rider_role_id is not None:
+                user_role = UserRole(user_id=user_id, role_id=rider_role_id)
+                db.add(user_role)
+                # A loaded user.user_roles would not include the new row
+                user = in_identity_map(db, User, user_id)
+                if user is not None:
+                    db.expire(user, ["user_roles"])
+                self._commit(db)
+                self._after_commit(db, lambda: self.session_cache.invalidate_user(user_id))
+                return True
+            return False
+        except Exception as e:
+            logger.error(f"Error assigning default role to user {user_id}: {e}")
+            db.rollback()
+            raise DatabaseError("Failed to assign default role")
+    
+    def create_default_roles(self, db: Session) -> RoleCatalog:
+        """Create default roles if they don't exist; returns a catalog including them"""
+        try:
+            catalog = self.roles.load(db, cache=False)
+            missing = catalog.missing_defaults()
+            if not missing:
+                return catalog
+            
+            db.execute(insert(Role.__table__), missing)
+            self._commit(db, flush=True)
+            # Cached only once the new rows are committed
+            self._after_commit(db, self.roles.bump)
+            return self.roles.load(db, cache=False)
+        except Exception as e:
+            logger.error(f"Error creating default roles: {e}")
+            db.rollback()
+            raise DatabaseError("Failed to create default roles")
+    
+    def grant_roles(self, db: Session, user_ids: Sequence[int], role_names: Sequence[str]) -> int:
+        """
+        Give every user every role in one INSERT ... SELECT; pairs that
+        already exist are skipped. Returns the number of rows inserted.
+        """
+        role_ids = self._role_ids(db, role_names)
+        if not user_ids or not role_ids:
+            return 0
+        
+        users, roles, user_roles = User.__table__, Role.__table__, UserRole.__table__
+        # Every (user, role) combination: an explicit cross join
+        pairs = select(users.c.user_id, roles.c.role_id).select_from(users).join(roles, true()).where(
+            users.c.user_id.in_(user_ids),
+            roles.c.role_id.in_(role_ids),
+            ~exists().where(
+                user_roles.c.user_id == users.c.user_id,
+                user_roles.c.role_id == roles.c.role_id
+            )
+        )
+        try:
+            result = db.execute(insert(user_roles).from_select(["user_id", "role_id"], pairs))
+            self._roles_changed(db, user_ids)
+            return result.rowcount
+        except Exception as e:
+            logger.error(f"Error granting roles {role_names}: {e}")
+            db.rollback()
+            raise DatabaseError("Failed to grant roles")
+    
+    def revoke_roles(self, db: Session, user_ids: Sequence[int], role_names: Sequence[str]) -> int:
+        """Remove the roles from every user in one DELETE; returns the number of rows deleted"""
+        role_ids = self._role_ids(db, role_names)
+        if not user_ids or not role_ids:
+            return 0
+        
+        try:
+            result = db.execute(
+                delete(UserRole).where(UserRole.user_id.in_(user_ids), UserRole.role_id.in_(role_ids))
+            )
+            self._roles_changed(db, user_ids)
+            return result.rowcount
+        except Exception as e:
+            logger.error(f"Error revoking roles {role_names}: {e}")
+            db.rollback()
+            raise DatabaseError("Failed to revoke roles")
+    
+    def _role_ids(self, db: Session, role_names: Sequence[str]) -> List[int]:
+        role_mask(role_names)  # unknown names are a ValidationError
+        catalog = self.roles.catalog(db)
+        return [role_id for role_id in map(catalog.role_id, role_names) if role_id is not None]
+    
+    def _roles_changed(self, db: Session, user_ids: Sequence[int]) -> None:
+        """Commit a user_roles change and drop the stale role sets"""
+        for user_id in user_ids:
+            user = in_identity_map(db, User, user_id)
+            if user is not None:
+                db.expire(user, ["user_roles"])
+        self._commit(db)
+        
+        def invalidate() -> None:
+            for user_id in user_ids:
+                self.session_cache.invalidate_user(user_id)
+        self._after_commit(db, invalidate)
+    
+    def update_user_profile(
+        self, 
+        db: Session, 
+        user_id: int, 
+        full_name: str, 
+        gender: str
+    ) -> Optional[User]:
+        """Update user profile information (loaded with roles for the response)"""
+        try:
+            user = self.get(db, user_id, options=[WITH_ROLES])
+            if user:
+                user.full_name = full_name
+                user.gender = gender
+                user.phone_verified = True
+                # Set here rather than by the column's onupdate, which would
+                # expire the attribute and force a reload before the response
+                user.updated_at = datetime.utcnow()
+                self._commit(db, user)
+                self._after_commit(db, lambda: self.session_cache.invalidate_user(user_id))
+                return user
+            return None
+        except Exception as e:
+            logger.error(f"Error updating user profile {user_id}: {e}")
+            db.rollback()
+            raise DatabaseError("Failed to update user profile")
+    
+    def create_session(
+        self, 
+        db: Session, 
+        user_id: int, 
+        device_info: Optional[str] = None, 
+        is_temp: bool = False
+    ) -> UserSession:
+        """Create a new user session"""
+        try:
+            auth_token = generate_secure_token()
+            
+            if is_temp:
+                expires_at = datetime.utcnow() + timedelta(minutes=self.temp_token_expiry_minutes)
+            else:
+                expires_at = datetime.utcnow() + timedelta(days=self.session_expiry_days)
+            
+            session = UserSession(
+                user_id=user_id,
+                auth_token=auth_token,
+                device_info=device_info,
+                expires_at=expires_at
+            )
+            
+            db.add(session)
+            self._commit(db, session)
+        except Exception as e:
+            logger.error(f"Error creating session for user {user_id}: {e}")
+            db.rollback()
+            raise DatabaseError("Failed to create session")
+        
+        self._after_commit(db, lambda: self._store_put(SessionRecord.from_model(session)))
+        return session
+    
+    def get_session_by_token(self, db: Session, auth_token: str) -> Optional[SessionRecord]:
+        """Get session by authentication token (session store first, then database)"""
+        record = self._store_get(auth_token)
+        if record is not None:
+            return record
+        
+        try:
+            session = db.query(UserSession).filter(
+                and_(
+                    UserSession.auth_token == auth_token,
+                    or_(
+                        UserSession.expires_at > datetime.utcnow(),
+                        UserSession.expires_at.is_(None)
+                    )
+                )
+            ).first()
+        except Exception as e:
+            logger.error(f"Error getting session by token: {e}")
+            raise DatabaseError("Failed to retrieve session")
+        
+        if session is None:
+            return None
+        
+        record = SessionRecord.from_model(session)
+        self._store_put(record)
+        return record
+    
+    def delete_session(self, db: Session, auth_token: str) -> bool:
+        """Delete a session by token"""
+        # The tombstone keeps concurrent readers from writing the session back to the store
+        self._store_delete(auth_token)
+        try:
+            # Single DELETE; a session loaded in this Session is marked deleted in place
+            deleted = db.execute(
+                delete(UserSession).where(UserSession.auth_token == auth_token)
+            ).rowcount
+            if deleted:
+                self._commit(db)
+            
+            def forget() -> None:
+                # Renewed once the DELETE is committed, however long the unit of work took
+                self._store_delete(auth_token)
+                self.session_cache.invalidate_token(auth_token)
+            self._after_commit(db, forget)
+            return deleted > 0
+        except Exception as e:
+            logger.error(f"Error deleting session: {e}")
+            db.rollback()
+            raise DatabaseError("Failed to delete session")
+    
+    @read_only
+    def get_user_with_roles(self, db: Session, user_id: int) -> Optional[User]:
+        """Get user with their roles; no SELECT if both are already loaded in this session"""
+        return self._user_with_roles(db, user_id)
+    
+    def _user_with_roles(self, db: Session, user_id: int) -> Optional[User]:
+        """get_user_with_roles on the primary, for snapshots that must not lag a role change"""
+        user = in_identity_map(db, User, user_id)
+        if user is not None and _roles_loaded(user):
+            record_identity_lookup(True)
+            return user
+        record_identity_lookup(False)
+        
+        try:
+            if user is not None:
+                # Let the eager load below replace a partially loaded collection
+                db.expire(user, ["user_roles"])
+            return db.query(User).options(WITH_ROLES).filter(User.user_id == user_id).first()
+        except Exception as e:
+            logger.error(f"Error getting user with roles {user_id}: {e}")
+            raise DatabaseError("Failed to retrieve user with roles")
+    
+    def validate_session(self, db: Session, auth_token: str) -> Optional[CachedUser]:
+        """Validate session and return a user+roles snapshot (cached per token)"""
+        cached_user = self.session_cache.get(auth_token)
+        if cached_user is not None:
+            return cached_user
+        
+        session = self.get_session_by_token(db, auth_token)
+        if not session:
+            return None
+        
+        # Read before the user, so an invalidation racing the load makes the entry stale
+        version = self.session_cache.user_version(session.user_id)
+        # From the primary: a replica behind a grant would refill the cache with the old roles
+        user = self._user_with_roles(db, session.user_id)
+        if not user:
+            return None
+        
+        cached_user = CachedUser.from_user(user)
+        self.session_cache.set(auth_token, cached_user, expires_at=session.expires_at, version=version)
+        return cached_user
+    
+    def prime_session_cache(self, db: Session, limit: int) -> int:
+        """
+        Load the ``limit`` most recent live sessions into the session cache; returns how many
+        
+        Temporary (pre-profile) sessions are skipped: they expire within
+        ``temp_token_expiry_minutes``, sooner than a warm entry would pay off.
+        """
+        if limit <= 0 or not self.session_cache.enabled:
+            return 0
+        
+        temp_cutoff = datetime.utcnow() + timedelta(minutes=self.temp_token_expiry_minutes)
+        try:
+            sessions = db.query(UserSession).options(
+                joinedload(UserSession.user).options(WITH_ROLES)
+            ).filter(
+                or_(
+                    UserSession.expires_at > temp_cutoff,
+                    UserSession.expires_at.is_(None)
+                )
+            ).order_by(UserSession.created_at.desc()).limit(limit).all()
+        except Exception as e:
+            logger.error(f"Error loading sessions for the session cache: {e}")
+            raise DatabaseError("Failed to prime session cache")
+        
+        primed = 0
+        versions = self.session_cache.user_versions([session.user_id for session in sessions])
+        for session, version in zip(sessions, versions):
+            if session.user is not None:
+                self.session_cache.set(
+                    session.auth_token,
+                    CachedUser.from_user(session.user),
+                    expires_at=session.expires_at,
+                    version=version
+                )
+                primed += 1
+        return primed
+    
+    def _store_put(self, record: SessionRecord) -> None:
+        if self.session_store is None:
+            return
+        try:
+            self.session_store.put(record)
+        except Exception as e:
+            logger.warning(f"Session store write failed, database remains authoritative: {e}")
+    
+    def _store_get(self, auth_token: str) -> Optional[SessionRecord]:
+        if self.session_store is None:
+            return None
+        try:
+            return self.session_store.get(auth_token)
+        except Exception as e:
+            logger.warning(f"Session store read failed, falling back to database: {e}")
+            return None
+    
+    def _store_delete(self, auth_token: str) -> None:
+        if self.session_store is None:
+            return
+        try:
+            self.session_store.delete(auth_token)
+        except Exception as e:
+            logger.warning(f"Session store delete failed: {e}")
+
+
+class AsyncAuthService(AsyncBaseService[User]):
+    """Asyncio variant of AuthService"""
+    
+    def __init__(self, service: Optional[AuthService] = None):
+        super().__init__(service or AuthService())
+    
+    async def get_user_by_phone(self, db: AsyncSession, phone: str) -> Optional[User]:
+        """Get user by phone number"""
+        return await self._run(db, self.service.get_user_by_phone, phone)
+    
+    async def create_user(self, db: AsyncSession, phone: str) -> User:
+        """Create a new user"""
+        return await self._run(db, self.service.create_user, phone)
+    
+    async def assign_default_role(self, db: AsyncSession, user_id: int) -> bool:
+        """Assign default rider role to user"""
+        return await self._run(db, self.service.assign_default_role, user_id)
+    
+    async def create_default_roles(self, db: AsyncSession) -> RoleCatalog:
+        """Create default roles if they don't exist"""
+        return await self._run(db, self.service.create_default_roles)
+    
+    async def grant_roles(self, db: AsyncSession, user_ids: Sequence[int], role_names: Sequence[str]) -> int:
+        """Give every user every role in one statement"""
+        return await self._run(db, self.service.grant_roles, user_ids, role_names)
+    
+    async def revoke_roles(self, db: AsyncSession, user_ids: Sequence[int], role_names: Sequence[str]) -> int:
+        """Remove the roles from every user in one statement"""
+        return await self._run(db, self.service.revoke_roles, user_ids, role_names)
+    
+    async def update_user_profile(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        full_name: str,
+        gender: str
+    ) -> Optional[User]:
+        """Update user profile information"""
+        return await self._run(db, self.service.update_user_profile, user_id, full_name, gender)
+    
+    async def create_session(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        device_info: Optional[str] = None,
+        is_temp: bool = False
+    ) -> UserSession:
+        """Create a new user session"""
+        return await self._run(db, self.service.create_session, user_id, device_info, is_temp)
+    
+    async def get_session_by_token(self, db: AsyncSession, auth_token: str) -> Optional[SessionRecord]:
+        """Get session by authentication token"""
+        return await self._run(db, self.service.get_session_by_token, auth_token)
+    
+    async def delete_session(self, db: AsyncSession, auth_token: str) -> bool:
+        """Delete a session by token"""
+        return await self._run(db, self.service.delete_session, auth_token)
+    
+    async def get_user_with_roles(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        """Get user with their roles"""
+        return await self._run(db, self.service.get_user_with_roles, user_id)
+    
+    async def validate_session(self, db: AsyncSession, auth_token: str) -> Optional[CachedUser]:
+        """Validate session and return user (cache hits never touch the database)"""
+        cached_user = self.service.session_cache.get(auth_token)
+        if cached_user is not None:
+            return cached_user
+        return await self._run(db, self.service.validate_session, auth_token)
+    
+    async def prime_session_cache(self, db: AsyncSession, limit: int) -> int:
+        """Load the most recent live sessions into the session cache"""
+        return await self._run(db, self.service.prime_session_cache, limit)
@@ -1,109 +1,475 @@
-"""
-Base service class with common functionality
-"""
-from typing import TypeVar, Generic, Optional, List, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-import logging
-
-from app.core.exceptions import DatabaseError, NotFoundError
-
-logger = logging.getLogger(__name__)
-
-ModelType = TypeVar("ModelType")
-
-
-class BaseService(Generic[ModelType]):
-    """Base service class with common CRUD operations"""
-    
-    def __init__(self, model: ModelType):
-        self.model = model
-    
-    def get(self, db: Session, id: int) -> Optional[ModelType]:
-        """Get a single record by ID"""
-        try:
-            return db.query(self.model).filter(self.model.id == id).first()
-        except Exception as e:
-            logger.error(f"Error getting {self.model.__name__} with id {id}: {e}")
-            raise DatabaseError(f"Failed to retrieve {self.model.__name__}")
-    
-    def get_multi(
-        self, 
-        db: Session, 
-        skip: int = 0, 
-        limit: int = 100,
-        filters: Optional[Dict[str, Any]] = None
-    ) -> List[ModelType]:
-        """Get multiple records with pagination and filters"""
-        try:
-            query = db.query(self.model)
-            
-            if filters:
-                for key, value in filters.items():
-                    if hasattr(self.model, key):
-                        query = query.filter(getattr(self.model, key) == value)
-            
-            return query.offset(skip).limit(limit).all()
-        except Exception as e:
-            logger.error(f"Error getting multiple {self.model.__name__}: {e}")
-            raise DatabaseError(f"Failed to retrieve {self.model.__name__} list")
-    
-    def create(self, db: Session, obj_in: Dict[str, Any]) -> ModelType:
-        """Create a new record"""
-        try:
-            db_obj = self.model(**obj_in)
-            db.add(db_obj)
-            db.commit()
-            db.refresh(db_obj)
-            return db_obj
-        except Exception as e:
-            logger.error(f"Error creating {self.model.__name__}: {e}")
-            db.rollback()
-            raise DatabaseError(f"Failed to create {self.model.__name__}")
-    
-    def update(
-        self, 
-        db: Session, 
-        db_obj: ModelType, 
-        obj_in: Dict[str, Any]
-    ) -> ModelType:
-        """Update an existing record"""
-        try:
-            for field, value in obj_in.items():
-                if hasattr(db_obj, field):
-                    setattr(db_obj, field, value)
-            
-            db.add(db_obj)
-            db.commit()
-            db.refresh(db_obj)
-            return db_obj
-        except Exception as e:
-            logger.error(f"Error updating {self.model.__name__}: {e}")
-            db.rollback()
-            raise DatabaseError(f"Failed to update {self.model.__name__}")
-    
-    def delete(self, db: Session, id: int) -> bool:
-        """Delete a record by ID"""
-        try:
-            obj = db.query(self.model).filter(self.model.id == id).first()
-            if obj:
-                db.delete(obj)
-                db.commit()
-                return True
-            return False
-        except Exception as e:
-            logger.error(f"Error deleting {self.model.__name__} with id {id}: {e}")
-            db.rollback()
-            raise DatabaseError(f"Failed to delete {self.model.__name__}")
-    
-    def exists(self, db: Session, **filters) -> bool:
-        """Check if a record exists with given filters"""
-        try:
-            query = db.query(self.model)
-            for key, value in filters.items():
-                if hasattr(self.model, key):
-                    query = query.filter(getattr(self.model, key) == value)
-            return query.first() is not None
-        except Exception as e:
-            logger.error(f"Error checking existence of {self.model.__name__}: {e}")
-            raise DatabaseError(f"Failed to check {self.model.__name__} existence")
+"""
+Base service class with common functionality
+"""
+from typing import TypeVar, Generic, Optional, List, Dict, Any, Callable, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, bindparam, delete, insert, inspect, or_, select, update
+from sqlalchemy.engine import RowMapping
+import importlib
+import logging
+
+from app.core.database import AFTER_COMMIT_KEY, get_by_pk, in_unit_of_work, read_only
+from app.core.exceptions import DatabaseError, NotFoundError, ValidationError
+from app.utils.helpers import KeysetPage, keyset_paginate
+
+logger = logging.getLogger(__name__)
+
+# Dialects whose INSERT construct has an upsert clause; imported on first upsert
+UPSERT_DIALECTS = ("mysql", "postgresql", "sqlite")
+
+ModelType = TypeVar("ModelType")
+
+
+class BaseService(Generic[ModelType]):
+    """Base service class with common CRUD operations"""
+    
+    def __init__(self, model: ModelType):
+        self.model = model
+    
+    def _commit(self, db: Session, *refresh: Any, flush: bool = False) -> None:
+        """
+        Commit and refresh the given objects.
+        
+        Inside a unit of work the commit is deferred; with ``flush=True`` pending
+        rows are flushed so their primary keys come back from the INSERT.
+        """
+        if in_unit_of_work(db):
+            if flush:
+                db.flush()
+            return
+        
+        db.commit()
+        for obj in refresh:
+            db.refresh(obj)
+    
+    def _after_commit(self, db: Session, callback: Callable[[], None]) -> None:
+        """Run a side effect now, or once the enclosing unit of work commits"""
+        if in_unit_of_work(db):
+            db.info[AFTER_COMMIT_KEY].append(callback)
+        else:
+            callback()
+    
+    def get(self, db: Session, id: Any, options: Optional[Sequence[Any]] = None) -> Optional[ModelType]:
+        """
+        Get a single record by primary key.
+        
+        Served from the session's identity map when already loaded; ``options``
+        (e.g. eager loads) only apply when a SELECT is issued.
+        """
+        try:
+            return get_by_pk(db, self.model, id, options=options)
+        except Exception as e:
+            logger.error(f"Error getting {self.model.__name__} with id {id}: {e}")
+            raise DatabaseError(f"Failed to retrieve {self.model.__name__}")
+    
+    @read_only
+    def get_multi(
+        self, 
+        db: Session, 
+        skip: int = 0, 
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[ModelType]:
+        """Get multiple records with pagination and filters"""
+        try:
+            query = db.query(self.model)
+            
+            if filters:
+                for key, value in filters.items():
+                    if hasattr(self.model, key):
+                        query = query.filter(getattr(self.model, key) == value)
+            
+            return query.offset(skip).limit(limit).all()
+        except Exception as e:
+            logger.error(f"Error getting multiple {self.model.__name__}: {e}")
+            raise DatabaseError(f"Failed to retrieve {self.model.__name__} list")
+    
+    @read_only
+    def get_page(
+        self,
+        db: Session,
+        cursor: Optional[str] = None,
+        size: int = 20,
+        order_by: Optional[Sequence[str]] = None,
+        descending: bool = False,
+        filters: Optional[Dict[str, Any]] = None,
+        with_total: bool = False,
+        total_limit: Optional[int] = None
+    ) -> KeysetPage:
+        """
+        Get one keyset page of records (see app.utils.helpers.keyset_paginate)
+        
+        ``order_by`` names indexed, NOT NULL columns; the primary key is
+        appended as a tie-breaker. Defaults to primary key order.
+        """
+        primary_key = list(inspect(self.model).primary_key)
+        columns = [getattr(self.model, name) for name in (order_by or ())]
+        columns += [getattr(self.model, column.key) for column in primary_key if column.key not in (order_by or ())]
+        try:
+            query = db.query(self.model)
+            if filters:
+                for key, value in filters.items():
+                    if hasattr(self.model, key):
+                        query = query.filter(getattr(self.model, key) == value)
+            
+            return keyset_paginate(
+                query,
+                columns,
+                cursor=cursor,
+                size=size,
+                descending=descending,
+                with_total=with_total,
+                total_limit=total_limit
+            )
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error paginating {self.model.__name__}: {e}")
+            raise DatabaseError(f"Failed to retrieve {self.model.__name__} page")
+    
+    def create(self, db: Session, obj_in: Dict[str, Any]) -> ModelType:
+        """Create a new record"""
+        try:
+            db_obj = self.model(**obj_in)
+            db.add(db_obj)
+            self._commit(db, db_obj, flush=True)
+            return db_obj
+        except Exception as e:
+            logger.error(f"Error creating {self.model.__name__}: {e}")
+            db.rollback()
+            raise DatabaseError(f"Failed to create {self.model.__name__}")
+    
+    def update(
+        self, 
+        db: Session, 
+        db_obj: ModelType, 
+        obj_in: Dict[str, Any]
+    ) -> ModelType:
+        """Update an existing record"""
+        try:
+            for field, value in obj_in.items():
+                if hasattr(db_obj, field):
+                    setattr(db_obj, field, value)
+            
+            db.add(db_obj)
+            self._commit(db, db_obj)
+            return db_obj
+        except Exception as e:
+            logger.error(f"Error updating {self.model.__name__}: {e}")
+            db.rollback()
+            raise DatabaseError(f"Failed to update {self.model.__name__}")
+    
+    def delete(self, db: Session, id: int) -> bool:
+        """Delete a record by ID"""
+        try:
+            obj = get_by_pk(db, self.model, id)
+            if obj:
+                db.delete(obj)
+                self._commit(db)
+                return True
+            return False
+        except Exception as e:
+            logger.error(f"Error deleting {self.model.__name__} with id {id}: {e}")
+            db.rollback()
+            raise DatabaseError(f"Failed to delete {self.model.__name__}")
+    
+    @property
+    def _table(self):
+        return self.model.__table__
+    
+    @property
+    def _primary_key(self):
+        return inspect(self.model).primary_key[0]
+    
+    @staticmethod
+    def _group_by_columns(rows: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split rows by key set: an executemany takes its columns from the first row"""
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(frozenset(row), []).append(row)
+        return list(groups.values())
+    
+    @read_only
+    def get_many(
+        self,
+        db: Session,
+        ids: Sequence[Any],
+        columns: Optional[Sequence[str]] = None,
+        chunk_size: int = 500
+    ) -> List[RowMapping]:
+        """
+        Rows for the given primary keys as mappings, one IN query per chunk
+        
+        No ORM objects are built; ``columns`` limits what is selected.
+        """
+        selected = [self._table.c[name] for name in columns] if columns else list(self._table.c)
+        ids = list(dict.fromkeys(ids))
+        try:
+            rows = []
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                rows += db.execute(select(*selected).where(self._primary_key.in_(chunk))).mappings().all()
+            return rows
+        except Exception as e:
+            logger.error(f"Error getting {len(ids)} {self.model.__name__} rows: {e}")
+            raise DatabaseError(f"Failed to retrieve {self.model.__name__} list")
+    
+    def bulk_create(
+        self,
+        db: Session,
+        rows: List[Dict[str, Any]],
+        returning: Optional[Sequence[str]] = None
+    ) -> Optional[List[RowMapping]]:
+        """
+        Insert rows with multi-row INSERTs, one executemany per distinct key set
+        
+        Where the database supports RETURNING for multi-row inserts (SQLite,
+        PostgreSQL, MariaDB) the ``returning`` columns (default: primary key)
+        of the new rows come back as mappings, in the order the database
+        returns them; include a natural key to match them to the input. On
+        MySQL nothing is returned (None).
+        """
+        if not rows:
+            return []
+        statement = insert(self._table)
+        supports_returning = db.get_bind().dialect.insert_executemany_returning
+        if supports_returning:
+            columns = [self._table.c[name] for name in returning] if returning else [self._primary_key]
+            statement = statement.returning(*columns)
+        try:
+            created = []
+            for group in self._group_by_columns(rows):
+                result = db.execute(statement, group)
+                if supports_returning:
+                    created += result.mappings().all()
+            self._commit(db)
+            return created if supports_returning else None
+        except Exception as e:
+            logger.error(f"Error bulk creating {len(rows)} {self.model.__name__} rows: {e}")
+            db.rollback()
+            raise DatabaseError(f"Failed to create {self.model.__name__} rows")
+    
+    def bulk_update(self, db: Session, rows: List[Dict[str, Any]]) -> int:
+        """
+        UPDATE rows by primary key; each dict holds the key plus the columns to set
+        
+        Runs as executemany, grouped by the set of columns being changed, and
+        returns the number of rows matched. Keys without a row are skipped.
+        Objects already loaded in the session are not expired.
+        """
+        if not rows:
+            return 0
+        key = self._primary_key.key
+        try:
+            for row in rows:
+                if key not in row:
+                    raise ValidationError(f"bulk_update row without {key}")
+            updated = 0
+            for group in self._group_by_columns(rows):
+                # Bound as b_<column>: a parameter may not share its column's name
+                columns = [name for name in group[0] if name != key]
+                statement = update(self._table).where(self._table.c[key] == bindparam(f"b_{key}")).values(
+                    {name: bindparam(f"b_{name}") for name in columns}
+                )
+                parameters = [{f"b_{name}": value for name, value in row.items()} for row in group]
+                updated += db.execute(statement, parameters).rowcount
+            self._commit(db)
+            return updated
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error bulk updating {len(rows)} {self.model.__name__} rows: {e}")
+            db.rollback()
+            raise DatabaseError(f"Failed to update {self.model.__name__} rows")
+    
+    def delete_where(self, db: Session, *criteria: Any, **filters: Any) -> int:
+        """
+        Single DELETE for rows matching SQL ``criteria`` and column ``filters``
+        
+        Returns the number of rows deleted. At least one condition is required.
+        Objects already loaded in the session are not expired.
+        """
+        conditions = list(criteria) + [self._table.c[key] == value for key, value in filters.items()]
+        if not conditions:
+            raise ValidationError(f"delete_where on {self.model.__name__} needs at least one condition")
+        try:
+            result = db.execute(delete(self._table).where(*conditions))
+            self._commit(db)
+            return result.rowcount
+        except Exception as e:
+            logger.error(f"Error deleting {self.model.__name__} rows: {e}")
+            db.rollback()
+            raise DatabaseError(f"Failed to delete {self.model.__name__} rows")
+    
+    def upsert(
+        self,
+        db: Session,
+        rows: List[Dict[str, Any]],
+        conflict_columns: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None
+    ) -> int:
+        """
+        INSERT rows, updating ``update_columns`` of rows that already exist
+        
+        ``conflict_columns`` name the unique key to match on (default: primary
+        key); MySQL matches on any unique key instead. ``update_columns``
+        defaults to the non-key columns each row provides; rows with different
+        key sets run as separate statements. Explicit ``update_columns`` must be
+        present in every row.
+        """
+        if not rows:
+            return 0
+        dialect = db.get_bind().dialect.name
+        if dialect not in UPSERT_DIALECTS:
+            raise DatabaseError(f"upsert is not supported on {dialect}")
+        conflict_columns = list(conflict_columns or [self._primary_key.key])
+        groups = self._group_by_columns(rows)
+        if update_columns is not None:
+            for group in groups:
+                missing = [name for name in update_columns if name not in group[0]]
+                if missing:
+                    raise ValidationError(f"upsert rows without update columns {missing}")
+        
+        try:
+            for group in groups:
+                columns = update_columns
+                if columns is None:
+                    columns = [name for name in group[0] if name not in conflict_columns]
+                db.execute(self._upsert_statement(dialect, conflict_columns, columns), group)
+            self._commit(db)
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error upserting {len(rows)} {self.model.__name__} rows: {e}")
+            db.rollback()
+            raise DatabaseError(f"Failed to upsert {self.model.__name__} rows")
+    
+    def _upsert_statement(self, dialect: str, conflict_columns: Sequence[str], update_columns: Sequence[str]) -> Any:
+        statement = importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert(self._table)
+        if dialect == "mysql":
+            changes = {name: statement.inserted[name] for name in update_columns}
+            return statement.on_duplicate_key_update(**changes) if changes else statement.prefix_with("IGNORE")
+        changes = {name: statement.excluded[name] for name in update_columns}
+        if changes:
+            return statement.on_conflict_do_update(index_elements=conflict_columns, set_=changes)
+        return statement.on_conflict_do_nothing(index_elements=conflict_columns)
+    
+    def exists(self, db: Session, **filters) -> bool:
+        """Check if a record exists with given filters"""
+        try:
+            query = db.query(self.model)
+            for key, value in filters.items():
+                if hasattr(self.model, key):
+                    query = query.filter(getattr(self.model, key) == value)
+            return query.first() is not None
+        except Exception as e:
+            logger.error(f"Error checking existence of {self.model.__name__}: {e}")
+            raise DatabaseError(f"Failed to check {self.model.__name__} existence")
+
+
+class AsyncBaseService(Generic[ModelType]):
+    """
+    Asyncio variant of a BaseService.
+    
+    Each call runs the synchronous implementation through
+    ``AsyncSession.run_sync``: SQL goes through the async driver without
+    blocking the event loop, and both variants share one implementation.
+    """
+    
+    def __init__(self, service: BaseService[ModelType]):
+        self.service = service
+        self.model = service.model
+    
+    async def _run(self, db: AsyncSession, method: Callable[..., Any], *args, **kwargs) -> Any:
+        return await db.run_sync(lambda session: method(session, *args, **kwargs))
+    
+    async def get(self, db: AsyncSession, id: Any, options: Optional[Sequence[Any]] = None) -> Optional[ModelType]:
+        """Get a single record by primary key"""
+        return await self._run(db, self.service.get, id, options)
+    
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[ModelType]:
+        """Get multiple records with pagination and filters"""
+        return await self._run(db, self.service.get_multi, skip, limit, filters)
+    
+    async def get_page(
+        self,
+        db: AsyncSession,
+        cursor: Optional[str] = None,
+        size: int = 20,
+        order_by: Optional[Sequence[str]] = None,
+        descending: bool = False,
+        filters: Optional[Dict[str, Any]] = None,
+        with_total: bool = False,
+        total_limit: Optional[int] = None
+    ) -> KeysetPage:
+        """Get one keyset page of records"""
+        return await self._run(
+            db,
+            self.service.get_page,
+            cursor=cursor,
+            size=size,
+            order_by=order_by,
+            descending=descending,
+            filters=filters,
+            with_total=with_total,
+            total_limit=total_limit
+        )
+    
+    async def create(self, db: AsyncSession, obj_in: Dict[str, Any]) -> ModelType:
+        """Create a new record"""
+        return await self._run(db, self.service.create, obj_in)
+    
+    async def update(self, db: AsyncSession, db_obj: ModelType, obj_in: Dict[str, Any]) -> ModelType:
+        """Update an existing record"""
+        return await self._run(db, self.service.update, db_obj, obj_in)
+    
+    async def delete(self, db: AsyncSession, id: int) -> bool:
+        """Delete a record by ID"""
+        return await self._run(db, self.service.delete, id)
+    
+    async def get_many(
+        self,
+        db: AsyncSession,
+        ids: Sequence[Any],
+        columns: Optional[Sequence[str]] = None,
+        chunk_size: int = 500
+    ) -> List[RowMapping]:
+        """Rows for the given primary keys as mappings"""
+        return await self._run(db, self.service.get_many, ids, columns, chunk_size)
+    
+    async def bulk_create(
+        self,
+        db: AsyncSession,
+        rows: List[Dict[str, Any]],
+        returning: Optional[Sequence[str]] = None
+    ) -> Optional[List[RowMapping]]:
+        """Insert rows with multi-row INSERTs"""
+        return await self._run(db, self.service.bulk_create, rows, returning)
+    
+    async def bulk_update(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> int:
+        """UPDATE rows by primary key"""
+        return await self._run(db, self.service.bulk_update, rows)
+    
+    async def delete_where(self, db: AsyncSession, *criteria: Any, **filters: Any) -> int:
+        """Single DELETE for rows matching the conditions"""
+        return await self._run(db, self.service.delete_where, *criteria, **filters)
+    
+    async def upsert(
+        self,
+        db: AsyncSession,
+        rows: List[Dict[str, Any]],
+        conflict_columns: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None
+    ) -> int:
+        """INSERT rows, updating rows that already exist"""
+        return await self._run(db, self.service.upsert, rows, conflict_columns, update_columns)
+    
+    async def exists(self, db: AsyncSession, **filters) -> bool:
+        """Check if a record exists with given filters"""
+        return await self._run(db, self.service.exists, **filters)
@@ -1,166 +1,246 @@
-"""
-OTP service for OTP generation and verification
-"""
-from typing import Optional, Tuple
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-
-from app.models.auth import OTPLog
-from app.core.security import generate_otp
-from app.core.config import get_settings
-from app.core.exceptions import DatabaseError, ValidationError
-from .base import BaseService
-import logging
-
-logger = logging.getLogger(__name__)
-settings = get_settings()
-
-
-class OTPService(BaseService[OTPLog]):
-    """OTP service for OTP management"""
-    
-    def __init__(self):
-        super().__init__(OTPLog)
-        self.otp_length = 6
-        self.otp_expiry_minutes = settings.otp_expire_minutes
-        self.max_otp_attempts = 3
-        self.otp_cooldown_minutes = 1
-    
-    def generate_otp_code(self) -> str:
-        """Generate OTP code"""
-        return generate_otp(self.otp_length)
-    
-    def create_otp_log(self, db: Session, phone: str) -> Tuple[OTPLog, str]:
-        """Create OTP log entry"""
-        try:
-            # Check for recent OTP attempts
-            recent_otp = db.query(OTPLog).filter(
-                and_(
-                    OTPLog.phone == phone,
-                    OTPLog.created_at > datetime.utcnow() - timedelta(minutes=self.otp_cooldown_minutes)
-                )
-            ).first()
-            
-            if recent_otp:
-                raise ValidationError(f"Please wait {self.otp_cooldown_minutes} minutes before requesting another OTP")
-            
-            # Check for too many attempts
-            recent_attempts = db.query(OTPLog).filter(
-                and_(
-                    OTPLog.phone == phone,
-                    OTPLog.created_at > datetime.utcnow() - timedelta(hours=1)
-                )
-            ).count()
-            
-            if recent_attempts >= self.max_otp_attempts:
-                raise ValidationError("Too many OTP attempts. Please try again later.")
-            
-            otp_code = self.generate_otp_code()
-            expires_at = datetime.utcnow() + timedelta(minutes=self.otp_expiry_minutes)
-            
-            otp_log = OTPLog(
-                phone=phone,
-                otp_code=otp_code,
-                expires_at=expires_at
-            )
-            
-            db.add(otp_log)
-            db.commit()
-            db.refresh(otp_log)
-            
-            return otp_log, otp_code
-        except Exception as e:
-            logger.error(f"Error creating OTP log for {phone}: {e}")
-            db.rollback()
-            if isinstance(e, ValidationError):
-                raise
-            raise DatabaseError("Failed to create OTP log")
-    
-    def verify_otp(self, db: Session, phone: str, otp: str) -> Optional[OTPLog]:
-        """Verify OTP code"""
-        try:
-            otp_log = db.query(OTPLog).filter(
-                and_(
-                    OTPLog.phone == phone,
-                    OTPLog.otp_code == otp,
-                    OTPLog.is_verified == False,
-                    OTPLog.expires_at > datetime.utcnow()
-                )
-            ).order_by(OTPLog.created_at.desc()).first()
-            
-            if otp_log:
-                otp_log.is_verified = True
-                db.commit()
-                return otp_log
-            return None
-        except Exception as e:
-            logger.error(f"Error verifying OTP for {phone}: {e}")
-            db.rollback()
-            raise DatabaseError("Failed to verify OTP")
-    
-    def get_latest_otp(self, db: Session, phone: str) -> Optional[OTPLog]:
-        """Get the latest OTP for a phone number"""
-        try:
-            return db.query(OTPLog).filter(
-                OTPLog.phone == phone
-            ).order_by(OTPLog.created_at.desc()).first()
-        except Exception as e:
-            logger.error(f"Error getting latest OTP for {phone}: {e}")
-            raise DatabaseError("Failed to retrieve OTP")
-    
-    def cleanup_expired_otps(self, db: Session) -> int:
-        """Clean up expired OTP logs"""
-        try:
-            expired_otps = db.query(OTPLog).filter(
-                OTPLog.expires_at < datetime.utcnow()
-            ).all()
-            
-            count = len(expired_otps)
-            for otp in expired_otps:
-                db.delete(otp)
-            
-            db.commit()
-            logger.info(f"Cleaned up {count} expired OTP logs")
-            return count
-        except Exception as e:
-            logger.error(f"Error cleaning up expired OTPs: {e}")
-            db.rollback()
-            raise DatabaseError("Failed to cleanup expired OTPs")
-    
-    def send_otp_sms(self, phone: str, otp: str) -> bool:
-        """Send OTP via SMS (mock implementation)"""
-        try:
-            # TODO: Integrate with actual SMS provider (Twilio, AWS SNS, etc.)
-            logger.info(f"OTP {otp} sent to {phone}")
-            
-            # Mock SMS sending
-            # In production, integrate with SMS provider
-            # sms_provider = get_sms_provider()
-            # return sms_provider.send_sms(phone, f"Your TimelyCabs OTP is: {otp}")
-            
-            return True
-        except Exception as e:
-            logger.error(f"Failed to send OTP to {phone}: {str(e)}")
-            return False
-    
-    def get_otp_statistics(self, db: Session, phone: Optional[str] = None) -> dict:
-        """Get OTP statistics"""
-        try:
-            query = db.query(OTPLog)
-            if phone:
-                query = query.filter(OTPLog.phone == phone)
-            
-            total_otps = query.count()
-            verified_otps = query.filter(OTPLog.is_verified == True).count()
-            expired_otps = query.filter(OTPLog.expires_at < datetime.utcnow()).count()
-            
-            return {
-                "total_otps": total_otps,
-                "verified_otps": verified_otps,
-                "expired_otps": expired_otps,
-                "verification_rate": (verified_otps / total_otps * 100) if total_otps > 0 else 0
-            }
-        except Exception as e:
-            logger.error(f"Error getting OTP statistics: {e}")
-            raise DatabaseError("Failed to retrieve OTP statistics")
+"""
+OTP service for OTP generation and verification
+"""
+from typing import Optional, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+
+from app.core import metrics
+from app.models.auth import OTPLog
+from app.core.security import generate_otp
+from app.core.config import get_settings
+from app.core.database import read_only
+from app.core.rate_limit import RateLimit
+from app.core.exceptions import DatabaseError
+from .base import AsyncBaseService, BaseService
+from .otp_store import OTPLogWriter, OTPRecord, OTPStore, get_otp_log_writer, get_otp_store
+from .otp_throttle import OTPThrottle, get_otp_throttle
+from .retention import expired_chunk_statement
+from .sms_service import SMSMessage, SMSOutbox, get_sms_outbox
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+OTP_SMS_TEMPLATE = "Your TimelyCabs OTP is: {otp}"
+
+
+class OTPService(BaseService[OTPLog]):
+    """OTP service for OTP management"""
+    
+    def __init__(
+        self,
+        store: Optional[OTPStore] = None,
+        log_writer: Optional[OTPLogWriter] = None,
+        throttle: Optional[OTPThrottle] = None
+    ):
+        super().__init__(OTPLog)
+        self.otp_length = 6
+        self.otp_expiry_minutes = settings.otp_expire_minutes
+        self.max_otp_attempts = 3
+        self.otp_cooldown_minutes = 1
+        self.store = store if store is not None else get_otp_store()
+        self._log_writer = log_writer
+        self.throttle = throttle if throttle is not None else get_otp_throttle()
+    
+    @property
+    def log_writer(self) -> OTPLogWriter:
+        return self._log_writer or get_otp_log_writer()
+    
+    def generate_otp_code(self) -> str:
+        """Generate OTP code"""
+        return generate_otp(self.otp_length)
+    
+    def create_otp_log(self, db: Session, phone: str) -> Tuple[OTPLog, str]:
+        """Create OTP log entry"""
+        self.throttle.check_request(
+            phone,
+            cooldown=self.otp_cooldown_minutes * 60,
+            hourly=RateLimit(limit=self.max_otp_attempts, window=3600)
+        )
+        if self.store is not None:
+            return self._issue_from_store(phone)
+        
+        try:
+            otp_code = self.generate_otp_code()
+            expires_at = datetime.utcnow() + timedelta(minutes=self.otp_expiry_minutes)
+            
+            otp_log = OTPLog(
+                phone=phone,
+                otp_code=otp_code,
+                expires_at=expires_at
+            )
+            
+            db.add(otp_log)
+            self._commit(db, otp_log, flush=True)
+            
+            return otp_log, otp_code
+        except Exception as e:
+            logger.error(f"Error creating OTP log for {phone}: {e}")
+            db.rollback()
+            raise DatabaseError("Failed to create OTP log")
+    
+    def _issue_from_store(self, phone: str) -> Tuple[OTPLog, str]:
+        """Issue an OTP from the OTP store; its otp_logs row is written behind (no otp_id yet)"""
+        otp_code = self.generate_otp_code()
+        created_at = datetime.utcnow().replace(microsecond=0)
+        record = OTPRecord(
+            phone=phone,
+            otp_code=otp_code,
+            created_at=created_at,
+            expires_at=created_at + timedelta(minutes=self.otp_expiry_minutes)
+        )
+        self.store.put(record)
+        self.log_writer.issued(record)
+        return record.to_model(), otp_code
+    
+    def _rejected(self, phone: str) -> None:
+        # The attempt was already counted by reserve_verify
+        metrics.OTP_VERIFICATIONS.labels("rejected").inc()
+    
+    def verify_otp(self, db: Session, phone: str, otp: str) -> Optional[OTPLog]:
+        """Verify OTP code; raises ValidationError while the phone is locked out"""
+        self.throttle.reserve_verify(phone)
+        if self.store is not None:
+            record = self.store.consume(phone, otp)
+            if record is None:
+                self._rejected(phone)
+                return None
+            self.log_writer.verified(record)
+            self.throttle.record_success(phone)
+            metrics.OTP_VERIFICATIONS.labels("verified").inc()
+            return record.to_model(is_verified=True)
+        
+        try:
+            otp_log = db.query(OTPLog).filter(
+                and_(
+                    OTPLog.phone == phone,
+                    OTPLog.otp_code == otp,
+                    OTPLog.is_verified == False,
+                    OTPLog.expires_at > datetime.utcnow()
+                )
+            ).order_by(OTPLog.created_at.desc()).first()
+            
+            if otp_log:
+                otp_log.is_verified = True
+                self._commit(db)
+                self.throttle.record_success(phone)
+                metrics.OTP_VERIFICATIONS.labels("verified").inc()
+                return otp_log
+            self._rejected(phone)
+            return None
+        except Exception as e:
+            logger.error(f"Error verifying OTP for {phone}: {e}")
+            db.rollback()
+            raise DatabaseError("Failed to verify OTP")
+    
+    def get_latest_otp(self, db: Session, phone: str) -> Optional[OTPLog]:
+        """Get the latest OTP for a phone number"""
+        try:
+            return db.query(OTPLog).filter(
+                OTPLog.phone == phone
+            ).order_by(OTPLog.created_at.desc()).first()
+        except Exception as e:
+            logger.error(f"Error getting latest OTP for {phone}: {e}")
+            raise DatabaseError("Failed to retrieve OTP")
+    
+    def cleanup_expired_otps(self, db: Session, chunk_size: int = 1000) -> int:
+        """Delete expired OTP logs in chunks, committing after each one"""
+        try:
+            cutoff = datetime.utcnow()
+            count = 0
+            while True:
+                deleted = db.execute(
+                    expired_chunk_statement(OTPLog.__table__, "expires_at", cutoff, chunk_size)
+                ).rowcount
+                db.commit()
+                count += deleted
+                if deleted < chunk_size:
+                    break
+            
+            logger.info(f"Cleaned up {count} expired OTP logs")
+            return count
+        except Exception as e:
+            logger.error(f"Error cleaning up expired OTPs: {e}")
+            db.rollback()
+            raise DatabaseError("Failed to cleanup expired OTPs")
+    
+    def send_otp_sms(self, phone: str, otp: str) -> bool:
+        """Send OTP via SMS (mock implementation)"""
+        try:
+            # TODO: Integrate with actual SMS provider (Twilio, AWS SNS, etc.)
+            logger.info(f"OTP {otp} sent to {phone}")
+            
+            # Mock SMS sending
+            # In production, integrate with SMS provider
+            # sms_provider = get_sms_provider()
+            # return sms_provider.send_sms(phone, OTP_SMS_TEMPLATE.format(otp=otp))
+            
+            metrics.OTP_SENT.labels("sent").inc()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to send OTP to {phone}: {str(e)}")
+            metrics.OTP_SENT.labels("failed").inc()
+            return False
+    
+    @read_only
+    def get_otp_statistics(self, db: Session, phone: Optional[str] = None) -> dict:
+        """Get OTP statistics"""
+        try:
+            query = db.query(OTPLog)
+            if phone:
+                query = query.filter(OTPLog.phone == phone)
+            
+            total_otps = query.count()
+            verified_otps = query.filter(OTPLog.is_verified == True).count()
+            expired_otps = query.filter(OTPLog.expires_at < datetime.utcnow()).count()
+            
+            return {
+                "total_otps": total_otps,
+                "verified_otps": verified_otps,
+                "expired_otps": expired_otps,
+                "verification_rate": (verified_otps / total_otps * 100) if total_otps > 0 else 0
+            }
+        except Exception as e:
+            logger.error(f"Error getting OTP statistics: {e}")
+            raise DatabaseError("Failed to retrieve OTP statistics")
+
+
+class AsyncOTPService(AsyncBaseService[OTPLog]):
+    """Asyncio variant of OTPService"""
+    
+    def __init__(self, service: Optional[OTPService] = None, outbox: Optional[SMSOutbox] = None):
+        super().__init__(service or OTPService())
+        self._outbox = outbox
+    
+    @property
+    def outbox(self) -> SMSOutbox:
+        return self._outbox or get_sms_outbox()
+    
+    async def create_otp_log(self, db: AsyncSession, phone: str) -> Tuple[OTPLog, str]:
+        """Create OTP log entry"""
+        return await self._run(db, self.service.create_otp_log, phone)
+    
+    async def verify_otp(self, db: AsyncSession, phone: str, otp: str) -> Optional[OTPLog]:
+        """Verify OTP code"""
+        return await self._run(db, self.service.verify_otp, phone, otp)
+    
+    async def get_latest_otp(self, db: AsyncSession, phone: str) -> Optional[OTPLog]:
+        """Get the latest OTP for a phone number"""
+        return await self._run(db, self.service.get_latest_otp, phone)
+    
+    async def cleanup_expired_otps(self, db: AsyncSession) -> int:
+        """Clean up expired OTP logs"""
+        return await self._run(db, self.service.cleanup_expired_otps)
+    
+    async def send_otp_sms(self, phone: str, otp: str) -> bool:
+        """Queue the OTP SMS; delivery and retries happen in the SMS outbox"""
+        queued = self.outbox.enqueue(SMSMessage(phone=phone, body=OTP_SMS_TEMPLATE.format(otp=otp)))
+        metrics.OTP_SENT.labels("queued" if queued else "failed").inc()
+        return queued
+    
+    async def get_otp_statistics(self, db: AsyncSession, phone: Optional[str] = None) -> dict:
+        """Get OTP statistics"""
+        return await self._run(db, self.service.get_otp_statistics, phone)
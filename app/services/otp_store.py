@@ -0,0 +1,269 @@
+"""
+Live OTP state and the write-behind otp_logs writer used by OTPService
+
+With ``otp_store_backend = "redis"`` the OTP awaiting verification is a
+Redis key that expires with it, so request-otp and verify-otp no longer
+touch otp_logs (request limits are in app.services.otp_throttle). The
+table remains the audit trail: rows are appended in batches by
+OTPLogWriter from a background thread.
+"""
+import hmac
+import json
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.engine import Engine
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.database import engine
+from app.core.redis_client import compare_and_delete, get_redis_client
+from app.models.auth import OTPLog
+from .session_store import _to_epoch
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class OTPRecord:
+    """An issued OTP; ``created_at`` has whole seconds so it matches the stored row"""
+    phone: str
+    otp_code: str
+    created_at: datetime
+    expires_at: datetime
+
+    @property
+    def key(self) -> Tuple[str, str, datetime]:
+        return self.phone, self.otp_code, self.created_at
+
+    def to_model(self, is_verified: bool = False) -> OTPLog:
+        """Transient OTPLog for callers of OTPService (otp_id is not known yet)"""
+        return OTPLog(
+            phone=self.phone,
+            otp_code=self.otp_code,
+            created_at=self.created_at,
+            expires_at=self.expires_at,
+            is_verified=is_verified
+        )
+
+
+class OTPStore(ABC):
+    """Per-phone OTP state shared by all replicas"""
+
+    @abstractmethod
+    def put(self, record: OTPRecord) -> None:
+        """Make ``record`` the phone's live OTP until it expires"""
+
+    @abstractmethod
+    def consume(self, phone: str, otp_code: str) -> Optional[OTPRecord]:
+        """Remove and return the live OTP if ``otp_code`` matches; a code verifies once"""
+
+
+class RedisOTPStore(OTPStore):
+    """Live OTPs as JSON strings under ``<prefix>code:<phone>``, expiring with the OTP"""
+
+    def __init__(self, client: Any, key_prefix: str = "otp:"):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def _key(self, kind: str, phone: str) -> str:
+        return f"{self.key_prefix}{kind}:{phone}"
+
+    def put(self, record: OTPRecord) -> None:
+        payload = json.dumps({
+            "otp_code": record.otp_code,
+            "created_at": _to_epoch(record.created_at),
+            "expires_at": _to_epoch(record.expires_at)
+        }, separators=(",", ":"))
+        self.client.set(self._key("code", record.phone), payload, exat=int(_to_epoch(record.expires_at)) + 1)
+
+    def consume(self, phone: str, otp_code: str) -> Optional[OTPRecord]:
+        key = self._key("code", phone)
+        raw = self.client.get(key)
+        if raw is None:
+            return None
+
+        data = json.loads(raw)
+        if not hmac.compare_digest(data["otp_code"], otp_code):
+            return None
+        record = OTPRecord(
+            phone=phone,
+            otp_code=otp_code,
+            created_at=datetime.utcfromtimestamp(data["created_at"]),
+            expires_at=datetime.utcfromtimestamp(data["expires_at"])
+        )
+        if record.expires_at <= datetime.utcnow():
+            return None
+        # Only the request that deletes the key gets the OTP, and only while
+        # it still holds this code (a resend may have replaced it since the GET)
+        return record if compare_and_delete(self.client, key, raw) else None
+
+
+class OTPLogWriter:
+    """
+    Appends otp_logs rows in batches from a background thread.
+
+    ``issued`` queues an INSERT and ``verified`` an is_verified UPDATE; a
+    verification arriving before its row was written is folded into the
+    INSERT. Batches are written every ``flush_interval`` seconds, or sooner
+    once ``batch_size`` rows wait. A failed batch is kept for the next flush
+    while fewer than ``max_size`` rows are queued.
+    """
+
+    def __init__(self, bind: Engine, batch_size: int = 500, flush_interval: float = 1.0, max_size: int = 100000):
+        self.bind = bind
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._inserts: Dict[Tuple[str, str, datetime], Dict[str, Any]] = {}
+        self._verified: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # an UPDATE must not overtake the INSERT it targets
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def issued(self, record: OTPRecord) -> None:
+        with self._lock:
+            if len(self._inserts) >= self.max_size:
+                logger.error(f"OTP log writer full, dropping row for {record.phone}")
+                metrics.OTP_LOG_ROWS.labels("dropped").inc()
+                return
+            self._inserts[record.key] = {
+                "phone": record.phone,
+                "otp_code": record.otp_code,
+                "created_at": record.created_at,
+                "expires_at": record.expires_at,
+                "is_verified": False
+            }
+            pending = len(self._inserts)
+        self._ensure_started()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def verified(self, record: OTPRecord) -> None:
+        with self._lock:
+            row = self._inserts.get(record.key)
+            if row is not None:
+                row["is_verified"] = True
+            else:
+                self._verified.append({
+                    "b_phone": record.phone,
+                    "b_otp_code": record.otp_code,
+                    "b_created_at": record.created_at
+                })
+        self._ensure_started()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._inserts) + len(self._verified)
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of rows written or updated"""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        with self._lock:
+            inserts, self._inserts = self._inserts, {}
+            verified, self._verified = self._verified, []
+        if not inserts and not verified:
+            return 0
+
+        table = OTPLog.__table__
+        try:
+            with self.bind.begin() as connection:
+                if inserts:
+                    connection.execute(insert(table), list(inserts.values()))
+                if verified:
+                    connection.execute(
+                        update(table).where(
+                            table.c.phone == bindparam("b_phone"),
+                            table.c.otp_code == bindparam("b_otp_code"),
+                            table.c.created_at == bindparam("b_created_at")
+                        ).values(is_verified=True),
+                        verified
+                    )
+        except Exception as e:
+            logger.error(f"Failed to write {len(inserts) + len(verified)} OTP log rows: {e}")
+            metrics.OTP_LOG_ROWS.labels("failed").inc(len(inserts) + len(verified))
+            self._requeue(inserts, verified)
+            return 0
+
+        metrics.OTP_LOG_ROWS.labels("written").inc(len(inserts) + len(verified))
+        return len(inserts) + len(verified)
+
+    def _requeue(self, inserts: Dict[Tuple[str, str, datetime], Dict[str, Any]], verified: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            if len(self._inserts) + len(inserts) > self.max_size:
+                metrics.OTP_LOG_ROWS.labels("dropped").inc(len(inserts) + len(verified))
+                return
+            inserts.update(self._inserts)
+            self._inserts = inserts
+            self._verified = verified + self._verified
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="otp-log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the thread after a final flush"""
+        if self._thread is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        if self.pending():
+            logger.warning(f"OTP log writer stopped with {self.pending()} unwritten rows")
+
+
+@lru_cache()
+def get_otp_store() -> Optional[OTPStore]:
+    """
+    Get the configured OTP store, or None to keep OTP state in otp_logs.
+
+    With ``otp_store_backend = "redis"`` (``redis_url = "memory://"`` for a
+    single process) OTPs are issued and verified against Redis.
+    """
+    backend = settings.otp_store_backend.lower()
+    if backend == "database":
+        return None
+
+    if backend == "redis":
+        client = get_redis_client()
+        if client is None:
+            logger.warning("otp_store_backend is 'redis' but redis_url is not set; using the database")
+            return None
+        return RedisOTPStore(client)
+
+    raise ValueError(f"Unsupported OTP store backend: {settings.otp_store_backend}")
+
+
+@lru_cache()
+def get_otp_log_writer() -> OTPLogWriter:
+    """Get the process-wide otp_logs writer (on the primary engine)"""
+    return OTPLogWriter(
+        engine,
+        batch_size=settings.otp_log_batch_size,
+        flush_interval=settings.otp_log_flush_seconds
+    )
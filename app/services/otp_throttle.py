@@ -0,0 +1,220 @@
+"""
+Per-phone OTP throttling with atomic expiring counters
+
+Every check is one atomic increment on a counter that expires a fixed time
+after its first hit, so concurrent requests for the same phone cannot both
+pass a limit, and no check reads otp_logs.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple
+import logging
+
+from app.core.config import get_settings
+from app.core.exceptions import ValidationError
+from app.core.rate_limit import RateLimit
+from app.core.redis_client import get_redis_client, incr_with_expiry
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ThrottleCounters(ABC):
+    """Counters that expire ``ttl`` seconds after their first increment"""
+
+    @abstractmethod
+    def incr(self, key: str, ttl: int) -> Tuple[int, int]:
+        """Increment ``key``; return (count, seconds until it expires)"""
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[int, int]:
+        """Current (count, seconds until it expires); (0, 0) if unset"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Reset ``key``"""
+
+
+class MemoryThrottleCounters(ThrottleCounters):
+    """
+    Process-local counters.
+
+    Expired counters are swept at most once per ``sweep_interval`` seconds, so
+    the sweep cost is amortised over the requests in between.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, sweep_interval: float = 60.0):
+        self._counters: Dict[str, list] = {}
+        self._clock = clock
+        self._sweep_interval = sweep_interval
+        self._next_sweep = clock() + sweep_interval
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, ttl: int) -> Tuple[int, int]:
+        with self._lock:
+            now = self._clock()
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+            entry = self._counters.get(key)
+            if entry is None or entry[1] <= now:
+                entry = [0, now + ttl]
+                self._counters[key] = entry
+            entry[0] += 1
+            return entry[0], max(1, int(entry[1] - now + 0.999))
+
+    def get(self, key: str) -> Tuple[int, int]:
+        with self._lock:
+            now = self._clock()
+            entry = self._counters.get(key)
+            if entry is None or entry[1] <= now:
+                return 0, 0
+            return entry[0], max(1, int(entry[1] - now + 0.999))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._counters.pop(key, None)
+
+    def _sweep(self, now: float) -> None:
+        for key in [key for key, entry in self._counters.items() if entry[1] <= now]:
+            del self._counters[key]
+        self._next_sweep = now + self._sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class RedisThrottleCounters(ThrottleCounters):
+    """
+    Counters shared by every worker and pod: ``INCR``, and ``EXPIRE`` on the
+    first hit, in one atomic script call.
+    """
+
+    def __init__(self, client: Any, key_prefix: str = "otp-throttle:"):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def incr(self, key: str, ttl: int) -> Tuple[int, int]:
+        count, remaining = incr_with_expiry(self.client, f"{self.key_prefix}{key}", ttl)
+        return count, max(1, remaining)
+
+    def get(self, key: str) -> Tuple[int, int]:
+        name = f"{self.key_prefix}{key}"
+        pipe = self.client.pipeline()
+        pipe.get(name)
+        pipe.ttl(name)
+        count, remaining = pipe.execute()
+        if count is None:
+            return 0, 0
+        return int(count), max(1, int(remaining)) if remaining > 0 else 0
+
+    def delete(self, key: str) -> None:
+        self.client.delete(f"{self.key_prefix}{key}")
+
+
+class OTPThrottle:
+    """
+    OTP request and verification limits per phone.
+
+    Requests: one per ``cooldown`` seconds and ``hourly.limit`` per
+    ``hourly.window`` for a phone, and ``prefix_rate`` across all phones
+    sharing the first ``prefix_length`` characters (a number range being
+    enumerated). Verification: every attempt is counted before the code is
+    compared, and a success clears the count, so at most ``max_failures``
+    wrong codes are ever compared within ``lockout`` seconds, however many
+    arrive concurrently.
+    """
+
+    def __init__(
+        self,
+        counters: ThrottleCounters,
+        prefix_rate: RateLimit,
+        prefix_length: int = 8,
+        max_failures: int = 5,
+        lockout: int = 900
+    ):
+        self.counters = counters
+        self.prefix_rate = prefix_rate
+        self.prefix_length = prefix_length
+        self.max_failures = max_failures
+        self.lockout = lockout
+
+    def check_request(self, phone: str, cooldown: int, hourly: RateLimit) -> None:
+        """Count an OTP request; raises ValidationError when a limit is reached"""
+        if cooldown > 0:
+            count, _ = self.counters.incr(f"cooldown:{phone}", cooldown)
+            if count > 1:
+                raise ValidationError(
+                    f"Please wait {cooldown // 60} minutes before requesting another OTP",
+                    error_code="OTP_COOLDOWN"
+                )
+
+        count, retry_after = self.counters.incr(f"requests:{phone}", hourly.window)
+        if count > hourly.limit:
+            raise ValidationError(
+                "Too many OTP attempts. Please try again later.",
+                error_code="OTP_RATE_LIMITED",
+                details={"retry_after": retry_after}
+            )
+
+        prefix = phone[:self.prefix_length]
+        count, retry_after = self.counters.incr(f"prefix:{prefix}", self.prefix_rate.window)
+        if count > self.prefix_rate.limit:
+            logger.warning(f"OTP requests for prefix {prefix} exceeded {self.prefix_rate.limit}/{self.prefix_rate.window}s")
+            raise ValidationError(
+                "Too many OTP attempts. Please try again later.",
+                error_code="OTP_RATE_LIMITED",
+                details={"retry_after": retry_after}
+            )
+
+    def reserve_verify(self, phone: str) -> int:
+        """
+        Count a verification attempt before its code is compared; raises
+        ValidationError once ``max_failures`` attempts are pending. The
+        lockout runs from the first attempt.
+        """
+        attempts, retry_after = self.counters.incr(f"failures:{phone}", self.lockout)
+        if attempts > self.max_failures:
+            if attempts == self.max_failures + 1:
+                logger.warning(f"OTP verification locked for {phone} after {self.max_failures} failures")
+            raise ValidationError(
+                "Too many incorrect OTP attempts. Please try again later.",
+                error_code="OTP_LOCKED",
+                details={"retry_after": retry_after}
+            )
+        return attempts
+
+    def record_success(self, phone: str) -> None:
+        """The reserved attempt was the right code: clear the failures"""
+        self.counters.delete(f"failures:{phone}")
+
+
+@lru_cache()
+def get_otp_throttle() -> OTPThrottle:
+    """Get the throttle for the configured backend (auto, memory, redis)"""
+    backend = settings.otp_throttle_backend.lower()
+    if backend not in ("auto", "memory", "redis"):
+        raise ValueError(f"Unsupported OTP throttle backend: {settings.otp_throttle_backend}")
+
+    client = get_redis_client() if backend != "memory" else None
+    counters: ThrottleCounters
+    if client is not None:
+        counters = RedisThrottleCounters(client)
+    else:
+        if backend == "redis":
+            logger.warning("otp_throttle_backend is 'redis' but redis_url is not set")
+        logger.warning(
+            "OTP throttle counters are per process: OTP rate limits and verification "
+            "lockouts are multiplied by the number of workers. Set redis_url to share them."
+        )
+        counters = MemoryThrottleCounters()
+
+    return OTPThrottle(
+        counters,
+        prefix_rate=RateLimit.parse(settings.otp_prefix_rate),
+        prefix_length=settings.otp_prefix_length,
+        max_failures=settings.otp_max_verify_failures,
+        lockout=settings.otp_lockout_minutes * 60
+    )
@@ -0,0 +1,406 @@
+"""
+Retention of expired otp_logs and sessions
+
+RetentionSweeper runs in the application lifespan. Each sweep deletes rows
+whose ``expires_at`` is past a cutoff in bounded chunks, one short
+transaction per chunk with a pause in between, so the sweep never holds
+long locks or floods replication. A leader lease makes sure only one
+replica sweeps at a time.
+
+With ``retention_mysql_partitions`` on, otp_logs is expected to be
+RANGE-partitioned by day of ``expires_at`` (scripts/partition_otp_logs.sql):
+whole days past the cutoff are dropped as partitions instead of deleted row
+by row, and partitions for the coming days are created ahead of time.
+"""
+import asyncio
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import Table, delete, func, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import Delete
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.database import engine
+from app.core.redis_client import compare_and_delete, compare_and_pexpire, get_redis_client
+from app.models.auth import OTPLog, Session as UserSession
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# MySQL TO_DAYS() of a date is its Python ordinal plus this offset
+TO_DAYS_OFFSET = 365
+
+
+def expired_chunk_statement(table: Table, column: str, cutoff: datetime, limit: int, *criteria: Any) -> Delete:
+    """
+    DELETE of at most ``limit`` rows of ``table`` with ``column`` before
+    ``cutoff`` (and matching ``criteria``).
+
+    The keys come from a limited derived table, which MySQL accepts where a
+    LIMIT directly inside ``IN (...)`` is refused.
+    """
+    expires_at = table.c[column]
+    pk = next(iter(table.primary_key.columns))
+    chunk = select(pk).where(expires_at < cutoff, *criteria).limit(limit).subquery("chunk")
+    return delete(table).where(pk.in_(select(chunk.c[pk.name])))
+
+
+@dataclass(frozen=True)
+class RetentionTarget:
+    """Rows of ``table`` are deleted once ``column`` is more than ``grace`` in the past"""
+    table: Table
+    column: str = "expires_at"
+    grace: timedelta = timedelta(0)
+    partitioned: bool = False  # RANGE-partitioned by day of ``column`` (MySQL only)
+    archive: bool = False  # written to the archive before deletion (app.services.archive)
+
+    @property
+    def name(self) -> str:
+        return self.table.name
+
+
+# Leader election
+
+class LeaderLease(ABC):
+    """Held by at most one instance at a time"""
+
+    @abstractmethod
+    def acquire(self) -> bool:
+        """Take or renew the lease; True while this instance holds it"""
+
+    @abstractmethod
+    def release(self) -> None:
+        """Give the lease up if held"""
+
+
+class LocalLease(LeaderLease):
+    """Always held: for a single instance without Redis or MySQL"""
+
+    def acquire(self) -> bool:
+        return True
+
+    def release(self) -> None:
+        pass
+
+
+class RedisLease(LeaderLease):
+    """
+    ``SET NX PX`` lease that expires ``ttl`` seconds after the last renewal,
+    so a crashed leader is replaced once its lease runs out. Renewal and
+    release check the owner in the same script as the write, so a leader
+    whose lease already passed to another instance cannot touch it.
+    """
+
+    def __init__(self, client: Any, name: str, ttl: float, owner: Optional[str] = None):
+        self.client = client
+        self.key = f"lease:{name}"
+        self.ttl = ttl
+        self.owner = owner or uuid.uuid4().hex
+
+    def acquire(self) -> bool:
+        if self.client.set(self.key, self.owner, nx=True, px=int(self.ttl * 1000)):
+            return True
+        return compare_and_pexpire(self.client, self.key, self.owner, int(self.ttl * 1000))
+
+    def release(self) -> None:
+        compare_and_delete(self.client, self.key, self.owner)
+
+
+class MySQLLease(LeaderLease):
+    """
+    ``GET_LOCK`` named lock, held by one dedicated autocommit connection.
+
+    The lock is released by MySQL when that connection drops, so a crashed
+    leader cannot keep it.
+    """
+
+    def __init__(self, bind: Engine, name: str):
+        self.bind = bind
+        self.name = name
+        self._connection: Optional[Connection] = None
+
+    def acquire(self) -> bool:
+        if self._connection is not None:
+            try:
+                if self._connection.execute(text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": self.name}).scalar():
+                    return True
+            except Exception as e:
+                logger.warning(f"Lost retention lease connection: {e}")
+            self._close()
+
+        connection = self.bind.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = connection.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": self.name}).scalar() == 1
+        except Exception:
+            connection.close()
+            raise
+        if acquired:
+            self._connection = connection
+        else:
+            connection.close()
+        return acquired
+
+    def release(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": self.name})
+        except Exception as e:
+            logger.warning(f"Failed to release retention lease: {e}")
+        self._close()
+
+    def _close(self) -> None:
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+
+# MySQL day partitions
+
+def partition_name(day: date) -> str:
+    """Name of the partition holding rows of ``day``"""
+    return f"p{day:%Y%m%d}"
+
+
+def list_partitions(connection: Connection, table_name: str) -> List[Tuple[str, Optional[date]]]:
+    """(name, first day not in it) per partition in order; None for ``MAXVALUE``"""
+    rows = connection.execute(text(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"table": table_name}).all()
+    return [
+        (name, None if bound.upper() == "MAXVALUE" else date.fromordinal(int(bound) - TO_DAYS_OFFSET))
+        for name, bound in rows
+    ]
+
+
+def plan_partitions(
+    partitions: Sequence[Tuple[str, Optional[date]]],
+    cutoff: datetime,
+    today: date,
+    days_ahead: int
+) -> Tuple[List[str], List[date]]:
+    """
+    Partitions to drop (every row in them is before ``cutoff``) and the days
+    to add partitions for, up to ``today + days_ahead``.
+    """
+    drop = [name for name, bound in partitions if bound is not None and bound <= cutoff.date()]
+    bounds = [bound for _, bound in partitions if bound is not None]
+    next_day = max(bounds) if bounds else today
+    add = []
+    while next_day <= today + timedelta(days=days_ahead):
+        add.append(next_day)
+        next_day += timedelta(days=1)
+    return drop, add
+
+
+def maintain_partitions(bind: Engine, table_name: str, cutoff: datetime, days_ahead: int) -> int:
+    """Drop day partitions past ``cutoff`` and create upcoming ones; returns the partitions dropped"""
+    with bind.connect() as connection:
+        partitions = list_partitions(connection, table_name)
+        if not partitions:
+            logger.warning(f"{table_name} is not partitioned; see scripts/partition_otp_logs.sql")
+            return 0
+        drop, add = plan_partitions(partitions, cutoff, datetime.utcnow().date(), days_ahead)
+
+        if add:
+            definitions = ", ".join(
+                f"PARTITION {partition_name(day)} VALUES LESS THAN (TO_DAYS('{day + timedelta(days=1)}'))"
+                for day in add
+            )
+            if partitions[-1][1] is None:
+                connection.execute(text(
+                    f"ALTER TABLE {table_name} REORGANIZE PARTITION {partitions[-1][0]} INTO "
+                    f"({definitions}, PARTITION {partitions[-1][0]} VALUES LESS THAN MAXVALUE)"
+                ))
+            else:
+                connection.execute(text(f"ALTER TABLE {table_name} ADD PARTITION ({definitions})"))
+        if drop:
+            connection.execute(text(f"ALTER TABLE {table_name} DROP PARTITION {', '.join(drop)}"))
+            logger.info(f"Dropped {len(drop)} expired partitions of {table_name}")
+        return len(drop)
+
+
+# Sweeping
+
+@dataclass(frozen=True)
+class SweepResult:
+    """One target's sweep: rows deleted, elapsed seconds and how far behind the cutoff it still is"""
+    table: str
+    deleted: int
+    seconds: float
+    lag_seconds: float
+    partitions_dropped: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.deleted / self.seconds if self.seconds > 0 else 0.0
+
+
+class RetentionSweeper:
+    """
+    Deletes expired rows every ``interval`` seconds while holding the lease.
+
+    Each target is swept in chunks of ``chunk_size`` rows with ``pause``
+    seconds between chunks, at most ``max_chunks`` per sweep; whatever is
+    left shows up as lag and is picked up by the next sweep.
+
+    Targets marked ``archive`` are handed to ``archiver`` instead, for whole
+    days only, so each day is archived once; the archiver bounds the days per
+    sweep so a run stays well inside the lease.
+    """
+
+    def __init__(
+        self,
+        bind: Engine,
+        targets: Sequence[RetentionTarget],
+        lease: Optional[LeaderLease] = None,
+        interval: float = 300.0,
+        chunk_size: int = 1000,
+        pause: float = 0.05,
+        max_chunks: int = 1000,
+        partition_days_ahead: int = 7,
+        archiver: Optional[Any] = None
+    ):
+        self.bind = bind
+        self.targets = list(targets)
+        self.lease = lease or LocalLease()
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.max_chunks = max_chunks
+        self.partition_days_ahead = partition_days_ahead
+        self.archiver = archiver
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self) -> Dict[str, SweepResult]:
+        """Sweep every target once if this instance is the leader"""
+        if not await asyncio.to_thread(self.lease.acquire):
+            return {}
+        return {target.name: await self.sweep_target(target) for target in self.targets}
+
+    async def sweep_target(self, target: RetentionTarget) -> SweepResult:
+        cutoff = datetime.utcnow() - target.grace
+        archiving = target.archive and self.archiver is not None
+        if archiving:
+            cutoff = datetime.combine(cutoff.date(), datetime.min.time())
+        partitioned = target.partitioned and self.bind.dialect.name == "mysql"
+        started = time.perf_counter()
+        dropped = 0
+        if partitioned and not archiving:
+            dropped = await asyncio.to_thread(
+                maintain_partitions, self.bind, target.name, cutoff, self.partition_days_ahead
+            )
+
+        deleted = 0
+        if archiving:
+            # Archived rows are purged by the archiver; their partitions are left empty
+            deleted = await asyncio.to_thread(self.archiver.archive, target.table, target.column, cutoff)
+            if partitioned:
+                dropped = await asyncio.to_thread(
+                    maintain_partitions, self.bind, target.name, cutoff, self.partition_days_ahead
+                )
+        else:
+            for chunk in range(self.max_chunks):
+                if chunk:
+                    await asyncio.sleep(self.pause)
+                count = await asyncio.to_thread(self._delete_chunk, target, cutoff)
+                deleted += count
+                if count < self.chunk_size:
+                    break
+        seconds = time.perf_counter() - started
+
+        lag = await asyncio.to_thread(self._lag, target, cutoff)
+        result = SweepResult(target.name, deleted, seconds, lag, dropped)
+        metrics.RETENTION_ROWS.labels(target.name).inc(deleted)
+        metrics.RETENTION_ROWS_PER_SECOND.labels(target.name).set(result.rows_per_second)
+        metrics.RETENTION_LAG.labels(target.name).set(lag)
+        if deleted or dropped:
+            logger.info(
+                f"Retention deleted {deleted} rows from {target.name} in {seconds:.1f}s "
+                f"({result.rows_per_second:.0f} rows/s, {dropped} partitions dropped, lag {lag:.0f}s)"
+            )
+        return result
+
+    def _delete_chunk(self, target: RetentionTarget, cutoff: datetime) -> int:
+        statement = expired_chunk_statement(target.table, target.column, cutoff, self.chunk_size)
+        with self.bind.begin() as connection:
+            return connection.execute(statement).rowcount
+
+    def _lag(self, target: RetentionTarget, cutoff: datetime) -> float:
+        """Seconds between the oldest row past the cutoff and the cutoff; 0 when caught up"""
+        expires_at = target.table.c[target.column]
+        with self.bind.connect() as connection:
+            oldest = connection.execute(select(func.min(expires_at)).where(expires_at < cutoff)).scalar()
+        if oldest is None:
+            return 0.0
+        return max(0.0, (cutoff - oldest.replace(tzinfo=None)).total_seconds())
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="retention-sweeper")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.lease.release)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Retention sweep failed: {e}")
+
+
+def get_leader_lease(name: str) -> LeaderLease:
+    """Redis lease when Redis is configured, else a MySQL named lock, else a local one"""
+    client = get_redis_client()
+    if client is not None:
+        return RedisLease(client, name, ttl=settings.retention_interval_seconds * 3)
+    if engine.dialect.name == "mysql":
+        return MySQLLease(engine, name)
+    return LocalLease()
+
+
+@lru_cache()
+def get_retention_sweeper() -> RetentionSweeper:
+    """Get the process-wide sweeper for otp_logs and sessions (on the primary engine)"""
+    from .archive import get_archiver
+
+    targets = [
+        RetentionTarget(
+            OTPLog.__table__,
+            grace=timedelta(hours=settings.retention_otp_grace_hours),
+            partitioned=settings.retention_mysql_partitions,
+            archive=settings.archive_enabled
+        ),
+        RetentionTarget(
+            UserSession.__table__,
+            grace=timedelta(hours=settings.retention_session_grace_hours),
+            archive=settings.archive_enabled
+        )
+    ]
+    return RetentionSweeper(
+        engine,
+        targets,
+        lease=get_leader_lease("timelycabs:retention"),
+        interval=settings.retention_interval_seconds,
+        chunk_size=settings.retention_chunk_size,
+        pause=settings.retention_chunk_pause_seconds,
+        archiver=get_archiver() if settings.archive_enabled else None
+    )
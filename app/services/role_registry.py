@@ -0,0 +1,168 @@
+"""
+In-process role catalog
+
+The roles table is tiny and practically static, so it is read once into an
+immutable RoleCatalog (name -> role, id -> role) and lookups afterwards cost
+no queries. Each role name also has a fixed bit (its position in the
+role_name enum), so a set of roles is one integer and a role check is a
+bitwise AND. After changing roles, call ``RoleRegistry.bump()``: with Redis
+configured the version is shared, and every process reloads within
+``role_catalog_check_seconds``.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.exceptions import ValidationError
+from app.core.redis_client import get_redis_client
+from app.models.user import Role
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+DEFAULT_ROLES = (
+    {"role_name": "rider", "description": "Regular user who books rides"},
+    {"role_name": "driver", "description": "Driver who provides rides"},
+    {"role_name": "owner", "description": "Fleet owner"},
+    {"role_name": "admin", "description": "System administrator"},
+    {"role_name": "support", "description": "Customer support"}
+)
+
+# New role names must be appended to the enum so existing bits keep their meaning
+ROLE_BITS: Dict[str, int] = {name: 1 << index for index, name in enumerate(Role.__table__.c.role_name.type.enums)}
+
+
+def role_mask(role_names: Iterable[str]) -> int:
+    """Bitmask of ``role_names``; raises ValidationError for an unknown name"""
+    mask = 0
+    for name in role_names:
+        try:
+            mask |= ROLE_BITS[name]
+        except KeyError:
+            raise ValidationError(f"Unknown role: {name}", error_code="UNKNOWN_ROLE")
+    return mask
+
+
+@dataclass(frozen=True)
+class CachedRole:
+    """Role snapshot held in the role catalog and the session cache"""
+    role_id: int
+    role_name: str
+    description: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class RoleCatalog:
+    """Immutable snapshot of the roles table"""
+    by_name: Mapping[str, CachedRole]
+    by_id: Mapping[int, CachedRole]
+    version: int = 0
+
+    @classmethod
+    def build(cls, roles: Iterable[CachedRole], version: int = 0) -> "RoleCatalog":
+        roles = list(roles)
+        return cls(
+            by_name=MappingProxyType({role.role_name: role for role in roles}),
+            by_id=MappingProxyType({role.role_id: role for role in roles}),
+            version=version
+        )
+
+    def role_id(self, role_name: str) -> Optional[int]:
+        role = self.by_name.get(role_name)
+        return role.role_id if role is not None else None
+
+    def missing_defaults(self) -> list:
+        """DEFAULT_ROLES rows not in the catalog"""
+        return [role for role in DEFAULT_ROLES if role["role_name"] not in self.by_name]
+
+
+class RoleRegistry:
+    """
+    Process-wide holder of the current RoleCatalog, loaded on first use.
+
+    With ``version_client`` (Redis) the shared version is checked at most
+    every ``check_interval`` seconds; without it the catalog is only
+    reloaded after ``bump()`` or ``invalidate()`` in this process.
+    """
+
+    VERSION_KEY = "roles:version"
+
+    def __init__(
+        self,
+        version_client: Any = None,
+        check_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.version_client = version_client
+        self.check_interval = check_interval
+        self._clock = clock
+        self._catalog: Optional[RoleCatalog] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def catalog(self, db: Session) -> RoleCatalog:
+        """The current catalog, loading it with ``db`` if needed (one SELECT)"""
+        catalog = self._catalog
+        if catalog is not None and not self._stale(catalog):
+            return catalog
+        with self._lock:
+            if self._catalog is not None and self._catalog is not catalog:
+                return self._catalog
+            return self.load(db)
+
+    def load(self, db: Session, cache: bool = True) -> RoleCatalog:
+        """
+        Read the roles table; ``cache=False`` when it may hold rows of an
+        uncommitted transaction.
+        """
+        rows = db.execute(select(Role.role_id, Role.role_name, Role.description)).all()
+        catalog = RoleCatalog.build(
+            (CachedRole(role_id=role_id, role_name=role_name, description=description) for role_id, role_name, description in rows),
+            version=self._shared_version()
+        )
+        if cache:
+            self._catalog = catalog
+            self._next_check = self._clock() + self.check_interval
+            logger.info(f"Role catalog loaded: {len(catalog.by_name)} roles (version {catalog.version})")
+        return catalog
+
+    def bump(self) -> None:
+        """Make every process reload the catalog"""
+        if self.version_client is not None:
+            self.version_client.incr(self.VERSION_KEY)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        self._catalog = None
+
+    def _stale(self, catalog: RoleCatalog) -> bool:
+        if self.version_client is None or self._clock() < self._next_check:
+            return False
+        self._next_check = self._clock() + self.check_interval
+        return self._shared_version() != catalog.version
+
+    def _shared_version(self) -> int:
+        if self.version_client is None:
+            return 0
+        try:
+            return int(self.version_client.get(self.VERSION_KEY) or 0)
+        except Exception as e:
+            logger.warning(f"Failed to read the role catalog version: {e}")
+            return self._catalog.version if self._catalog is not None else 0
+
+
+@lru_cache()
+def get_role_registry() -> RoleRegistry:
+    """Get the process-wide role registry"""
+    return RoleRegistry(
+        version_client=get_redis_client(),
+        check_interval=settings.role_catalog_check_seconds
+    )
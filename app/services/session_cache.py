@@ -0,0 +1,242 @@
+"""
+Session validation cache used by AuthService
+"""
+import math
+import secrets
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import logging
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.redis_client import get_redis_client
+from app.models.user import User
+from .role_registry import CachedRole, role_mask
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# SessionCache.set default: read the user's version when the entry is stored
+_CURRENT = object()
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    Detached user+roles snapshot returned by AuthService.validate_session.
+
+    Attribute names match the User model, so it validates against
+    UserWithRolesResponse like an ORM row would.
+    """
+    user_id: int
+    phone: str
+    full_name: Optional[str]
+    gender: Optional[str]
+    phone_verified: bool
+    is_active: bool
+    created_at: datetime
+    updated_at: Optional[datetime]
+    roles: Tuple[CachedRole, ...] = ()
+    role_mask: int = 0  # role_registry.ROLE_BITS of ``roles``
+
+    @property
+    def role_names(self) -> Tuple[str, ...]:
+        return tuple(role.role_name for role in self.roles)
+
+    def has_any_role(self, mask: int) -> bool:
+        return bool(self.role_mask & mask)
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        """Build a snapshot from a User loaded with its roles"""
+        roles = tuple(
+            CachedRole(
+                role_id=user_role.role.role_id,
+                role_name=user_role.role.role_name,
+                description=user_role.role.description
+            )
+            for user_role in user.user_roles
+            if user_role.role is not None
+        )
+        return cls(
+            user_id=user.user_id,
+            phone=user.phone,
+            full_name=user.full_name,
+            gender=user.gender,
+            phone_verified=bool(user.phone_verified),
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            roles=roles,
+            role_mask=role_mask(role.role_name for role in roles)
+        )
+
+
+class SessionCache:
+    """
+    Token -> CachedUser cache with per-user invalidation.
+
+    Entries never outlive the session's own ``expires_at``. With
+    ``version_client`` (Redis), ``invalidate_user`` also writes a fresh
+    per-user version that ``get`` compares against the one the entry was
+    cached under, and ``invalidate_token`` writes a revocation key for the
+    token, so the other processes drop the entry on their next lookup (one
+    Redis MGET). Without it invalidation is local to the process and other
+    replicas converge within ``ttl_seconds``.
+    """
+
+    VERSION_KEY = "session_cache:user:{}"
+    REVOKED_KEY = "session_cache:revoked:{}"
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 60.0,
+        enabled: bool = True,
+        version_client: Any = None
+    ):
+        self.enabled = enabled and max_entries > 0 and ttl_seconds > 0
+        self.ttl_seconds = ttl_seconds
+        self.version_client = version_client
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        # Guards the cache and the index together; always taken before the
+        # TTLCache's own lock, which calls back into _unindex
+        self._lock = threading.Lock()
+        self._cache = TTLCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            on_remove=self._unindex
+        )
+
+    def get(self, auth_token: str) -> Optional[CachedUser]:
+        """Get cached user for a token"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._cache.get(auth_token)
+        if entry is None:
+            return None
+
+        user, version = entry
+        if self.version_client is not None and not self._current(auth_token, user.user_id, version):
+            with self._lock:
+                if self._cache.get(auth_token) is entry:
+                    self._cache.invalidate(auth_token)
+            return None
+        return user
+
+    def set(
+        self,
+        auth_token: str,
+        user: CachedUser,
+        expires_at: Optional[datetime] = None,
+        version: Any = _CURRENT
+    ) -> None:
+        """
+        Cache a user snapshot for a token. ``version`` is the user's
+        ``user_version`` read before the snapshot was loaded; by default it is
+        read now.
+        """
+        if not self.enabled:
+            return
+
+        ttl = None
+        if expires_at is not None:
+            now = datetime.now(timezone.utc) if expires_at.tzinfo else datetime.utcnow()
+            ttl = (expires_at - now).total_seconds()
+            if ttl <= 0:
+                return
+
+        if version is _CURRENT:
+            version = self.user_version(user.user_id)
+        with self._lock:
+            self._cache.set(auth_token, (user, version), ttl=ttl)
+            self._tokens_by_user.setdefault(user.user_id, set()).add(auth_token)
+
+    def invalidate_token(self, auth_token: str) -> bool:
+        """Drop a single token, in every process"""
+        if self.version_client is not None:
+            try:
+                # Outlives any entry another process may still hold for the token
+                self.version_client.set(self.REVOKED_KEY.format(auth_token), 1, ex=self._shared_key_ttl())
+            except Exception as e:
+                logger.warning(f"Failed to publish session cache revocation: {e}")
+        with self._lock:
+            return self._cache.invalidate(auth_token)
+
+    def invalidate_user(self, user_id: int) -> int:
+        """Drop every cached token belonging to a user, in every process"""
+        if self.version_client is not None:
+            try:
+                # A fresh random value rather than a counter, so a version key
+                # that expired and was recreated never matches an old entry
+                self.version_client.set(
+                    self.VERSION_KEY.format(user_id),
+                    secrets.token_hex(8),
+                    ex=self._shared_key_ttl()
+                )
+            except Exception as e:
+                logger.warning(f"Failed to publish session cache invalidation for user {user_id}: {e}")
+        with self._lock:
+            tokens = list(self._tokens_by_user.get(user_id, ()))
+            return sum(1 for token in tokens if self._cache.invalidate(token))
+
+    def user_version(self, user_id: int) -> Optional[str]:
+        """The user's shared cache version (None without Redis or before any invalidation)"""
+        return self.user_versions([user_id])[0]
+
+    def user_versions(self, user_ids: Sequence[int]) -> List[Optional[str]]:
+        """``user_version`` for many users in one round trip"""
+        if self.version_client is None or not user_ids:
+            return [None] * len(user_ids)
+        try:
+            return self.version_client.mget([self.VERSION_KEY.format(user_id) for user_id in user_ids])
+        except Exception as e:
+            logger.warning(f"Failed to read session cache versions: {e}")
+            return [None] * len(user_ids)
+
+    def _current(self, auth_token: str, user_id: int, version: Optional[str]) -> bool:
+        """Whether an entry is neither revoked nor cached under an old user version"""
+        try:
+            current_version, revoked = self.version_client.mget(
+                [self.VERSION_KEY.format(user_id), self.REVOKED_KEY.format(auth_token)]
+            )
+        except Exception as e:
+            logger.warning(f"Failed to read session cache versions: {e}")
+            return False
+        return revoked is None and current_version == version
+
+    def _shared_key_ttl(self) -> int:
+        return max(1, math.ceil(self.ttl_seconds * 2))
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss/eviction counters"""
+        return self._cache.stats()
+
+    def _unindex(self, auth_token: str, entry: Tuple[CachedUser, Optional[str]]) -> None:
+        # Called by the TTLCache while _lock is held
+        user_id = entry[0].user_id
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(auth_token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+@lru_cache()
+def get_session_cache() -> SessionCache:
+    """Get the process-wide session cache"""
+    return SessionCache(
+        max_entries=settings.session_cache_max_entries,
+        ttl_seconds=settings.session_cache_ttl_seconds,
+        enabled=settings.session_cache_enabled,
+        version_client=get_redis_client()
+    )
@@ -0,0 +1,147 @@
+"""
+Shared session store backends used by AuthService
+"""
+import calendar
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Optional
+import logging
+
+from app.core.config import get_settings
+from app.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _to_epoch(dt: datetime) -> float:
+    """Naive datetimes are UTC throughout the service layer"""
+    if dt.tzinfo is None:
+        return calendar.timegm(dt.utctimetuple()) + dt.microsecond / 1e6
+    return dt.timestamp()
+
+
+@dataclass(frozen=True)
+class SessionRecord:
+    """Detached session row; attribute names match the Session model"""
+    user_id: int
+    auth_token: str
+    device_info: Optional[str] = None
+    expires_at: Optional[datetime] = None
+    session_id: Optional[int] = None
+
+    @property
+    def is_expired(self) -> bool:
+        if self.expires_at is None:
+            return False
+        now = datetime.now(timezone.utc) if self.expires_at.tzinfo else datetime.utcnow()
+        return self.expires_at <= now
+
+    @classmethod
+    def from_model(cls, session: Any) -> "SessionRecord":
+        return cls(
+            user_id=session.user_id,
+            auth_token=session.auth_token,
+            device_info=session.device_info,
+            expires_at=session.expires_at,
+            session_id=session.session_id
+        )
+
+
+class SessionStore(ABC):
+    """Token-keyed session storage shared by all replicas"""
+
+    @abstractmethod
+    def put(self, record: SessionRecord) -> None:
+        """Store a session until its expires_at"""
+
+    @abstractmethod
+    def get(self, auth_token: str) -> Optional[SessionRecord]:
+        """Get a live session, or None if unknown/expired"""
+
+    @abstractmethod
+    def delete(self, auth_token: str) -> bool:
+        """Remove a session"""
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessions as JSON strings under ``<prefix><token>``, with the Redis key
+    expiring at the session's ``expires_at``.
+
+    A deleted session leaves a tombstone for ``tombstone_ttl`` seconds.
+    ``put`` never overwrites an existing key, so a reader that loaded the
+    row just before the logout committed cannot write the session back.
+    """
+
+    TOMBSTONE = "-"
+
+    def __init__(self, client: Any, key_prefix: str = "session:", tombstone_ttl: int = 300):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.tombstone_ttl = tombstone_ttl
+
+    def _key(self, auth_token: str) -> str:
+        return f"{self.key_prefix}{auth_token}"
+
+    def put(self, record: SessionRecord) -> None:
+        payload = json.dumps({
+            "session_id": record.session_id,
+            "user_id": record.user_id,
+            "device_info": record.device_info,
+            "expires_at": _to_epoch(record.expires_at) if record.expires_at else None
+        }, separators=(",", ":"))
+
+        if record.expires_at is None:
+            self.client.set(self._key(record.auth_token), payload, nx=True)
+        elif not record.is_expired:
+            self.client.set(self._key(record.auth_token), payload, exat=int(_to_epoch(record.expires_at)) + 1, nx=True)
+
+    def get(self, auth_token: str) -> Optional[SessionRecord]:
+        raw = self.client.get(self._key(auth_token))
+        if raw is None or raw == self.TOMBSTONE:
+            return None
+
+        data = json.loads(raw)
+        expires_at = data.get("expires_at")
+        record = SessionRecord(
+            user_id=data["user_id"],
+            auth_token=auth_token,
+            device_info=data.get("device_info"),
+            expires_at=datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None) if expires_at is not None else None,
+            session_id=data.get("session_id")
+        )
+        return None if record.is_expired else record
+
+    def delete(self, auth_token: str) -> bool:
+        """Replace the session with a tombstone; True if a live session was stored"""
+        pipe = self.client.pipeline()
+        pipe.get(self._key(auth_token))
+        pipe.set(self._key(auth_token), self.TOMBSTONE, ex=self.tombstone_ttl)
+        previous, _ = pipe.execute()
+        return previous is not None and previous != self.TOMBSTONE
+
+
+@lru_cache()
+def get_session_store() -> Optional[SessionStore]:
+    """
+    Get the configured session store, or None to use the database only.
+
+    With ``session_store_backend = "redis"`` sessions are read from Redis and
+    the sessions table is the durable record and fallback on a miss.
+    """
+    backend = settings.session_store_backend.lower()
+    if backend == "database":
+        return None
+
+    if backend == "redis":
+        client = get_redis_client()
+        if client is None:
+            logger.warning("session_store_backend is 'redis' but redis_url is not set; using the database")
+            return None
+        return RedisSessionStore(client)
+
+    raise ValueError(f"Unsupported session store backend: {settings.session_store_backend}")
@@ -0,0 +1,381 @@
+"""
+SMS delivery: provider clients and an in-process outbox
+
+Callers enqueue messages and return immediately; worker tasks drain the
+outbox, batch messages for providers that accept batches, and retry
+transient failures with exponential backoff. Each HTTP provider keeps one
+pooled keep-alive ``httpx.AsyncClient``.
+"""
+import asyncio
+import random
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Sequence
+import logging
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.exceptions import ExternalServiceError
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class SMSMessage:
+    """A text message to one phone number"""
+    phone: str
+    body: str
+    message_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+def delivery_error(message: str, retryable: bool) -> ExternalServiceError:
+    return ExternalServiceError(message, error_code="SMS_DELIVERY_FAILED", details={"retryable": retryable})
+
+
+class SMSProvider(ABC):
+    """SMS gateway client"""
+
+    name = "base"
+    max_batch_size = 1
+
+    @abstractmethod
+    async def send_batch(self, messages: Sequence[SMSMessage]) -> List[bool]:
+        """
+        Deliver up to ``max_batch_size`` messages.
+
+        Returns whether each message was accepted; rejected messages are
+        retried. Raises ExternalServiceError when the whole batch failed, with
+        ``details["retryable"]`` telling whether to try again.
+        """
+
+    async def close(self) -> None:
+        """Release connections"""
+
+
+class MockSMSProvider(SMSProvider):
+    """Logs messages instead of sending them"""
+
+    name = "mock"
+    max_batch_size = 100
+
+    async def send_batch(self, messages: Sequence[SMSMessage]) -> List[bool]:
+        for message in messages:
+            logger.info(f"SMS to {message.phone}: {message.body}")
+        return [True] * len(messages)
+
+
+class HTTPSMSProvider(SMSProvider):
+    """
+    Base class for HTTP gateways.
+
+    The client is created on first use so it belongs to the running event
+    loop, and is reused for every request to keep connections alive. httpx
+    itself is imported on first use, keeping it off the startup path.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = 20,
+        timeout: float = 5.0,
+        auth: Optional["httpx.Auth"] = None,
+        headers: Optional[dict] = None,
+        transport: Optional["httpx.AsyncBaseTransport"] = None
+    ):
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.auth = auth
+        self.headers = headers or {}
+        self.transport = transport
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client_loop = loop
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=self.auth,
+                headers=self.headers,
+                timeout=self.timeout,
+                transport=self.transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    async def post(self, url: str, **kwargs) -> "httpx.Response":
+        """POST and map transport errors and error statuses onto ExternalServiceError"""
+        import httpx
+
+        try:
+            response = await self.client.post(url, **kwargs)
+        except httpx.HTTPError as e:
+            raise delivery_error(f"{self.name} request failed: {e}", retryable=True)
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise delivery_error(f"{self.name} returned {response.status_code}", retryable=True)
+        if response.status_code >= 400:
+            raise delivery_error(f"{self.name} rejected the request: {response.status_code}", retryable=False)
+        return response
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class JSONBatchSMSProvider(HTTPSMSProvider):
+    """
+    Generic JSON gateway (also spoken by benchmarks/sms_stub_provider.py):
+
+        POST /messages  {"messages": [{"id": ..., "to": ..., "body": ...}]}
+        -> {"results": [{"id": ..., "accepted": true}]}
+    """
+
+    name = "http"
+    max_batch_size = 100
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, **kwargs):
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else None
+        super().__init__(base_url, headers=headers, **kwargs)
+
+    async def send_batch(self, messages: Sequence[SMSMessage]) -> List[bool]:
+        response = await self.post("/messages", json={
+            "messages": [
+                {"id": message.message_id, "to": message.phone, "body": message.body}
+                for message in messages
+            ]
+        })
+        accepted = {
+            result["id"] for result in response.json().get("results", ())
+            if result.get("accepted")
+        }
+        return [message.message_id in accepted for message in messages]
+
+
+class TwilioSMSProvider(HTTPSMSProvider):
+    """Twilio Messages API; one message per request"""
+
+    name = "twilio"
+    max_batch_size = 1
+
+    def __init__(self, account_sid: str, auth_token: str, sender: str, base_url: Optional[str] = None, **kwargs):
+        import httpx
+
+        super().__init__(
+            base_url or "https://api.twilio.com",
+            auth=httpx.BasicAuth(account_sid, auth_token),
+            **kwargs
+        )
+        self.account_sid = account_sid
+        self.sender = sender
+
+    async def send_batch(self, messages: Sequence[SMSMessage]) -> List[bool]:
+        results = []
+        for message in messages:
+            await self.post(
+                f"/2010-04-01/Accounts/{self.account_sid}/Messages.json",
+                data={"To": message.phone, "From": self.sender, "Body": message.body}
+            )
+            results.append(True)
+        return results
+
+
+class SMSOutbox:
+    """
+    Bounded in-process queue drained by worker tasks.
+
+    ``enqueue`` never waits on the provider. Workers take up to
+    ``provider.max_batch_size`` queued messages per call, and failed messages
+    are re-queued after ``retry_backoff * 2 ** (attempt - 1)`` seconds (with
+    jitter) until ``max_attempts`` is reached.
+    """
+
+    def __init__(
+        self,
+        provider: SMSProvider,
+        workers: int = 4,
+        max_size: int = 10000,
+        max_attempts: int = 5,
+        retry_backoff: float = 0.5
+    ):
+        self.provider = provider
+        self.workers = workers
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retries: set = set()
+
+    @property
+    def running(self) -> bool:
+        """Workers are alive on the current event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return self._loop is loop and any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        """Start the workers on the running event loop"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._retries.clear()
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"sms-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"SMS outbox started with {self.workers} workers ({self.provider.name} provider)")
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Drain queued messages and pending retries for up to ``timeout`` seconds, then stop the workers"""
+        if not self.running:
+            return
+        deadline = self._loop.time() + timeout
+        try:
+            while True:
+                await asyncio.wait_for(self._queue.join(), max(0.0, deadline - self._loop.time()))
+                if not self._retries:
+                    break
+                if self._loop.time() >= deadline:
+                    raise asyncio.TimeoutError
+                await asyncio.sleep(min(0.05, deadline - self._loop.time()))
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"SMS outbox stopped with {self._queue.qsize()} undelivered messages "
+                f"and {len(self._retries)} retries pending"
+            )
+
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.provider.close()
+
+    def enqueue(self, message: SMSMessage) -> bool:
+        """Queue a message; False if the outbox is full"""
+        if not self.running:
+            self.start()
+        try:
+            self._queue.put_nowait((message, 0))
+        except asyncio.QueueFull:
+            logger.error(f"SMS outbox full, dropping message {message.message_id}")
+            metrics.SMS_MESSAGES.labels("dropped").inc()
+            return False
+        metrics.SMS_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.provider.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            metrics.SMS_QUEUE_DEPTH.set(self._queue.qsize())
+
+            try:
+                await self._send(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _send(self, batch: list) -> None:
+        messages = [message for message, _ in batch]
+        started = time.perf_counter()
+        try:
+            accepted = await self.provider.send_batch(messages)
+            retryable = True
+        except ExternalServiceError as e:
+            logger.warning(f"SMS batch of {len(batch)} failed: {e.message}")
+            accepted = [False] * len(batch)
+            retryable = e.details.get("retryable", False)
+        except Exception as e:
+            logger.error(f"SMS provider error: {e}")
+            accepted = [False] * len(batch)
+            retryable = True
+        metrics.SMS_SEND_LATENCY.observe(time.perf_counter() - started)
+
+        for (message, attempt), ok in zip(batch, accepted):
+            if ok:
+                metrics.SMS_MESSAGES.labels("sent").inc()
+            elif retryable and attempt + 1 < self.max_attempts:
+                metrics.SMS_MESSAGES.labels("retried").inc()
+                self._schedule_retry(message, attempt + 1)
+            else:
+                logger.error(f"Giving up on SMS {message.message_id} to {message.phone} after {attempt + 1} attempts")
+                metrics.SMS_MESSAGES.labels("failed").inc()
+
+    def _schedule_retry(self, message: SMSMessage, attempt: int) -> None:
+        delay = self.retry_backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+
+        def requeue() -> None:
+            self._retries.discard(handle)
+            try:
+                self._queue.put_nowait((message, attempt))
+            except asyncio.QueueFull:
+                logger.error(f"SMS outbox full, dropping retry of {message.message_id}")
+                metrics.SMS_MESSAGES.labels("dropped").inc()
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retries.add(handle)
+
+
+def create_sms_provider() -> SMSProvider:
+    """Build the provider selected by ``sms_provider`` (mock, http, twilio)"""
+    provider = settings.sms_provider.lower()
+    pool = {"max_connections": settings.sms_max_connections, "timeout": settings.sms_timeout_seconds}
+
+    if provider == "mock":
+        return MockSMSProvider()
+    if provider == "http":
+        if not settings.sms_api_url:
+            raise ValueError("sms_provider 'http' requires sms_api_url")
+        return JSONBatchSMSProvider(settings.sms_api_url, api_key=settings.sms_api_key, **pool)
+    if provider == "twilio":
+        if not (settings.sms_api_key and settings.sms_api_secret):
+            raise ValueError("sms_provider 'twilio' requires sms_api_key and sms_api_secret")
+        return TwilioSMSProvider(
+            settings.sms_api_key,
+            settings.sms_api_secret,
+            settings.sms_sender_id,
+            base_url=settings.sms_api_url,
+            **pool
+        )
+
+    raise ValueError(f"Unsupported SMS provider: {settings.sms_provider}")
+
+
+@lru_cache()
+def get_sms_outbox() -> SMSOutbox:
+    """Get the process-wide SMS outbox"""
+    return SMSOutbox(
+        create_sms_provider(),
+        workers=settings.sms_workers,
+        max_size=settings.sms_outbox_size,
+        max_attempts=settings.sms_max_attempts,
+        retry_backoff=settings.sms_retry_backoff_seconds
+    )
@@ -1,16 +1,17 @@
-"""
-Utilities package
-"""
-from .logging import setup_logging, get_logger
-from .validators import validate_phone, validate_email
-from .helpers import generate_id, format_datetime, paginate_query
-
-__all__ = [
-    "setup_logging",
-    "get_logger",
-    "validate_phone",
-    "validate_email", 
-    "generate_id",
-    "format_datetime",
-    "paginate_query"
-]
+"""
+Utilities package
+"""
+from .logging import setup_logging, get_logger
+from .validators import validate_phone, validate_email
+from .helpers import generate_id, format_datetime, paginate_query, keyset_paginate
+
+__all__ = [
+    "setup_logging",
+    "get_logger",
+    "validate_phone",
+    "validate_email", 
+    "generate_id",
+    "format_datetime",
+    "paginate_query",
+    "keyset_paginate"
+]
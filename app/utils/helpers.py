@@ -1,224 +1,338 @@
-"""
-Helper utilities
-"""
-import uuid
-import hashlib
-import secrets
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
-from sqlalchemy.orm import Query
-from sqlalchemy import func
-
-
-def generate_id() -> str:
-    """
-    Generate a unique ID
-    """
-    return str(uuid.uuid4())
-
-
-def generate_short_id(length: int = 8) -> str:
-    """
-    Generate a short unique ID
-    """
-    return secrets.token_urlsafe(length)[:length]
-
-
-def format_datetime(dt: datetime, format_str: str = "%Y-%m-%d %H:%M:%S") -> str:
-    """
-    Format datetime to string
-    """
-    if dt is None:
-        return ""
-    
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    
-    return dt.strftime(format_str)
-
-
-def utc_now() -> datetime:
-    """
-    Get current UTC datetime
-    """
-    return datetime.now(timezone.utc)
-
-
-def paginate_query(
-    query: Query,
-    page: int = 1,
-    size: int = 20,
-    max_size: int = 100
-) -> Tuple[List[Any], int, int]:
-    """
-    Paginate a SQLAlchemy query
-    
-    Returns:
-        Tuple of (items, total_count, total_pages)
-    """
-    # Limit page size
-    size = min(size, max_size)
-    
-    # Calculate offset
-    offset = (page - 1) * size
-    
-    # Get total count
-    total_count = query.count()
-    
-    # Get paginated results
-    items = query.offset(offset).limit(size).all()
-    
-    # Calculate total pages
-    total_pages = (total_count + size - 1) // size
-    
-    return items, total_count, total_pages
-
-
-def create_pagination_info(
-    page: int,
-    size: int,
-    total: int
-) -> Dict[str, Any]:
-    """
-    Create pagination information
-    """
-    total_pages = (total + size - 1) // size
-    
-    return {
-        "page": page,
-        "size": size,
-        "total": total,
-        "pages": total_pages,
-        "has_next": page < total_pages,
-        "has_prev": page > 1,
-        "next_page": page + 1 if page < total_pages else None,
-        "prev_page": page - 1 if page > 1 else None
-    }
-
-
-def mask_phone(phone: str) -> str:
-    """
-    Mask phone number for display
-    """
-    if not phone or len(phone) < 4:
-        return phone
-    
-    # Keep first 3 and last 2 digits visible
-    if len(phone) <= 5:
-        return phone[0] + "*" * (len(phone) - 2) + phone[-1]
-    
-    return phone[:3] + "*" * (len(phone) - 5) + phone[-2:]
-
-
-def mask_email(email: str) -> str:
-    """
-    Mask email for display
-    """
-    if not email or "@" not in email:
-        return email
-    
-    local, domain = email.split("@", 1)
-    
-    if len(local) <= 2:
-        masked_local = local[0] + "*"
-    else:
-        masked_local = local[0] + "*" * (len(local) - 2) + local[-1]
-    
-    return f"{masked_local}@{domain}"
-
-
-def hash_string(text: str, algorithm: str = "sha256") -> str:
-    """
-    Hash a string using specified algorithm
-    """
-    if algorithm == "md5":
-        return hashlib.md5(text.encode()).hexdigest()
-    elif algorithm == "sha1":
-        return hashlib.sha1(text.encode()).hexdigest()
-    elif algorithm == "sha256":
-        return hashlib.sha256(text.encode()).hexdigest()
-    else:
-        raise ValueError(f"Unsupported hash algorithm: {algorithm}")
-
-
-def chunk_list(lst: List[Any], chunk_size: int) -> List[List[Any]]:
-    """
-    Split a list into chunks of specified size
-    """
-    return [lst[i:i + chunk_size] for i in range(0, len(lst), chunk_size)]
-
-
-def safe_get(dictionary: Dict[str, Any], key: str, default: Any = None) -> Any:
-    """
-    Safely get value from dictionary with nested key support
-    """
-    keys = key.split(".")
-    value = dictionary
-    
-    for k in keys:
-        if isinstance(value, dict) and k in value:
-            value = value[k]
-        else:
-            return default
-    
-    return value
-
-
-def remove_none_values(dictionary: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Remove None values from dictionary
-    """
-    return {k: v for k, v in dictionary.items() if v is not None}
-
-
-def merge_dicts(*dicts: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Merge multiple dictionaries
-    """
-    result = {}
-    for d in dicts:
-        result.update(d)
-    return result
-
-
-def format_file_size(size_bytes: int) -> str:
-    """
-    Format file size in human readable format
-    """
-    if size_bytes == 0:
-        return "0 B"
-    
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
-    
-    return f"{size_bytes:.1f} {size_names[i]}"
-
-
-def calculate_distance(
-    lat1: float, 
-    lon1: float, 
-    lat2: float, 
-    lon2: float
-) -> float:
-    """
-    Calculate distance between two coordinates using Haversine formula
-    Returns distance in kilometers
-    """
-    import math
-    
-    # Convert to radians
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    
-    # Radius of earth in kilometers
-    r = 6371
-    
-    return c * r
+"""
+Helper utilities
+"""
+import uuid
+import base64
+import binascii
+import hashlib
+import json
+import secrets
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.orm import Query
+from sqlalchemy import and_, func, or_
+
+from app.core.cache import TTLCache
+from app.core.exceptions import ValidationError
+
+# Keyset page totals, keyed by the count statement; shared by all callers
+_count_cache = TTLCache(max_entries=1024, ttl_seconds=30)
+
+
+def generate_id() -> str:
+    """
+    Generate a unique ID
+    """
+    return str(uuid.uuid4())
+
+
+def generate_short_id(length: int = 8) -> str:
+    """
+    Generate a short unique ID
+    """
+    return secrets.token_urlsafe(length)[:length]
+
+
+def format_datetime(dt: datetime, format_str: str = "%Y-%m-%d %H:%M:%S") -> str:
+    """
+    Format datetime to string
+    """
+    if dt is None:
+        return ""
+    
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    
+    return dt.strftime(format_str)
+
+
+def utc_now() -> datetime:
+    """
+    Get current UTC datetime
+    """
+    return datetime.now(timezone.utc)
+
+
+def paginate_query(
+    query: Query,
+    page: int = 1,
+    size: int = 20,
+    max_size: int = 100
+) -> Tuple[List[Any], int, int]:
+    """
+    Paginate a SQLAlchemy query
+    
+    Returns:
+        Tuple of (items, total_count, total_pages)
+    """
+    # Limit page size
+    size = min(size, max_size)
+    
+    # Calculate offset
+    offset = (page - 1) * size
+    
+    # Get total count
+    total_count = query.count()
+    
+    # Get paginated results
+    items = query.offset(offset).limit(size).all()
+    
+    # Calculate total pages
+    total_pages = (total_count + size - 1) // size
+    
+    return items, total_count, total_pages
+
+
+@dataclass(frozen=True)
+class KeysetPage:
+    """One page of keyset pagination"""
+    items: List[Any]
+    size: int
+    next_cursor: Optional[str]
+    total: Optional[int] = None
+    total_exact: bool = True
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of the last row into an opaque cursor
+    """
+    payload = [{"dt": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int) -> List[Any]:
+    """
+    Decode a cursor made by encode_cursor for a sort key of ``length`` columns
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(payload, list) or len(payload) != length:
+            raise ValueError("wrong key length")
+        return [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in payload
+        ]
+    except (ValueError, TypeError, KeyError, binascii.Error) as e:
+        raise ValidationError("Invalid pagination cursor", error_code="INVALID_CURSOR", details={"reason": str(e)})
+
+
+def _after_key(columns: Sequence[Any], values: Sequence[Any], descending: bool):
+    """(a > x) OR (a = x AND b > y) ... -- expanded rather than a row comparison so MySQL uses the index"""
+    clauses = []
+    for i, column in enumerate(columns):
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*(columns[j] == values[j] for j in range(i)), step))
+    return or_(*clauses)
+
+
+def count_query(query: Query, limit: Optional[int] = None, cache: bool = True) -> Tuple[int, bool]:
+    """
+    Count rows of a query, returning (count, exact)
+    
+    With ``limit`` at most ``limit`` rows are counted; a result equal to the
+    limit is a lower bound. With ``cache`` results are reused for up to 30
+    seconds per statement and parameters, so they may lag behind writes.
+    """
+    counted = query.order_by(None)
+    if limit is not None:
+        counted = counted.limit(limit)
+    compiled = counted.statement.compile()
+    key = (compiled.string, repr(sorted(compiled.params.items())))
+    
+    total = _count_cache.get(key) if cache else None
+    if total is None:
+        total = query.session.query(func.count()).select_from(counted.subquery()).scalar()
+        if cache:
+            _count_cache.set(key, total)
+    return total, limit is None or total < limit
+
+
+def keyset_paginate(
+    query: Query,
+    order_by: Sequence[Any],
+    cursor: Optional[str] = None,
+    size: int = 20,
+    max_size: int = 100,
+    descending: bool = False,
+    with_total: bool = False,
+    total_limit: Optional[int] = None
+) -> KeysetPage:
+    """
+    Paginate a SQLAlchemy query by keyset instead of OFFSET
+    
+    ``order_by`` columns must be NOT NULL, end in a unique column and match an
+    index for the seek to stay O(page size) at any depth. ``cursor`` is the
+    previous page's ``next_cursor``. The total is only counted when asked for
+    (see count_query).
+    """
+    size = min(size, max_size)
+    columns = list(order_by)
+    
+    page_query = query
+    if cursor:
+        page_query = page_query.filter(_after_key(columns, decode_cursor(cursor, len(columns)), descending))
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    page_query = page_query.order_by(None).order_by(*ordering)
+    
+    # One extra row tells whether there is a next page
+    items = page_query.limit(size + 1).all()
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    
+    total, exact = count_query(query, total_limit) if with_total else (None, True)
+    return KeysetPage(items=items, size=size, next_cursor=next_cursor, total=total, total_exact=exact)
+
+
+def create_pagination_info(
+    page: int,
+    size: int,
+    total: int
+) -> Dict[str, Any]:
+    """
+    Create pagination information
+    """
+    total_pages = (total + size - 1) // size
+    
+    return {
+        "page": page,
+        "size": size,
+        "total": total,
+        "pages": total_pages,
+        "has_next": page < total_pages,
+        "has_prev": page > 1,
+        "next_page": page + 1 if page < total_pages else None,
+        "prev_page": page - 1 if page > 1 else None
+    }
+
+
+def mask_phone(phone: str) -> str:
+    """
+    Mask phone number for display
+    """
+    if not phone or len(phone) < 4:
+        return phone
+    
+    # Keep first 3 and last 2 digits visible
+    if len(phone) <= 5:
+        return phone[0] + "*" * (len(phone) - 2) + phone[-1]
+    
+    return phone[:3] + "*" * (len(phone) - 5) + phone[-2:]
+
+
+def mask_email(email: str) -> str:
+    """
+    Mask email for display
+    """
+    if not email or "@" not in email:
+        return email
+    
+    local, domain = email.split("@", 1)
+    
+    if len(local) <= 2:
+        masked_local = local[0] + "*"
+    else:
+        masked_local = local[0] + "*" * (len(local) - 2) + local[-1]
+    
+    return f"{masked_local}@{domain}"
+
+
+def hash_string(text: str, algorithm: str = "sha256") -> str:
+    """
+    Hash a string using specified algorithm
+    """
+    if algorithm == "md5":
+        return hashlib.md5(text.encode()).hexdigest()
+    elif algorithm == "sha1":
+        return hashlib.sha1(text.encode()).hexdigest()
+    elif algorithm == "sha256":
+        return hashlib.sha256(text.encode()).hexdigest()
+    else:
+        raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+
+
+def chunk_list(lst: List[Any], chunk_size: int) -> List[List[Any]]:
+    """
+    Split a list into chunks of specified size
+    """
+    return [lst[i:i + chunk_size] for i in range(0, len(lst), chunk_size)]
+
+
+def safe_get(dictionary: Dict[str, Any], key: str, default: Any = None) -> Any:
+    """
+    Safely get value from dictionary with nested key support
+    """
+    keys = key.split(".")
+    value = dictionary
+    
+    for k in keys:
+        if isinstance(value, dict) and k in value:
+            value = value[k]
+        else:
+            return default
+    
+    return value
+
+
+def remove_none_values(dictionary: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Remove None values from dictionary
+    """
+    return {k: v for k, v in dictionary.items() if v is not None}
+
+
+def merge_dicts(*dicts: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge multiple dictionaries
+    """
+    result = {}
+    for d in dicts:
+        result.update(d)
+    return result
+
+
+def format_file_size(size_bytes: int) -> str:
+    """
+    Format file size in human readable format
+    """
+    if size_bytes == 0:
+        return "0 B"
+    
+    size_names = ["B", "KB", "MB", "GB", "TB"]
+    i = 0
+    while size_bytes >= 1024 and i < len(size_names) - 1:
+        size_bytes /= 1024.0
+        i += 1
+    
+    return f"{size_bytes:.1f} {size_names[i]}"
+
+
+def calculate_distance(
+    lat1: float, 
+    lon1: float, 
+    lat2: float, 
+    lon2: float
+) -> float:
+    """
+    Calculate distance between two coordinates using Haversine formula
+    Returns distance in kilometers
+    """
+    import math
+    
+    # Convert to radians
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    
+    # Haversine formula
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+    c = 2 * math.asin(math.sqrt(a))
+    
+    # Radius of earth in kilometers
+    r = 6371
+    
+    return c * r
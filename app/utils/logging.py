@@ -1,147 +1,391 @@
-"""
-Logging utilities
-"""
-import logging
-import logging.config
-import sys
-from typing import Optional
-from pathlib import Path
-
-from app.core.config import get_settings
-
-settings = get_settings()
-
-
-def setup_logging(
-    log_level: Optional[str] = None,
-    log_file: Optional[str] = None
-) -> None:
-    """
-    Setup application logging configuration
-    """
-    level = log_level or settings.log_level
-    
-    # Create logs directory if it doesn't exist
-    # Always create the logs directory for default log files
-    logs_dir = Path("logs")
-    logs_dir.mkdir(parents=True, exist_ok=True)
-    
-    # If a specific log file is provided, ensure its directory exists
-    if log_file:
-        log_path = Path(log_file)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    logging_config = {
-        "version": 1,
-        "disable_existing_loggers": False,
-        "formatters": {
-            "default": {
-                "format": settings.log_format,
-                "datefmt": "%Y-%m-%d %H:%M:%S",
-            },
-            "detailed": {
-                "format": "%(asctime)s - %(name)s - %(levelname)s - %(module)s - %(funcName)s - %(message)s",
-                "datefmt": "%Y-%m-%d %H:%M:%S",
-            },
-            "json": {
-                "format": '{"timestamp": "%(asctime)s", "level": "%(levelname)s", "logger": "%(name)s", "message": "%(message)s"}',
-                "datefmt": "%Y-%m-%d %H:%M:%S",
-            }
-        },
-        "handlers": {
-            "console": {
-                "class": "logging.StreamHandler",
-                "level": level,
-                "formatter": "default",
-                "stream": sys.stdout,
-            },
-            "file": {
-                "class": "logging.handlers.RotatingFileHandler",
-                "level": level,
-                "formatter": "detailed",
-                "filename": log_file or "logs/app.log",
-                "maxBytes": 10485760,  # 10MB
-                "backupCount": 5,
-            },
-            "error_file": {
-                "class": "logging.handlers.RotatingFileHandler",
-                "level": "ERROR",
-                "formatter": "detailed",
-                "filename": log_file or "logs/error.log",
-                "maxBytes": 10485760,  # 10MB
-                "backupCount": 5,
-            }
-        },
-        "loggers": {
-            "": {  # Root logger
-                "level": level,
-                "handlers": ["console", "file", "error_file"],
-                "propagate": False,
-            },
-            "app": {
-                "level": level,
-                "handlers": ["console", "file", "error_file"],
-                "propagate": False,
-            },
-            "uvicorn": {
-                "level": "INFO",
-                "handlers": ["console"],
-                "propagate": False,
-            },
-            "uvicorn.access": {
-                "level": "INFO",
-                "handlers": ["console"],
-                "propagate": False,
-            },
-            "sqlalchemy": {
-                "level": "WARNING",
-                "handlers": ["console", "file"],
-                "propagate": False,
-            },
-        }
-    }
-    
-    logging.config.dictConfig(logging_config)
-
-
-def get_logger(name: str) -> logging.Logger:
-    """
-    Get a logger instance
-    """
-    return logging.getLogger(name)
-
-
-class RequestLogger:
-    """
-    Context manager for request logging
-    """
-    
-    def __init__(self, logger: logging.Logger, request_id: str, method: str, path: str):
-        self.logger = logger
-        self.request_id = request_id
-        self.method = method
-        self.path = path
-        self.start_time = None
-    
-    def __enter__(self):
-        import time
-        self.start_time = time.time()
-        self.logger.info(
-            f"Request {self.request_id}: {self.method} {self.path} started"
-        )
-        return self
-    
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        import time
-        duration = time.time() - self.start_time
-        
-        if exc_type:
-            self.logger.error(
-                f"Request {self.request_id}: {self.method} {self.path} failed "
-                f"after {duration:.4f}s - {exc_val}"
-            )
-        else:
-            self.logger.info(
-                f"Request {self.request_id}: {self.method} {self.path} completed "
-                f"in {duration:.4f}s"
-            )
+"""
+Logging utilities
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.config
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pathlib import Path
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Loggers whose handlers move behind the queue in async mode
+QUEUED_LOGGERS = ("", "app", "uvicorn", "uvicorn.access", "sqlalchemy")
+
+_listener: Optional["LogQueueListener"] = None
+_queue_stats: Optional["LogQueueStats"] = None
+_direct_handlers: Dict[str, Tuple[logging.Handler, ...]] = {}
+
+# ID of the request being handled, set by the request middleware
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Sets ``record.request_id`` from ``request_id_var`` unless the caller
+    passed one. Runs on the logging thread, before records are queued.
+    """
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line.
+    
+    Values go through json.dumps, so quotes, newlines and control characters
+    in messages are escaped correctly. Timestamps are cached per second.
+    """
+    
+    def __init__(
+        self,
+        fmt: Optional[str] = None,
+        datefmt: Optional[str] = None,
+        style: str = "%",
+        extra_fields: Iterable[str] = ("request_id",)
+    ):
+        super().__init__(fmt, datefmt, style)
+        self.extra_fields = tuple(extra_fields)
+        self._cached_second: Optional[int] = None
+        self._cached_time = ""
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = time.strftime(datefmt or "%Y-%m-%dT%H:%M:%S", self.converter(record.created))
+            self._cached_second = second
+        return self._cached_time
+    
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "timestamp": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in self.extra_fields:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+class LogQueueStats:
+    """Counters for the logging queue, updated from every logging thread"""
+    
+    def __init__(self, log_queue: "queue.Queue"):
+        self.queue = log_queue
+        self.enqueued = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+    
+    def record_enqueued(self) -> None:
+        with self._lock:
+            self.enqueued += 1
+    
+    def record_dropped(self) -> None:
+        with self._lock:
+            self.dropped += 1
+    
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            enqueued, dropped = self.enqueued, self.dropped
+        return {
+            "enqueued": enqueued,
+            "dropped": dropped,
+            "queue_size": self.queue.qsize(),
+            "queue_max": self.queue.maxsize,
+        }
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records for the background listener.
+    
+    The calling thread only merges the message arguments into a copy of the
+    record (other handlers still see the original); formatting and I/O
+    happen on the listener thread. When the bounded queue is full the
+    ``overflow`` policy applies: ``drop_new`` discards the incoming record,
+    ``drop_oldest`` discards the oldest queued one and ``block`` waits.
+    """
+    
+    def __init__(
+        self,
+        log_queue: "queue.Queue",
+        handlers: Tuple[logging.Handler, ...],
+        stats: LogQueueStats,
+        overflow: str = "drop_new"
+    ):
+        super().__init__(log_queue)
+        if overflow not in ("drop_new", "drop_oldest", "block"):
+            raise ValueError(f"Unsupported log queue overflow policy: {overflow}")
+        self.target_handlers = handlers
+        self.stats = stats
+        self.overflow = overflow
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        record = copy.copy(record)
+        record.msg = message
+        record.args = None
+        record.log_handlers = self.target_handlers
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow == "block":
+            self.queue.put(record)
+            self.stats.record_enqueued()
+            return
+        
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                self.stats.record_enqueued()
+                return
+            except queue.Full:
+                if self.overflow == "drop_new":
+                    self.stats.record_dropped()
+                    return
+            try:
+                self.queue.get_nowait()
+                self.stats.record_dropped()
+            except queue.Empty:
+                pass
+
+
+class LogQueueListener(logging.handlers.QueueListener):
+    """Single background thread that formats, rotates and writes records"""
+    
+    def __init__(self, log_queue: "queue.Queue", handlers: List[logging.Handler]):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+    
+    def handle(self, record: logging.LogRecord) -> None:
+        for handler in getattr(record, "log_handlers", self.handlers):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+    
+    def enqueue_sentinel(self) -> None:
+        # Blocking put: a full bounded queue must not lose the stop signal
+        self.queue.put(self._sentinel)
+
+
+def setup_logging(
+    log_level: Optional[str] = None,
+    log_file: Optional[str] = None
+) -> None:
+    """
+    Setup application logging configuration
+    
+    With ``log_async`` enabled the handlers below are written from a
+    background listener thread and callers only enqueue records.
+    """
+    global _queue_stats
+    
+    level = log_level or settings.log_level
+    
+    # Create logs directory if it doesn't exist
+    # Always create the logs directory for default log files
+    logs_dir = Path("logs")
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    
+    # If a specific log file is provided, ensure its directory exists
+    if log_file:
+        log_path = Path(log_file)
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    logging_config = {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "filters": {
+            "request_id": {"()": "app.utils.logging.RequestIdFilter"},
+        },
+        "formatters": {
+            "default": {
+                "format": settings.log_format,
+                "datefmt": "%Y-%m-%d %H:%M:%S",
+            },
+            "detailed": {
+                "format": "%(asctime)s - %(name)s - %(levelname)s - %(module)s - %(funcName)s - %(message)s",
+                "datefmt": "%Y-%m-%d %H:%M:%S",
+            },
+            "json": {
+                "()": "app.utils.logging.JsonFormatter",
+                "datefmt": "%Y-%m-%dT%H:%M:%S",
+            }
+        },
+        "handlers": {
+            "console": {
+                "class": "logging.StreamHandler",
+                "level": level,
+                "formatter": "json" if settings.log_json else "default",
+                "filters": ["request_id"],
+                "stream": sys.stdout,
+            },
+            "file": {
+                "class": "logging.handlers.RotatingFileHandler",
+                "level": level,
+                "formatter": "detailed",
+                "filename": log_file or "logs/app.log",
+                "maxBytes": 10485760,  # 10MB
+                "backupCount": 5,
+                "filters": ["request_id"],
+            },
+            "error_file": {
+                "class": "logging.handlers.RotatingFileHandler",
+                "level": "ERROR",
+                "formatter": "detailed",
+                "filename": log_file or "logs/error.log",
+                "maxBytes": 10485760,  # 10MB
+                "backupCount": 5,
+                "filters": ["request_id"],
+            }
+        },
+        "loggers": {
+            "": {  # Root logger
+                "level": level,
+                "handlers": ["console", "file", "error_file"],
+                "propagate": False,
+            },
+            "app": {
+                "level": level,
+                "handlers": ["console", "file", "error_file"],
+                "propagate": False,
+            },
+            "uvicorn": {
+                "level": "INFO",
+                "handlers": ["console"],
+                "propagate": False,
+            },
+            "uvicorn.access": {
+                "level": "INFO",
+                "handlers": ["console"],
+                "propagate": False,
+            },
+            "sqlalchemy": {
+                "level": "WARNING",
+                "handlers": ["console", "file"],
+                "propagate": False,
+            },
+        }
+    }
+    
+    stop_logging()
+    logging.config.dictConfig(logging_config)
+    
+    if settings.log_async:
+        _start_queue(settings.log_queue_size, settings.log_queue_overflow)
+    else:
+        _queue_stats = None
+
+
+def _start_queue(maxsize: int, overflow: str) -> None:
+    """Move the configured handlers behind a bounded queue and a listener thread"""
+    global _listener, _queue_stats
+    
+    log_queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stats = LogQueueStats(log_queue)
+    handlers: List[logging.Handler] = []
+    
+    for name in QUEUED_LOGGERS:
+        logger = logging.getLogger(name)
+        targets = tuple(logger.handlers)
+        if not targets:
+            continue
+        for handler in targets:
+            if handler not in handlers:
+                handlers.append(handler)
+        _direct_handlers[name] = targets
+        handler = LogQueueHandler(log_queue, targets, stats, overflow)
+        # The listener thread cannot see the caller's context
+        handler.addFilter(RequestIdFilter())
+        logger.handlers = [handler]
+    
+    _listener = LogQueueListener(log_queue, handlers)
+    _queue_stats = stats
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """
+    Flush queued records, stop the listener thread and write directly again
+    (no-op in sync mode).
+    """
+    global _listener
+    
+    if _listener is not None:
+        listener, _listener = _listener, None
+        listener.stop()
+        for name, targets in _direct_handlers.items():
+            logging.getLogger(name).handlers = list(targets)
+        _direct_handlers.clear()
+
+
+def get_logging_stats() -> Optional[Dict[str, int]]:
+    """Queue counters in async mode, None otherwise"""
+    return _queue_stats.as_dict() if _queue_stats is not None else None
+
+
+atexit.register(stop_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Get a logger instance
+    """
+    return logging.getLogger(name)
+
+
+class RequestLogger:
+    """
+    Context manager for request logging
+    """
+    
+    def __init__(self, logger: logging.Logger, request_id: str, method: str, path: str):
+        self.logger = logger
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.start_time = None
+    
+    def __enter__(self):
+        import time
+        self.start_time = time.time()
+        self.logger.info(
+            f"Request {self.request_id}: {self.method} {self.path} started"
+        )
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        import time
+        duration = time.time() - self.start_time
+        
+        if exc_type:
+            self.logger.error(
+                f"Request {self.request_id}: {self.method} {self.path} failed "
+                f"after {duration:.4f}s - {exc_val}"
+            )
+        else:
+            self.logger.info(
+                f"Request {self.request_id}: {self.method} {self.path} completed "
+                f"in {duration:.4f}s"
+            )
@@ -0,0 +1,120 @@
+"""
+Concurrency scaling benchmark: sync sessions vs. async sessions in async routes
+
+Serves the same lookup (``AuthService.get_user_by_phone``) two ways:
+
+  /sync   - the old pattern: a sync Session used inside an ``async def`` route
+  /async  - AsyncSession + AsyncAuthService
+
+Every statement pays a simulated round trip (``--latency-ms``) inside the
+database driver, like a network hop to MySQL would. With the sync driver that
+wait happens on the event loop; with aiosqlite it happens off the loop.
+
+Usage:
+    python -m benchmarks.async_db_concurrency --requests 400 --concurrency 1 8 32 64
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.models.base import Base
+from app.models.user import User
+from app.services.auth_service import AsyncAuthService, AuthService
+
+PHONE = "+15550000000"
+
+
+def build_app(db_path: str, latency_ms: float) -> FastAPI:
+    """Build a two-route app over a fresh SQLite file"""
+
+    def add_latency(dbapi_connection, connection_record):
+        dbapi_connection.create_function("bench_sleep", 1, lambda ms: time.sleep(ms / 1000.0))
+
+    sync_engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False}, pool_size=64)
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=64
+    )
+    event.listen(sync_engine, "connect", add_latency)
+    event.listen(async_engine.sync_engine, "connect", add_latency)
+
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as connection:
+        connection.execute(User.__table__.insert().values(phone=PHONE, phone_verified=True, is_active=True))
+
+    SyncSessionLocal = sessionmaker(bind=sync_engine, autoflush=False)
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    auth_service = AuthService()
+    async_auth_service = AsyncAuthService(auth_service)
+
+    def get_sync_db():
+        db = SyncSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def sync_lookup(db: Session = Depends(get_sync_db)):
+        db.execute(text("SELECT bench_sleep(:ms)"), {"ms": latency_ms})
+        return {"user_id": auth_service.get_user_by_phone(db, PHONE).user_id}
+
+    @app.get("/async")
+    async def async_lookup(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(text("SELECT bench_sleep(:ms)"), {"ms": latency_ms})
+        user = await async_auth_service.get_user_by_phone(db, PHONE)
+        return {"user_id": user.user_id}
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, total: int, concurrency: int) -> float:
+    """Send ``total`` requests with ``concurrency`` in flight; return requests/second"""
+    transport = httpx.ASGITransport(app=app)
+    remaining = iter(range(total))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in remaining:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        await client.get(path)  # warm the pool
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, "bench.db"), args.latency_ms)
+        print(f"latency per statement: {args.latency_ms}ms, requests per run: {args.requests}")
+        print(f"{'concurrency':>11} {'sync req/s':>12} {'async req/s':>12} {'speedup':>8}")
+        for concurrency in args.concurrency:
+            sync_rps = await drive(app, "/sync", args.requests, concurrency)
+            async_rps = await drive(app, "/async", args.requests, concurrency)
+            print(f"{concurrency:>11} {sync_rps:>12.1f} {async_rps:>12.1f} {async_rps / sync_rps:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    asyncio.run(main(parser.parse_args()))
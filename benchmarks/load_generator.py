@@ -0,0 +1,110 @@
+"""
+Multi-process load generator for the OTP login funnel against a running server
+
+Each process runs ``--concurrency`` virtual users over its own keep-alive
+connection pool and a disjoint slice of the phone population; samples are
+merged into one report (same format, baselines and ``--compare`` as
+benchmarks.login_funnel). OTPs are read back from the stub SMS gateway's
+inbox, so everything runs offline:
+
+    python -m benchmarks.sms_stub_provider --port 8099 --latency-ms 0
+    DATABASE_URL=sqlite:///./loadtest.db SMS_PROVIDER=http SMS_API_URL=http://127.0.0.1:8099 \\
+        RATE_LIMIT_REQUESTS=1000000000 RATE_LIMIT_ROUTES='{}' OTP_PREFIX_RATE=1000000000/3600 LOG_LEVEL=WARNING \\
+        uvicorn app.main:app --port 8000
+    python -m benchmarks.load_generator --url http://127.0.0.1:8000 --processes 4 --concurrency 16 --funnels 2000
+
+The server keeps its per-phone OTP cooldown, so reusing phones (``--phones``
+below ``--funnels``) only works for runs longer than the cooldown. Phones
+start at a random ``--phone-offset`` so repeated runs get new users.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import sys
+import time
+from typing import List, Tuple
+
+import httpx
+
+from benchmarks.login_funnel import (
+    OTP_PATTERN,
+    FunnelSamples,
+    add_common_arguments,
+    check_population,
+    drive,
+    finish,
+    make_phones,
+    summarize,
+)
+
+
+def inbox_reader(client: httpx.AsyncClient, timeout: float):
+    """OTP source polling the stub gateway's ``/inbox``"""
+    async def otp_for(phone: str) -> str:
+        deadline = time.monotonic() + timeout
+        delay = 0.005
+        while True:
+            response = await client.get("/inbox", params={"to": phone})
+            if response.status_code == 200:
+                return OTP_PATTERN.search(response.json()["body"]).group(1)
+            if time.monotonic() >= deadline:
+                raise asyncio.TimeoutError
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.2)
+
+    return otp_for
+
+
+async def run_process(args: argparse.Namespace, phones: List[str], funnels: int) -> FunnelSamples:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.request_timeout) as client, \
+            httpx.AsyncClient(base_url=args.sms_inbox, limits=limits) as inbox:
+        return await drive(client, phones, funnels, args.concurrency, inbox_reader(inbox, args.otp_timeout))
+
+
+def process_main(job: Tuple[argparse.Namespace, List[str], int]) -> FunnelSamples:
+    args, phones, funnels = job
+    samples = asyncio.run(run_process(args, phones, funnels))
+    # defaultdicts with lambdas do not pickle
+    samples.latencies, samples.errors = dict(samples.latencies), dict(samples.errors)
+    return samples
+
+
+def main(args: argparse.Namespace, phones: int) -> dict:
+    population = make_phones(phones, args.phone_offset)
+    jobs = [
+        (args, population[index::args.processes], args.funnels // args.processes + (index < args.funnels % args.processes))
+        for index in range(args.processes)
+    ]
+
+    started = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+        results = pool.map(process_main, jobs)
+    elapsed = time.perf_counter() - started
+
+    samples = FunnelSamples()
+    for result in results:
+        samples.merge(result)
+    config = {
+        "mode": "server",
+        "url": args.url,
+        "funnels": args.funnels,
+        "phones": phones,
+        "processes": args.processes,
+        "concurrency": args.concurrency,
+    }
+    return summarize(samples, elapsed, config)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_common_arguments(parser)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="server under test")
+    parser.add_argument("--sms-inbox", default="http://127.0.0.1:8099", help="stub SMS gateway")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--phone-offset", type=int, default=random.randrange(10 ** 7))
+    args = parser.parse_args()
+    phones = check_population(parser, args, args.processes * args.concurrency)
+    sys.exit(finish(main(args, phones), args))
@@ -0,0 +1,322 @@
+"""
+OTP login funnel benchmark, run in-process over an httpx ASGI transport
+
+Each virtual user walks the funnel
+
+    request-otp -> verify-otp -> complete-profile (new users only) -> logout
+
+reading its OTP from the SMS provider, against a fresh SQLite file with the
+outbox delivering into an in-memory inbox; nothing leaves the process.
+Reports p50/p95/p99 per step plus request and funnel throughput.
+
+A phone population smaller than ``--funnels`` makes later funnels returning
+users. The per-phone OTP cooldown is lifted in-process for that; rate limits
+and the per-prefix OTP limit are lifted through settings. One phone is
+never in two funnels at once.
+
+Baselines:
+    python -m benchmarks.login_funnel --funnels 500 --concurrency 16 --save-baseline baseline.json
+    python -m benchmarks.login_funnel --funnels 500 --concurrency 16 --compare baseline.json --max-regression 0.2
+
+``--compare`` exits non-zero when throughput drops, or a step's p95 grows,
+by more than ``--max-regression``, or when any request fails.
+benchmarks.load_generator drives the same funnel against a running server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import httpx
+
+STEPS = ("request-otp", "verify-otp", "complete-profile", "logout")
+OTP_PATTERN = re.compile(r"\b(\d{6})\b")
+
+OTPSource = Callable[[str], Awaitable[str]]
+
+
+@dataclass
+class FunnelSamples:
+    """Raw per-step latencies (seconds) and error counts"""
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    funnels: int = 0
+
+    def merge(self, other: "FunnelSamples") -> None:
+        for step, values in other.latencies.items():
+            self.latencies[step].extend(values)
+        for step, count in other.errors.items():
+            self.errors[step] += count
+        self.funnels += other.funnels
+
+
+def make_phones(count: int, offset: int = 0) -> List[str]:
+    """Valid Indian mobile numbers, distinct per index"""
+    return [f"+9198{offset + i:08d}" for i in range(count)]
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(q / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def _timed(samples: FunnelSamples, step: str, send: Awaitable[httpx.Response]) -> Optional[dict]:
+    started = time.perf_counter()
+    try:
+        response = await send
+    except httpx.HTTPError:
+        samples.errors[step] += 1
+        return None
+    samples.latencies[step].append(time.perf_counter() - started)
+    if response.status_code != 200:
+        samples.errors[step] += 1
+        return None
+    return response.json()
+
+
+async def run_funnel(client: httpx.AsyncClient, phone: str, otp_source: OTPSource, samples: FunnelSamples) -> bool:
+    """Walk the login funnel once for ``phone``; False if a step failed"""
+    if await _timed(samples, "request-otp", client.post("/api/v1/auth/request-otp", json={"phone": phone})) is None:
+        return False
+    try:
+        otp = await otp_source(phone)
+    except (asyncio.TimeoutError, LookupError):
+        samples.errors["otp-delivery"] += 1
+        return False
+
+    verified = await _timed(samples, "verify-otp", client.post(
+        "/api/v1/auth/verify-otp",
+        json={"phone": phone, "otp": otp, "device_info": "load-test"}
+    ))
+    if verified is None:
+        return False
+
+    token = verified["auth_token"]
+    if verified["is_new_user"]:
+        completed = await _timed(samples, "complete-profile", client.post(
+            "/api/v1/auth/complete-profile",
+            json={"auth_token": token, "full_name": "Load Test", "gender": "other"}
+        ))
+        if completed is None:
+            return False
+        token = completed["auth_token"]
+
+    if await _timed(samples, "logout", client.post("/api/v1/auth/logout", json={"auth_token": token})) is None:
+        return False
+    samples.funnels += 1
+    return True
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    phones: Sequence[str],
+    funnels: int,
+    concurrency: int,
+    otp_source: OTPSource
+) -> FunnelSamples:
+    """Run ``funnels`` funnels with ``concurrency`` virtual users; funnel ``k`` logs in phones[k % len(phones)]"""
+    samples = FunnelSamples()
+    remaining = iter(range(funnels))
+    locks = defaultdict(asyncio.Lock)
+
+    async def virtual_user() -> None:
+        for index in remaining:
+            phone = phones[index % len(phones)]
+            async with locks[phone]:
+                await run_funnel(client, phone, otp_source, samples)
+
+    await asyncio.gather(*(virtual_user() for _ in range(concurrency)))
+    return samples
+
+
+def summarize(samples: FunnelSamples, elapsed: float, config: dict) -> dict:
+    """JSON-ready report: per-step percentiles in milliseconds and throughput"""
+    steps = {}
+    for step in STEPS:
+        values = sorted(samples.latencies.get(step, ()))
+        steps[step] = {
+            "count": len(values),
+            "errors": samples.errors.get(step, 0),
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+        }
+    requests = sum(len(values) for values in samples.latencies.values())
+    return {
+        "config": config,
+        "elapsed_seconds": round(elapsed, 3),
+        "funnels": samples.funnels,
+        "errors": sum(samples.errors.values()),
+        "requests_per_second": round(requests / elapsed, 1) if elapsed else 0.0,
+        "funnels_per_second": round(samples.funnels / elapsed, 1) if elapsed else 0.0,
+        "steps": steps,
+    }
+
+
+def compare_to_baseline(result: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Regressions beyond ``max_regression`` (a fraction); empty when the run passes"""
+    failures = []
+    if result["errors"]:
+        failures.append(f"{result['errors']} failed requests")
+    for metric in ("requests_per_second", "funnels_per_second"):
+        floor = baseline[metric] * (1 - max_regression)
+        if result[metric] < floor:
+            failures.append(f"{metric} {result[metric]} < {floor:.1f} (baseline {baseline[metric]})")
+    for step, stats in result["steps"].items():
+        baseline_p95 = baseline["steps"].get(step, {}).get("p95_ms")
+        if not baseline_p95 or not stats["count"]:
+            continue
+        ceiling = baseline_p95 * (1 + max_regression)
+        if stats["p95_ms"] > ceiling:
+            failures.append(f"{step} p95 {stats['p95_ms']}ms > {ceiling:.1f}ms (baseline {baseline_p95}ms)")
+    return failures
+
+
+def print_report(result: dict) -> None:
+    print(
+        f"{result['funnels']} funnels in {result['elapsed_seconds']}s: "
+        f"{result['funnels_per_second']} funnels/s, {result['requests_per_second']} req/s, "
+        f"{result['errors']} errors"
+    )
+    print(f"{'step':>17} {'count':>7} {'errors':>7} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for step, stats in result["steps"].items():
+        print(
+            f"{step:>17} {stats['count']:>7} {stats['errors']:>7} "
+            f"{stats['p50_ms']:>8.2f}ms {stats['p95_ms']:>8.2f}ms {stats['p99_ms']:>8.2f}ms"
+        )
+
+
+def finish(result: dict, args: argparse.Namespace) -> int:
+    """Print, save and/or compare a result; returns the process exit code"""
+    print_report(result)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"baseline written to {args.save_baseline}")
+    if args.compare:
+        with open(args.compare) as f:
+            failures = compare_to_baseline(result, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        if failures:
+            return 1
+        print(f"no regression beyond {args.max_regression:.0%} of {args.compare}")
+    return 0
+
+
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--funnels", type=int, default=500, help="funnels to run in total")
+    parser.add_argument("--phones", type=int, default=None, help="phone population (default: one per funnel)")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users in flight")
+    parser.add_argument("--otp-timeout", type=float, default=10.0, help="seconds to wait for an OTP SMS")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the result as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="fail on regression against a JSON baseline")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed drop/growth, as a fraction")
+
+
+def check_population(parser: argparse.ArgumentParser, args: argparse.Namespace, workers: int) -> int:
+    phones = args.phones or args.funnels
+    if phones < workers:
+        parser.error(f"--phones ({phones}) must be at least the number of virtual users ({workers})")
+    return phones
+
+
+class InboxSMSProvider:
+    """SMS provider that keeps the last message per phone and wakes waiting funnels"""
+
+    name = "inbox"
+    max_batch_size = 100
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.codes: Dict[str, str] = {}
+        self.waiters: Dict[str, asyncio.Future] = {}
+
+    async def send_batch(self, messages) -> List[bool]:
+        for message in messages:
+            code = OTP_PATTERN.search(message.body).group(1)
+            waiter = self.waiters.pop(message.phone, None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(code)
+            else:
+                self.codes[message.phone] = code
+        return [True] * len(messages)
+
+    async def close(self) -> None:
+        pass
+
+    async def otp_for(self, phone: str) -> str:
+        code = self.codes.pop(phone, None)
+        if code is not None:
+            return code
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters[phone] = waiter
+        try:
+            return await asyncio.wait_for(waiter, self.timeout)
+        finally:
+            self.waiters.pop(phone, None)
+
+
+def configure_environment(db_path: str, log_level: str) -> None:
+    """Point settings at a scratch SQLite file with rate limits off; must run before app imports"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["RATE_LIMIT_REQUESTS"] = str(10 ** 9)
+    os.environ["RATE_LIMIT_ROUTES"] = "{}"
+    os.environ["OTP_PREFIX_RATE"] = f"{10 ** 9}/3600"
+    os.environ["SMS_PROVIDER"] = "mock"
+    os.environ["LOG_LEVEL"] = log_level
+
+
+async def main(args: argparse.Namespace, phones: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(os.path.join(tmp, "funnel.db"), args.log_level)
+
+        from app.api.v1 import auth
+        from app.core.database import async_engine, engine, init_db
+        from app.main import app
+        from app.services.sms_service import get_sms_outbox
+
+        init_db()
+        inbox = InboxSMSProvider(timeout=args.otp_timeout)
+        outbox = get_sms_outbox()
+        outbox.provider = inbox
+        outbox.start()
+        # Returning users re-request an OTP well within the production cooldown
+        auth.otp_service.service.otp_cooldown_minutes = 0
+        auth.otp_service.service.max_otp_attempts = args.funnels
+
+        config = {
+            "mode": "in-process",
+            "funnels": args.funnels,
+            "phones": phones,
+            "concurrency": args.concurrency,
+        }
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            samples = await drive(client, make_phones(phones), args.funnels, args.concurrency, inbox.otp_for)
+            elapsed = time.perf_counter() - started
+
+        await outbox.stop()
+        await async_engine.dispose()
+        engine.dispose()
+        return summarize(samples, elapsed, config)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_common_arguments(parser)
+    parser.add_argument("--log-level", default="WARNING", help="application log level during the run")
+    args = parser.parse_args()
+    phones = check_population(parser, args, args.concurrency)
+    sys.exit(finish(asyncio.run(main(args, phones)), args))
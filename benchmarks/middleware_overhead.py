@@ -0,0 +1,153 @@
+"""
+Middleware overhead benchmark: empty-route requests/second per stack
+
+Stacks compared (CORS is included in every stack, as in app.main):
+
+  none      - CORS only
+  basehttp  - the previous BaseHTTPMiddleware versions of Logging,
+              SecurityHeaders and RateLimit middleware
+  asgi      - the raw ASGI classes stacked separately
+  fused     - RequestPipelineMiddleware (what app.main uses)
+
+Logging goes to a NullHandler so record creation is measured but no I/O.
+
+Usage:
+    python -m benchmarks.middleware_overhead --requests 5000 --concurrency 16
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.responses import Response
+
+from app.core.middleware import (
+    LoggingMiddleware,
+    RateLimitMiddleware,
+    RequestPipelineMiddleware,
+    SecurityHeadersMiddleware
+)
+from app.core.rate_limit import MemoryRateLimitBackend, RateLimit, SlidingWindowRateLimiter
+
+logger = logging.getLogger("benchmarks.middleware")
+
+CALLS = 10 ** 9
+PERIOD = 60
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """Previous BaseHTTPMiddleware implementation of LoggingMiddleware"""
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        request_id = str(uuid.uuid4())
+        request.state.request_id = request_id
+        start_time = time.time()
+        logger.info(
+            f"Request {request_id}: {request.method} {request.url.path} "
+            f"from {request.client.host if request.client else 'unknown'}"
+        )
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        logger.info(f"Response {request_id}: {response.status_code} processed in {process_time:.4f}s")
+        response.headers["X-Request-ID"] = request_id
+        response.headers["X-Process-Time"] = str(process_time)
+        return response
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """Previous BaseHTTPMiddleware implementation of SecurityHeadersMiddleware"""
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """Previous BaseHTTPMiddleware wrapper around the sliding-window limiter"""
+
+    def __init__(self, app, limiter: SlidingWindowRateLimiter):
+        super().__init__(app)
+        self.limiter = limiter
+        self.rate = RateLimit(limit=CALLS, window=PERIOD)
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        client_ip = request.client.host if request.client else "unknown"
+        result = self.limiter.hit(client_ip, self.rate)
+        if not result.allowed:
+            return Response(content="Rate limit exceeded", status_code=429)
+        return await call_next(request)
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+    limiter = SlidingWindowRateLimiter(MemoryRateLimitBackend())
+
+    if stack == "basehttp":
+        app.add_middleware(LegacyLoggingMiddleware)
+        app.add_middleware(LegacySecurityHeadersMiddleware)
+        app.add_middleware(LegacyRateLimitMiddleware, limiter=limiter)
+    elif stack == "asgi":
+        app.add_middleware(LoggingMiddleware)
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(RateLimitMiddleware, calls=CALLS, period=PERIOD, route_limits={}, limiter=limiter)
+    elif stack == "fused":
+        app.add_middleware(RequestPipelineMiddleware, calls=CALLS, period=PERIOD, route_limits={}, limiter=limiter)
+    return app
+
+
+async def drive(app: FastAPI, total: int, concurrency: int) -> float:
+    """Send ``total`` requests with ``concurrency`` in flight; return requests/second"""
+    transport = httpx.ASGITransport(app=app)
+    remaining = iter(range(total))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in remaining:
+                response = await client.get("/ping")
+                assert response.status_code == 200
+
+        await client.get("/ping")
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    logging.getLogger("app.core.middleware").addHandler(logging.NullHandler())
+    logging.getLogger("app.core.middleware").propagate = False
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    logging.getLogger().setLevel(logging.INFO)
+
+    results = {}
+    for stack in ("none", "basehttp", "asgi", "fused"):
+        results[stack] = await drive(build_app(stack), args.requests, args.concurrency)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'stack':>9} {'req/s':>10} {'overhead/req':>14}")
+    for stack, rps in results.items():
+        overhead_us = (1 / rps - 1 / results["none"]) * 1e6
+        print(f"{stack:>9} {rps:>10.1f} {overhead_us:>12.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    asyncio.run(main(parser.parse_args()))
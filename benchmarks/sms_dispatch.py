@@ -0,0 +1,108 @@
+"""
+SMS dispatch benchmark: inline sends vs. the outbox, against the local stub gateway
+
+  inline  - the caller awaits the provider for each message (old request-otp path)
+  outbox  - the caller only enqueues; workers batch and send in the background
+
+Reports caller-side latency per message and end-to-end delivery throughput.
+The stub gateway (benchmarks.sms_stub_provider) runs in-process on a free port.
+
+Usage:
+    python -m benchmarks.sms_dispatch --messages 2000 --latency-ms 50 --workers 4
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import threading
+import time
+
+import uvicorn
+
+from app.core.exceptions import ExternalServiceError
+from app.services.sms_service import JSONBatchSMSProvider, SMSMessage, SMSOutbox
+from benchmarks.sms_stub_provider import build_app
+
+
+def start_stub(latency_ms: float, failure_rate: float) -> str:
+    """Run the stub gateway on a background thread; return its base URL"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(
+        build_app(latency_ms, failure_rate), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def make_messages(count: int):
+    return [SMSMessage(phone=f"+1555{i:07d}", body=f"Your TimelyCabs OTP is: {i % 1000000:06d}") for i in range(count)]
+
+
+async def run_inline(base_url: str, count: int, concurrency: int):
+    provider = JSONBatchSMSProvider(base_url, max_connections=concurrency)
+    provider.max_batch_size = 1
+    messages = iter(make_messages(count))
+    latencies = []
+
+    async def caller():
+        for message in messages:
+            started = time.perf_counter()
+            try:
+                await provider.send_batch([message])
+            except ExternalServiceError:
+                pass  # the old path failed the request instead of retrying
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await provider.close()
+    return latencies, count / elapsed
+
+
+async def run_outbox(base_url: str, count: int, workers: int, batch_size: int):
+    provider = JSONBatchSMSProvider(base_url, max_connections=workers)
+    provider.max_batch_size = batch_size
+    outbox = SMSOutbox(provider, workers=workers, max_size=count)
+    latencies = []
+
+    started = time.perf_counter()
+    for message in make_messages(count):
+        enqueued = time.perf_counter()
+        outbox.enqueue(message)
+        latencies.append(time.perf_counter() - enqueued)
+    await outbox.stop(timeout=600)
+    return latencies, count / (time.perf_counter() - started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    base_url = start_stub(args.latency_ms, args.failure_rate)
+    print(f"{args.messages} messages, gateway latency {args.latency_ms}ms, {args.workers} workers/callers")
+    print(f"{'mode':>16} {'caller p50':>11} {'caller p99':>11} {'msgs/s':>9}")
+
+    runs = [("inline", lambda: run_inline(base_url, args.messages, args.workers))]
+    runs += [
+        (f"outbox batch={size}", lambda size=size: run_outbox(base_url, args.messages, args.workers, size))
+        for size in args.batch_sizes
+    ]
+    for name, run in runs:
+        latencies, throughput = await run()
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        print(f"{name:>16} {p50:>9.3f}ms {p99:>9.3f}ms {throughput:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100])
+    asyncio.run(main(parser.parse_args()))
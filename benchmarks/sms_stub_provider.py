@@ -0,0 +1,72 @@
+"""
+Local SMS gateway stub speaking the JSONBatchSMSProvider protocol
+
+    POST /messages  {"messages": [{"id": ..., "to": ..., "body": ...}]}
+    -> {"results": [{"id": ..., "accepted": true}]}
+
+Every request waits ``--latency-ms`` (per request, not per message, like a
+real batch API) and fails with a 503 with probability ``--failure-rate``.
+The last accepted message per phone is served at ``GET /inbox?to=<phone>``
+so load tests can read OTPs back (benchmarks.load_generator).
+
+Usage:
+    python -m benchmarks.sms_stub_provider --port 8099 --latency-ms 50
+    SMS_PROVIDER=http SMS_API_URL=http://127.0.0.1:8099 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import random
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def build_app(latency_ms: float = 50.0, failure_rate: float = 0.0) -> Starlette:
+    stats = {"requests": 0, "messages": 0, "failures": 0}
+    inbox = {}
+
+    async def messages(request: Request) -> JSONResponse:
+        payload = await request.json()
+        stats["requests"] += 1
+        await asyncio.sleep(latency_ms / 1000.0)
+
+        if random.random() < failure_rate:
+            stats["failures"] += 1
+            return JSONResponse({"error": "unavailable"}, status_code=503)
+
+        stats["messages"] += len(payload["messages"])
+        for message in payload["messages"]:
+            inbox[message["to"]] = message["body"]
+        return JSONResponse({
+            "results": [{"id": message["id"], "accepted": True} for message in payload["messages"]]
+        })
+
+    async def get_stats(request: Request) -> JSONResponse:
+        return JSONResponse(stats)
+
+    async def get_inbox(request: Request) -> JSONResponse:
+        body = inbox.pop(request.query_params.get("to", ""), None)
+        if body is None:
+            return JSONResponse({"error": "no message"}, status_code=404)
+        return JSONResponse({"body": body})
+
+    app = Starlette(routes=[
+        Route("/messages", messages, methods=["POST"]),
+        Route("/stats", get_stats),
+        Route("/inbox", get_inbox),
+    ])
+    app.state.stats = stats
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(build_app(args.latency_ms, args.failure_rate), host=args.host, port=args.port, log_level="warning")
@@ -1,14 +1,14 @@
-"""
-Simple entry point to run the FastAPI application
-"""
-import uvicorn
-from app.main import app
-
-if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+"""
+Simple entry point to run the FastAPI application
+"""
+import uvicorn
+from app.main import app
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        log_level="info"
+    )
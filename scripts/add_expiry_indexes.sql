@@ -0,0 +1,7 @@
+-- Indexes on expires_at for the retention sweeper and archiver
+-- init_db() creates missing tables but never adds indexes to existing ones,
+-- and leaves the schema version unstamped until every model index exists:
+-- run this on databases created before these indexes were added.
+
+CREATE INDEX ix_otp_logs_expires_at ON otp_logs (expires_at);
+CREATE INDEX ix_sessions_expires_at ON sessions (expires_at);
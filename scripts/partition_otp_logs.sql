@@ -0,0 +1,19 @@
+-- Partition otp_logs by day of expires_at (MySQL)
+-- Lets the retention sweeper drop whole expired days instead of deleting
+-- them row by row; enable with RETENTION_MYSQL_PARTITIONS=true. The sweeper
+-- splits new day partitions off pmax ahead of time.
+--
+-- MySQL requires the partitioning column in every unique key, so the
+-- primary key becomes (otp_id, expires_at); otp_id stays AUTO_INCREMENT.
+-- TO_DAYS() partitioning needs a DATETIME column (as created by the models).
+-- Rebuilds the table: run it in a maintenance window.
+
+ALTER TABLE otp_logs
+    MODIFY expires_at DATETIME NOT NULL,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (otp_id, expires_at);
+
+ALTER TABLE otp_logs
+    PARTITION BY RANGE (TO_DAYS(expires_at)) (
+        PARTITION pmax VALUES LESS THAN MAXVALUE
+    );
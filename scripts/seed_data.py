@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Synthetic data seeder for users, user_roles, sessions and otp_logs
+
+Bulk-loads realistic volumes for index and query testing. Rows are produced
+as generated streams of tuples and written with driver-level executemany
+(PyMySQL rewrites it into multi-row INSERTs) or, on MySQL, with
+``LOAD DATA LOCAL INFILE`` from generated chunk files. The ORM is not used.
+
+Distributions:
+  users     - weighted mobile prefixes (mostly Indian series), signups skewed
+              towards recent days, ~85% completed profiles
+  user_roles- every user is a rider; a share are also drivers, owners, staff
+  sessions  - ages roughly exponential; refresh-length expiry, ~10% short
+              temp sessions, so old sessions are expired and recent ones live
+  otp_logs  - mostly for seeded users plus abandoned signups; a small share
+              is still live (created within the OTP expiry window)
+
+Primary keys continue from the current maximum, so runs can be repeated.
+
+Usage:
+    python scripts/seed_data.py --users 2000000 --sessions 3000000 --otp-logs 3000000
+    python scripts/seed_data.py --database-url mysql+pymysql://... --method load-data
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.engine import Connection, Engine  # noqa: E402
+
+from app.core.config import get_settings  # noqa: E402
+from app.models import Base  # noqa: E402
+from app.services.role_registry import DEFAULT_ROLES  # noqa: E402
+
+settings = get_settings()
+
+# (prefix, national digits after the prefix, weight)
+PHONE_PREFIXES = (
+    ("+919", 9, 0.42),
+    ("+918", 9, 0.22),
+    ("+917", 9, 0.18),
+    ("+916", 9, 0.08),
+    ("+9715", 8, 0.05),
+    ("+447", 9, 0.03),
+    ("+1", 10, 0.02),
+)
+# Extra roles on top of rider, as shares of users
+EXTRA_ROLE_SHARES = (("driver", 0.08), ("owner", 0.005), ("support", 0.0005), ("admin", 0.0001))
+FIRST_NAMES = ("Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Isha", "Rohan", "Priya", "Kabir", "Meera", "Arjun", "Sara")
+LAST_NAMES = ("Sharma", "Patel", "Reddy", "Iyer", "Khan", "Singh", "Gupta", "Das", "Nair", "Joshi", "Mehta", "Rao")
+GENDERS = (("male", 0.52), ("female", 0.45), ("other", 0.03))
+DEVICES = ("Android 14", "Android 13", "Android 12", "iOS 17", "iOS 16", "Web", None)
+
+USER_COLUMNS = ("user_id", "phone", "full_name", "gender", "phone_verified", "is_active", "created_at", "updated_at")
+USER_ROLE_COLUMNS = ("user_id", "role_id", "created_at", "updated_at")
+SESSION_COLUMNS = ("session_id", "user_id", "auth_token", "device_info", "expires_at", "created_at", "updated_at")
+OTP_COLUMNS = ("phone", "otp_code", "is_verified", "expires_at", "created_at", "updated_at")
+
+Row = Tuple
+
+
+def weighted_picker(rng: random.Random, choices: Sequence[Tuple[Any, float]]) -> Callable[[], Any]:
+    """Fast weighted choice over (value, weight) pairs"""
+    values = [value for value, _ in choices]
+    cumulative, total = [], 0.0
+    for _, weight in choices:
+        total += weight
+        cumulative.append(total)
+    return lambda: rng.choices(values, cum_weights=cumulative)[0]
+
+
+# 1000 slots filled by weight, so a number maps to its prefix without any state
+PREFIX_SLOTS = [
+    (prefix, digits)
+    for prefix, digits, weight in PHONE_PREFIXES
+    for _ in range(round(weight * 1000))
+]
+
+
+def phone_for(number: int) -> str:
+    """
+    Deterministic phone for a user id (or any number)
+
+    The prefix is picked by a multiplicative hash, so OTP logs can recreate a
+    seeded user's phone; numbers below 10**8 never collide.
+    """
+    prefix, digits = PREFIX_SLOTS[(number * 2654435761) % 2 ** 32 % len(PREFIX_SLOTS)]
+    return f"{prefix}{number % 10 ** digits:0{digits}d}"
+
+
+def generate_users(rng: random.Random, first_id: int, count: int, now: datetime, days: int) -> Iterator[Row]:
+    pick_gender = weighted_picker(rng, GENDERS)
+    span = days * 86400
+    for user_id in range(first_id, first_id + count):
+        # Squared uniform: signups skew towards recent days
+        created_at = now - timedelta(seconds=span * rng.random() ** 2)
+        completed = rng.random() < 0.85
+        yield (
+            user_id,
+            phone_for(user_id),
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" if completed else None,
+            pick_gender() if completed else None,
+            rng.random() < 0.95,
+            rng.random() < 0.98,
+            created_at,
+            created_at + timedelta(seconds=rng.random() * (now - created_at).total_seconds()) if completed else created_at,
+        )
+
+
+def generate_user_roles(rng: random.Random, users: Iterable[Row], role_ids: dict) -> Iterator[Row]:
+    extra = [(role_ids[name], share) for name, share in EXTRA_ROLE_SHARES if name in role_ids]
+    rider = role_ids["rider"]
+    for user in users:
+        user_id, created_at = user[0], user[6]
+        yield (user_id, rider, created_at, created_at)
+        for role_id, share in extra:
+            if rng.random() < share:
+                yield (user_id, role_id, created_at, created_at)
+
+
+def generate_sessions(
+    rng: random.Random,
+    first_id: int,
+    count: int,
+    user_ids: Tuple[int, int],
+    now: datetime,
+    days: int
+) -> Iterator[Row]:
+    refresh = timedelta(days=settings.refresh_token_expire_days)
+    temp = timedelta(minutes=10)
+    max_age = days * 86400
+    for session_id in range(first_id, first_id + count):
+        created_at = now - timedelta(seconds=min(rng.expovariate(1 / (10 * 86400)), max_age))
+        expires_at = created_at + (temp if rng.random() < 0.1 else refresh)
+        yield (
+            session_id,
+            rng.randint(*user_ids),
+            # Sequence prefix keeps tokens unique across seeded runs
+            f"{session_id:012x}{rng.getrandbits(160):040x}",
+            rng.choice(DEVICES),
+            expires_at,
+            created_at,
+            created_at,
+        )
+
+
+def generate_otp_logs(
+    rng: random.Random,
+    count: int,
+    user_ids: Tuple[int, int],
+    now: datetime,
+    days: int,
+    live_ratio: float
+) -> Iterator[Row]:
+    expiry = timedelta(minutes=settings.otp_expire_minutes)
+    max_age = days * 86400
+    for _ in range(count):
+        if rng.random() < 0.9:
+            # Existing user: phone_for recreates their phone
+            number = rng.randint(*user_ids)
+        else:
+            # Abandoned signup: a number outside the seeded user range
+            number = user_ids[1] + 1 + rng.randrange(10 ** 7)
+
+        live = rng.random() < live_ratio
+        if live:
+            created_at = now - timedelta(seconds=rng.random() * expiry.total_seconds())
+        else:
+            created_at = now - expiry - timedelta(seconds=min(rng.expovariate(1 / (3 * 86400)), max_age))
+        verified = not live and rng.random() < 0.8
+        yield (
+            phone_for(number),
+            f"{rng.randrange(10 ** 6):06d}",
+            verified,
+            created_at + expiry,
+            created_at,
+            created_at + timedelta(seconds=rng.random() * 60) if verified else created_at,
+        )
+
+
+def batched(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_rows(engine: Engine, table: str, columns: Sequence[str], rows: Iterable[Row], batch_size: int) -> int:
+    """Driver-level executemany, one transaction per batch"""
+    placeholder = "?" if engine.dialect.paramstyle == "qmark" else "%s"
+    statement = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})"
+    written = 0
+    with engine.connect() as connection:
+        prepare_connection(connection)
+        for batch in batched(rows, batch_size):
+            connection.exec_driver_sql(statement, batch)
+            connection.commit()
+            written += len(batch)
+    return written
+
+
+def _csv_value(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def load_data(engine: Engine, table: str, columns: Sequence[str], rows: Iterable[Row], chunk_size: int) -> int:
+    """MySQL ``LOAD DATA LOCAL INFILE`` from generated chunk files"""
+    written = 0
+    with engine.connect() as connection, tempfile.TemporaryDirectory() as tmp:
+        prepare_connection(connection)
+        path = os.path.join(tmp, f"{table}.csv")
+        for chunk in batched(rows, chunk_size):
+            with open(path, "w", newline="") as f:
+                csv.writer(f, lineterminator="\n").writerows([_csv_value(value) for value in row] for row in chunk)
+            connection.exec_driver_sql(
+                f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {table} "
+                f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                f"LINES TERMINATED BY '\\n' ({', '.join(columns)})"
+            )
+            connection.commit()
+            written += len(chunk)
+    return written
+
+
+def prepare_connection(connection: Connection) -> None:
+    """Skip per-row FK and unique checks on MySQL; generated keys are consistent by construction"""
+    if connection.dialect.name == "mysql":
+        connection.exec_driver_sql("SET foreign_key_checks = 0, unique_checks = 0")
+
+
+def max_id(engine: Engine, table: str, column: str) -> int:
+    with engine.connect() as connection:
+        return connection.execute(text(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")).scalar()
+
+
+def ensure_roles(engine: Engine) -> dict:
+    """role_name -> role_id, inserting the default roles if missing"""
+    with engine.begin() as connection:
+        role_ids = dict(connection.execute(text("SELECT role_name, role_id FROM roles")).all())
+        for role in DEFAULT_ROLES:
+            if role["role_name"] not in role_ids:
+                connection.execute(
+                    text("INSERT INTO roles (role_name, description) VALUES (:role_name, :description)"),
+                    role
+                )
+        return dict(connection.execute(text("SELECT role_name, role_id FROM roles")).all())
+
+
+def seed(
+    engine: Engine,
+    users: int,
+    sessions: int,
+    otp_logs: int,
+    days: int = 365,
+    live_otp_ratio: float = 0.02,
+    batch_size: int = 10000,
+    method: str = "insert",
+    seed_value: int = None
+) -> dict:
+    """Seed all four tables; returns table -> rows written"""
+    if method == "load-data" and engine.dialect.name != "mysql":
+        raise ValueError("--method load-data needs a MySQL database")
+    write = load_data if method == "load-data" else insert_rows
+    size = batch_size * 50 if method == "load-data" else batch_size
+
+    Base.metadata.create_all(bind=engine)
+    role_ids = ensure_roles(engine)
+    # A fixed seed also lets user_roles regenerate the user stream below
+    seed_value = random.randrange(2 ** 63) if seed_value is None else seed_value
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    first_user = max_id(engine, "users", "user_id") + 1
+    first_session = max_id(engine, "sessions", "session_id") + 1
+    user_range = (first_user, first_user + users - 1)
+
+    def timed(table: str, columns: Sequence[str], rows: Iterable[Row]) -> int:
+        started = time.perf_counter()
+        written = write(engine, table, columns, rows, size)
+        elapsed = time.perf_counter() - started
+        print(f"{table:>10}: {written:>10} rows in {elapsed:7.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+        return written
+
+    counts = {}
+    counts["users"] = timed("users", USER_COLUMNS, generate_users(rng, first_user, users, now, days))
+    if not users:
+        return counts
+    # Regenerate the user stream rather than holding millions of rows
+    role_rng = random.Random(seed_value)
+    counts["user_roles"] = timed(
+        "user_roles",
+        USER_ROLE_COLUMNS,
+        generate_user_roles(rng, generate_users(role_rng, first_user, users, now, days), role_ids)
+    )
+    counts["sessions"] = timed(
+        "sessions",
+        SESSION_COLUMNS,
+        generate_sessions(rng, first_session, sessions, user_range, now, days)
+    )
+    counts["otp_logs"] = timed(
+        "otp_logs",
+        OTP_COLUMNS,
+        generate_otp_logs(rng, otp_logs, user_range, now, days, live_otp_ratio)
+    )
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--users", type=int, default=2000000)
+    parser.add_argument("--sessions", type=int, default=3000000)
+    parser.add_argument("--otp-logs", type=int, default=3000000)
+    parser.add_argument("--days", type=int, default=365, help="history spanned by the generated rows")
+    parser.add_argument("--live-otp-ratio", type=float, default=0.02, help="share of OTPs still within expiry")
+    parser.add_argument("--batch-size", type=int, default=10000, help="rows per executemany (x50 per LOAD DATA file)")
+    parser.add_argument("--method", choices=("insert", "load-data"), default="insert")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible data")
+    args = parser.parse_args()
+
+    connect_args = {"local_infile": True} if args.method == "load-data" else {}
+    engine = create_engine(args.database_url, connect_args=connect_args)
+    started = time.perf_counter()
+    counts = seed(
+        engine,
+        args.users,
+        args.sessions,
+        args.otp_logs,
+        days=args.days,
+        live_otp_ratio=args.live_otp_ratio,
+        batch_size=args.batch_size,
+        method=args.method,
+        seed_value=args.seed
+    )
+    total = sum(counts.values())
+    elapsed = time.perf_counter() - started
+    print(f"{'total':>10}: {total:>10} rows in {elapsed:7.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-"""
-Tests package
-"""
+"""
+Tests package
+"""
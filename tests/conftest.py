@@ -1,85 +1,166 @@
-"""
-Test configuration and fixtures
-"""
-import pytest
-import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from fastapi.testclient import TestClient
-
-from app.main import app
-from app.core.database import get_db, Base
-from app.core.config import TestingSettings
-
-# Set test environment
-os.environ["ENVIRONMENT"] = "testing"
-
-# Test database URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-
-# Create test engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
-
-# Create test session
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-@pytest.fixture(scope="session")
-def test_db():
-    """Create test database"""
-    Base.metadata.create_all(bind=engine)
-    yield
-    Base.metadata.drop_all(bind=engine)
-
-
-@pytest.fixture
-def db_session(test_db):
-    """Create database session for testing"""
-    connection = engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
-    
-    yield session
-    
-    session.close()
-    transaction.rollback()
-    connection.close()
-
-
-@pytest.fixture
-def client(db_session):
-    """Create test client"""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-    
-    app.dependency_overrides[get_db] = override_get_db
-    
-    with TestClient(app) as test_client:
-        yield test_client
-    
-    app.dependency_overrides.clear()
-
-
-@pytest.fixture
-def test_user_data():
-    """Test user data"""
-    return {
-        "phone": "+1234567890",
-        "full_name": "Test User",
-        "gender": "male"
-    }
-
-
-@pytest.fixture
-def test_otp_data():
-    """Test OTP data"""
-    return {
-        "phone": "+1234567890",
-        "otp": "123456"
-    }
+"""
+Test configuration and fixtures
+"""
+import pytest
+import pytest_asyncio
+import os
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.database import get_db, get_async_db, Base
+from app.core.rate_limit import MemoryRateLimitBackend, get_rate_limiter
+from app.core.config import TestingSettings
+from app.services.otp_throttle import MemoryThrottleCounters, get_otp_throttle
+from app.services.role_registry import get_role_registry
+
+# Set test environment
+os.environ["ENVIRONMENT"] = "testing"
+
+# Test database URL
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+# Create test engine
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, 
+    connect_args={"check_same_thread": False}
+)
+
+# Create test session
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine on the same file; NullPool because every TestClient runs its own event loop
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test.db",
+    poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture(autouse=True)
+def fresh_otp_throttle():
+    """OTP cooldowns and lockouts are process-wide; every test starts without any"""
+    get_otp_throttle().counters = MemoryThrottleCounters()
+
+
+@pytest.fixture(autouse=True)
+def fresh_role_catalog():
+    """Roles created inside a rolled-back test transaction must not stay cached"""
+    get_role_registry().invalidate()
+
+
+@pytest.fixture(scope="session")
+def test_db():
+    """Create test database"""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db_session(test_db):
+    """Create database session for testing"""
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = TestingSessionLocal(bind=connection)
+    
+    yield session
+    
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest_asyncio.fixture
+async def async_db_session(test_db):
+    """Create async database session for testing"""
+    async with TestingAsyncSessionLocal() as session:
+        yield session
+    
+    async with async_engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            await connection.execute(table.delete())
+
+
+@pytest.fixture
+def client(db_session):
+    """Create test client"""
+    def override_get_db():
+        try:
+            yield db_session
+        finally:
+            pass
+    
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+    
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    
+    # Every test starts with fresh rate limit counters
+    get_rate_limiter().backend = MemoryRateLimitBackend()
+    
+    with TestClient(app) as test_client:
+        yield test_client
+    
+    app.dependency_overrides.clear()
+    
+    # Async requests commit on their own connections; clear what they wrote
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Fail if the block issues more than ``limit`` SQL statements:
+
+        with assert_max_queries(6):
+            client.post(...)
+
+    Statements are counted on every engine and thread (TestClient requests run
+    on their own thread), so fixture queries should stay outside the block.
+    """
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, "after_cursor_execute", count)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "after_cursor_execute", count)
+        assert len(statements) <= limit, (
+            f"{len(statements)} queries issued, expected at most {limit}:\n" + "\n".join(statements)
+        )
+
+    return _assert_max_queries
+
+
+@pytest.fixture
+def test_user_data():
+    """Test user data"""
+    return {
+        "phone": "+1234567890",
+        "full_name": "Test User",
+        "gender": "male"
+    }
+
+
+@pytest.fixture
+def test_otp_data():
+    """Test OTP data"""
+    return {
+        "phone": "+1234567890",
+        "otp": "123456"
+    }
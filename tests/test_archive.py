@@ -0,0 +1,139 @@
+"""
+Archival tests, on a SQLite file and archive directory of their own
+"""
+import gzip
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import Sequence
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.core.exceptions import DatabaseError
+from app.models.auth import OTPLog, Session as UserSession
+from app.models.user import User
+from app.services.archive import ArchiveReader, Archiver
+from app.services.retention import RetentionSweeper, RetentionTarget
+
+OTP_LOGS = OTPLog.__table__
+SESSIONS = UserSession.__table__
+TODAY = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+
+
+@pytest.fixture
+def archive_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/archive.db")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def add_otp_logs(engine, phone: str, days_ago: Sequence[int]):
+    rows = [
+        {"phone": phone, "otp_code": "123456", "expires_at": TODAY - timedelta(days=days, hours=-1)}
+        for days in days_ago
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(OTP_LOGS), rows)
+
+
+def count(engine, table) -> int:
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(table)).scalar()
+
+
+class TestArchiver:
+    """Test streaming rows out, verifying and purging"""
+
+    def test_archive_and_scan(self, archive_engine, tmp_path):
+        add_otp_logs(archive_engine, "+919810000001", [3, 3, 2])
+        add_otp_logs(archive_engine, "+919810000002", [2, 0])
+        archiver = Archiver(archive_engine, tmp_path / "archive", batch_size=2, pause=0)
+
+        assert archiver.archive(OTP_LOGS, "expires_at", TODAY) == 4
+        assert count(archive_engine, OTP_LOGS) == 1
+
+        reader = ArchiveReader(tmp_path / "archive")
+        days = [day for day, _ in reader.files("otp_logs")]
+        assert days == [(TODAY - timedelta(days=3)).date(), (TODAY - timedelta(days=2)).date()]
+
+        rows = list(reader.scan("+919810000001"))
+        assert [row.day for row in rows] == [days[0], days[0], days[1]]
+        assert {row.data["phone"] for row in rows} == {"+919810000001"}
+        assert all("otp_code" not in row.data for row in rows)
+        assert len(list(reader.scan("+919810000002", since=days[1]))) == 1
+        assert list(reader.scan("+919810000001", since=days[1], until=days[1]))[0].table == "otp_logs"
+
+        # Nothing left before the cutoff: no new files
+        assert archiver.archive(OTP_LOGS, "expires_at", TODAY) == 0
+        assert len(list(reader.files("otp_logs"))) == 2
+
+    def test_run_is_bounded_to_max_days(self, archive_engine, tmp_path):
+        add_otp_logs(archive_engine, "+919810000001", [3, 3, 2, 1])
+        archiver = Archiver(archive_engine, tmp_path / "archive", pause=0, max_days=1)
+
+        assert archiver.archive(OTP_LOGS, "expires_at", TODAY) == 2
+        assert archiver.archive(OTP_LOGS, "expires_at", TODAY) == 1
+        assert count(archive_engine, OTP_LOGS) == 1
+
+    def test_files_are_fsynced_before_purge(self, archive_engine, tmp_path, monkeypatch):
+        add_otp_logs(archive_engine, "+919810000001", [2, 1])
+        archiver = Archiver(archive_engine, tmp_path / "archive", pause=0)
+        events = []
+        fsync, purge = os.fsync, Archiver._purge
+        monkeypatch.setattr(os, "fsync", lambda fd: events.append("fsync") or fsync(fd))
+        monkeypatch.setattr(Archiver, "_purge", lambda self, *args: events.append("purge") or purge(self, *args))
+
+        archiver.archive(OTP_LOGS, "expires_at", TODAY)
+
+        # Two files, then their day directories and the table directory
+        assert events == ["fsync"] * 5 + ["purge"]
+
+    def test_sessions_carry_phone_and_token_digest(self, archive_engine, tmp_path):
+        with Session(archive_engine) as db:
+            user = User(phone="+919810000001")
+            db.add(user)
+            db.flush()
+            db.add(UserSession(user_id=user.user_id, auth_token="secret", expires_at=TODAY - timedelta(days=1)))
+            db.commit()
+
+        Archiver(archive_engine, tmp_path / "archive", pause=0).archive(SESSIONS, "expires_at", TODAY)
+
+        [row] = ArchiveReader(tmp_path / "archive").scan("+919810000001", tables=["sessions"])
+        assert row.data["auth_token"] == hashlib.sha256(b"secret").hexdigest()
+        assert count(archive_engine, SESSIONS) == 0
+
+    def test_mismatch_keeps_rows(self, archive_engine, tmp_path, monkeypatch):
+        add_otp_logs(archive_engine, "+919810000001", [2, 1])
+        archiver = Archiver(archive_engine, tmp_path / "archive", pause=0)
+        monkeypatch.setattr(Archiver, "_count_lines", staticmethod(lambda path: 0))
+
+        with pytest.raises(DatabaseError):
+            archiver.archive(OTP_LOGS, "expires_at", TODAY)
+
+        assert count(archive_engine, OTP_LOGS) == 2
+        assert list(ArchiveReader(tmp_path / "archive").files("otp_logs")) == []
+        assert not list((tmp_path / "archive").rglob("*.tmp"))
+
+    def test_files_are_gzipped_ndjson(self, archive_engine, tmp_path):
+        add_otp_logs(archive_engine, "+919810000001", [1])
+        Archiver(archive_engine, tmp_path / "archive", pause=0).archive(OTP_LOGS, "expires_at", TODAY)
+
+        [(_, path)] = ArchiveReader(tmp_path / "archive").files("otp_logs")
+        with gzip.open(path, "rt") as archive:
+            assert archive.read().count("\n") == 1
+
+    @pytest.mark.asyncio
+    async def test_sweeper_archives_whole_days(self, archive_engine, tmp_path):
+        add_otp_logs(archive_engine, "+919810000001", [1, 0])
+        sweeper = RetentionSweeper(
+            archive_engine,
+            [RetentionTarget(OTP_LOGS, archive=True)],
+            archiver=Archiver(archive_engine, tmp_path / "archive", pause=0)
+        )
+
+        assert (await sweeper.sweep())["otp_logs"].deleted == 1
+        assert count(archive_engine, OTP_LOGS) == 1
@@ -1,237 +1,315 @@
-"""
-Authentication tests
-"""
-import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
-
-from app.models.user import User
-from app.models.auth import OTPLog
-from app.services.auth_service import AuthService
-from app.services.otp_service import OTPService
-
-
-class TestAuthAPI:
-    """Test authentication API endpoints"""
-    
-    def test_request_otp_success(self, client: TestClient, db_session: Session):
-        """Test successful OTP request"""
-        response = client.post(
-            "/api/v1/auth/request-otp",
-            json={"phone": "+1234567890"}
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["success"] is True
-        assert data["message"] == "OTP sent successfully"
-        assert "otp_id" in data
-    
-    def test_request_otp_invalid_phone(self, client: TestClient):
-        """Test OTP request with invalid phone"""
-        response = client.post(
-            "/api/v1/auth/request-otp",
-            json={"phone": "invalid_phone"}
-        )
-        
-        assert response.status_code == 422  # Validation error
-    
-    def test_verify_otp_success(self, client: TestClient, db_session: Session):
-        """Test successful OTP verification"""
-        # First request OTP
-        otp_response = client.post(
-            "/api/v1/auth/request-otp",
-            json={"phone": "+1234567890"}
-        )
-        assert otp_response.status_code == 200
-        
-        # Get OTP from database (in real scenario, this would come from SMS)
-        otp_log = db_session.query(OTPLog).filter(
-            OTPLog.phone == "+1234567890"
-        ).first()
-        
-        # Verify OTP
-        response = client.post(
-            "/api/v1/auth/verify-otp",
-            json={
-                "phone": "+1234567890",
-                "otp": otp_log.otp_code,
-                "device_info": "test_device"
-            }
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["success"] is True
-        assert data["is_new_user"] is True
-        assert "auth_token" in data
-    
-    def test_verify_otp_invalid(self, client: TestClient):
-        """Test OTP verification with invalid OTP"""
-        response = client.post(
-            "/api/v1/auth/verify-otp",
-            json={
-                "phone": "+1234567890",
-                "otp": "000000",
-                "device_info": "test_device"
-            }
-        )
-        
-        assert response.status_code == 400
-        data = response.json()
-        assert data["detail"] == "Invalid or expired OTP"
-    
-    def test_complete_profile_success(self, client: TestClient, db_session: Session):
-        """Test successful profile completion"""
-        # First get auth token
-        otp_response = client.post(
-            "/api/v1/auth/request-otp",
-            json={"phone": "+1234567890"}
-        )
-        
-        otp_log = db_session.query(OTPLog).filter(
-            OTPLog.phone == "+1234567890"
-        ).first()
-        
-        verify_response = client.post(
-            "/api/v1/auth/verify-otp",
-            json={
-                "phone": "+1234567890",
-                "otp": otp_log.otp_code,
-                "device_info": "test_device"
-            }
-        )
-        
-        auth_token = verify_response.json()["auth_token"]
-        
-        # Complete profile
-        response = client.post(
-            "/api/v1/auth/complete-profile",
-            json={
-                "auth_token": auth_token,
-                "full_name": "Test User",
-                "gender": "male"
-            }
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["success"] is True
-        assert data["user"]["full_name"] == "Test User"
-        assert data["user"]["gender"] == "male"
-    
-    def test_logout_success(self, client: TestClient, db_session: Session):
-        """Test successful logout"""
-        # First get auth token
-        otp_response = client.post(
-            "/api/v1/auth/request-otp",
-            json={"phone": "+1234567890"}
-        )
-        
-        otp_log = db_session.query(OTPLog).filter(
-            OTPLog.phone == "+1234567890"
-        ).first()
-        
-        verify_response = client.post(
-            "/api/v1/auth/verify-otp",
-            json={
-                "phone": "+1234567890",
-                "otp": otp_log.otp_code,
-                "device_info": "test_device"
-            }
-        )
-        
-        auth_token = verify_response.json()["auth_token"]
-        
-        # Logout
-        response = client.post(
-            "/api/v1/auth/logout",
-            json={"auth_token": auth_token}
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["success"] is True
-
-
-class TestAuthService:
-    """Test authentication service"""
-    
-    def test_create_user(self, db_session: Session):
-        """Test user creation"""
-        auth_service = AuthService()
-        user = auth_service.create_user(db_session, "+1234567890")
-        
-        assert user.phone == "+1234567890"
-        assert user.phone_verified is True
-        assert user.is_active is True
-    
-    def test_get_user_by_phone(self, db_session: Session):
-        """Test getting user by phone"""
-        auth_service = AuthService()
-        
-        # Create user
-        user = auth_service.create_user(db_session, "+1234567890")
-        
-        # Get user
-        found_user = auth_service.get_user_by_phone(db_session, "+1234567890")
-        
-        assert found_user is not None
-        assert found_user.user_id == user.user_id
-    
-    def test_create_session(self, db_session: Session):
-        """Test session creation"""
-        auth_service = AuthService()
-        
-        # Create user
-        user = auth_service.create_user(db_session, "+1234567890")
-        
-        # Create session
-        session = auth_service.create_session(
-            db_session, 
-            user.user_id, 
-            "test_device"
-        )
-        
-        assert session.user_id == user.user_id
-        assert session.device_info == "test_device"
-        assert session.auth_token is not None
-
-
-class TestOTPService:
-    """Test OTP service"""
-    
-    def test_create_otp_log(self, db_session: Session):
-        """Test OTP log creation"""
-        otp_service = OTPService()
-        otp_log, otp_code = otp_service.create_otp_log(db_session, "+1234567890")
-        
-        assert otp_log.phone == "+1234567890"
-        assert otp_log.otp_code == otp_code
-        assert otp_log.is_verified is False
-        assert len(otp_code) == 6
-    
-    def test_verify_otp_success(self, db_session: Session):
-        """Test successful OTP verification"""
-        otp_service = OTPService()
-        
-        # Create OTP
-        otp_log, otp_code = otp_service.create_otp_log(db_session, "+1234567890")
-        
-        # Verify OTP
-        verified_otp = otp_service.verify_otp(db_session, "+1234567890", otp_code)
-        
-        assert verified_otp is not None
-        assert verified_otp.is_verified is True
-    
-    def test_verify_otp_invalid(self, db_session: Session):
-        """Test invalid OTP verification"""
-        otp_service = OTPService()
-        
-        # Create OTP
-        otp_service.create_otp_log(db_session, "+1234567890")
-        
-        # Try to verify with wrong OTP
-        verified_otp = otp_service.verify_otp(db_session, "+1234567890", "000000")
-        
-        assert verified_otp is None
+"""
+Authentication tests
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import async_unit_of_work, get_async_database_url, unit_of_work
+
+from app.models.user import User
+from app.models.auth import OTPLog
+from app.services.auth_service import AsyncAuthService, AuthService
+from app.services.otp_service import AsyncOTPService, OTPService
+
+
+class TestAuthAPI:
+    """Test authentication API endpoints"""
+    
+    def test_request_otp_success(self, client: TestClient, db_session: Session):
+        """Test successful OTP request"""
+        response = client.post(
+            "/api/v1/auth/request-otp",
+            json={"phone": "+1234567890"}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] is True
+        assert data["message"] == "OTP sent successfully"
+        assert "otp_id" in data
+    
+    def test_request_otp_invalid_phone(self, client: TestClient):
+        """Test OTP request with invalid phone"""
+        response = client.post(
+            "/api/v1/auth/request-otp",
+            json={"phone": "invalid_phone"}
+        )
+        
+        assert response.status_code == 422  # Validation error
+    
+    def test_verify_otp_success(self, client: TestClient, db_session: Session, assert_max_queries):
+        """Test successful OTP verification"""
+        # First request OTP
+        otp_response = client.post(
+            "/api/v1/auth/request-otp",
+            json={"phone": "+1234567890"}
+        )
+        assert otp_response.status_code == 200
+        
+        # Get OTP from database (in real scenario, this would come from SMS)
+        otp_log = db_session.query(OTPLog).filter(
+            OTPLog.phone == "+1234567890"
+        ).first()
+        
+        # Verify OTP (first login also creates the default roles)
+        with assert_max_queries(19):
+            response = client.post(
+                "/api/v1/auth/verify-otp",
+                json={
+                    "phone": "+1234567890",
+                    "otp": otp_log.otp_code,
+                    "device_info": "test_device"
+                }
+            )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] is True
+        assert data["is_new_user"] is True
+        assert "auth_token" in data
+    
+    def test_verify_otp_invalid(self, client: TestClient):
+        """Test OTP verification with invalid OTP"""
+        response = client.post(
+            "/api/v1/auth/verify-otp",
+            json={
+                "phone": "+1234567890",
+                "otp": "000000",
+                "device_info": "test_device"
+            }
+        )
+        
+        assert response.status_code == 400
+        data = response.json()
+        assert data["detail"] == "Invalid or expired OTP"
+    
+    def test_complete_profile_success(self, client: TestClient, db_session: Session, assert_max_queries):
+        """Test successful profile completion"""
+        # First get auth token
+        otp_response = client.post(
+            "/api/v1/auth/request-otp",
+            json={"phone": "+1234567890"}
+        )
+        
+        otp_log = db_session.query(OTPLog).filter(
+            OTPLog.phone == "+1234567890"
+        ).first()
+        
+        verify_response = client.post(
+            "/api/v1/auth/verify-otp",
+            json={
+                "phone": "+1234567890",
+                "otp": otp_log.otp_code,
+                "device_info": "test_device"
+            }
+        )
+        
+        auth_token = verify_response.json()["auth_token"]
+        
+        # Complete profile
+        with assert_max_queries(5):
+            response = client.post(
+                "/api/v1/auth/complete-profile",
+                json={
+                    "auth_token": auth_token,
+                    "full_name": "Test User",
+                    "gender": "male"
+                }
+            )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] is True
+        assert data["user"]["full_name"] == "Test User"
+        assert data["user"]["gender"] == "male"
+    
+    def test_logout_success(self, client: TestClient, db_session: Session):
+        """Test successful logout"""
+        # First get auth token
+        otp_response = client.post(
+            "/api/v1/auth/request-otp",
+            json={"phone": "+1234567890"}
+        )
+        
+        otp_log = db_session.query(OTPLog).filter(
+            OTPLog.phone == "+1234567890"
+        ).first()
+        
+        verify_response = client.post(
+            "/api/v1/auth/verify-otp",
+            json={
+                "phone": "+1234567890",
+                "otp": otp_log.otp_code,
+                "device_info": "test_device"
+            }
+        )
+        
+        auth_token = verify_response.json()["auth_token"]
+        
+        # Logout
+        response = client.post(
+            "/api/v1/auth/logout",
+            json={"auth_token": auth_token}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] is True
+
+
+class TestAuthService:
+    """Test authentication service"""
+    
+    def test_create_user(self, db_session: Session):
+        """Test user creation"""
+        auth_service = AuthService()
+        user = auth_service.create_user(db_session, "+1234567890")
+        
+        assert user.phone == "+1234567890"
+        assert user.phone_verified is True
+        assert user.is_active is True
+    
+    def test_get_user_by_phone(self, db_session: Session):
+        """Test getting user by phone"""
+        auth_service = AuthService()
+        
+        # Create user
+        user = auth_service.create_user(db_session, "+1234567890")
+        
+        # Get user
+        found_user = auth_service.get_user_by_phone(db_session, "+1234567890")
+        
+        assert found_user is not None
+        assert found_user.user_id == user.user_id
+    
+    def test_create_session(self, db_session: Session):
+        """Test session creation"""
+        auth_service = AuthService()
+        
+        # Create user
+        user = auth_service.create_user(db_session, "+1234567890")
+        
+        # Create session
+        session = auth_service.create_session(
+            db_session, 
+            user.user_id, 
+            "test_device"
+        )
+        
+        assert session.user_id == user.user_id
+        assert session.device_info == "test_device"
+        assert session.auth_token is not None
+
+
+class TestOTPService:
+    """Test OTP service"""
+    
+    def test_create_otp_log(self, db_session: Session):
+        """Test OTP log creation"""
+        otp_service = OTPService()
+        otp_log, otp_code = otp_service.create_otp_log(db_session, "+1234567890")
+        
+        assert otp_log.phone == "+1234567890"
+        assert otp_log.otp_code == otp_code
+        assert otp_log.is_verified is False
+        assert len(otp_code) == 6
+    
+    def test_verify_otp_success(self, db_session: Session):
+        """Test successful OTP verification"""
+        otp_service = OTPService()
+        
+        # Create OTP
+        otp_log, otp_code = otp_service.create_otp_log(db_session, "+1234567890")
+        
+        # Verify OTP
+        verified_otp = otp_service.verify_otp(db_session, "+1234567890", otp_code)
+        
+        assert verified_otp is not None
+        assert verified_otp.is_verified is True
+    
+    def test_verify_otp_invalid(self, db_session: Session):
+        """Test invalid OTP verification"""
+        otp_service = OTPService()
+        
+        # Create OTP
+        otp_service.create_otp_log(db_session, "+1234567890")
+        
+        # Try to verify with wrong OTP
+        verified_otp = otp_service.verify_otp(db_session, "+1234567890", "000000")
+        
+        assert verified_otp is None
+
+
+class TestUnitOfWork:
+    """Test single-transaction service flows"""
+    
+    def test_new_user_login_single_commit(self, db_session: Session):
+        """OTP verification, signup and session creation commit once"""
+        otp_service = OTPService()
+        auth_service = AuthService()
+        auth_service.create_default_roles(db_session)
+        _, otp_code = otp_service.create_otp_log(db_session, "+1234567890")
+        
+        counts = {"commit": 0, "flush": 0}
+        
+        def on_commit(session):
+            counts["commit"] += 1
+        
+        def on_flush(session, flush_context):
+            counts["flush"] += 1
+        
+        event.listen(db_session, "after_commit", on_commit)
+        event.listen(db_session, "after_flush", on_flush)
+        try:
+            with unit_of_work(db_session):
+                assert otp_service.verify_otp(db_session, "+1234567890", otp_code) is not None
+                user = auth_service.create_user(db_session, "+1234567890")
+                assert user.user_id is not None
+                session = auth_service.create_session(db_session, user.user_id, "test_device", is_temp=True)
+        finally:
+            event.remove(db_session, "after_commit", on_commit)
+            event.remove(db_session, "after_flush", on_flush)
+        
+        assert counts == {"commit": 1, "flush": 2}
+        assert session.session_id is not None
+        user_with_roles = auth_service.get_user_with_roles(db_session, user.user_id)
+        assert [ur.role.role_name for ur in user_with_roles.user_roles] == ["rider"]
+    
+    def test_unit_of_work_rolls_back(self, db_session: Session):
+        """Nothing is persisted when the flow fails"""
+        auth_service = AuthService()
+        
+        with pytest.raises(RuntimeError):
+            with unit_of_work(db_session):
+                auth_service.create_user(db_session, "+1234567890")
+                raise RuntimeError("boom")
+        
+        assert auth_service.get_user_by_phone(db_session, "+1234567890") is None
+
+
+class TestAsyncServices:
+    """Test the asyncio service layer"""
+    
+    def test_async_database_url(self):
+        """Sync driver URLs map onto their asyncio drivers"""
+        assert get_async_database_url("mysql+pymysql://u:p@db:3306/app") == "mysql+aiomysql://u:p@db:3306/app"
+        assert get_async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    
+    @pytest.mark.asyncio
+    async def test_async_login_flow(self, async_db_session: AsyncSession):
+        """OTP login through the async services"""
+        otp_service = AsyncOTPService()
+        auth_service = AsyncAuthService()
+        _, otp_code = await otp_service.create_otp_log(async_db_session, "+1234567890")
+        
+        async with async_unit_of_work(async_db_session):
+            assert await otp_service.verify_otp(async_db_session, "+1234567890", otp_code) is not None
+            user = await auth_service.create_user(async_db_session, "+1234567890")
+            session = await auth_service.create_session(async_db_session, user.user_id, "test_device")
+        
+        cached_user = await auth_service.validate_session(async_db_session, session.auth_token)
+        assert cached_user.phone == "+1234567890"
+        assert "rider" in cached_user.role_names
@@ -0,0 +1,127 @@
+"""
+Set-based BaseService operation tests
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import ValidationError
+from app.models.auth import OTPLog
+from app.models.user import User
+from app.services.base import AsyncBaseService, BaseService
+
+
+def phones(count: int, start: int = 0):
+    return [{"phone": f"+9198100000{start + i:02d}"} for i in range(count)]
+
+
+class TestBulkOperations:
+    """Test bulk CRUD without ORM objects"""
+    
+    def test_bulk_create_uses_one_statement(self, db_session: Session, assert_max_queries):
+        service = BaseService(User)
+        
+        with assert_max_queries(1):
+            created = service.bulk_create(db_session, phones(50), returning=["user_id", "phone"])
+        
+        assert sorted(row["phone"] for row in created) == [row["phone"] for row in phones(50)]
+        rows = service.get_many(db_session, [row["user_id"] for row in created], columns=["user_id", "phone"])
+        assert {row["user_id"]: row["phone"] for row in rows} == {row["user_id"]: row["phone"] for row in created}
+        assert not any(isinstance(obj, User) for obj in db_session.identity_map.values())
+    
+    def test_get_many_chunks(self, db_session: Session, assert_max_queries):
+        service = BaseService(User)
+        ids = [row["user_id"] for row in service.bulk_create(db_session, phones(30))]
+        
+        with assert_max_queries(3):
+            rows = service.get_many(db_session, ids + ids[:5], chunk_size=12)
+        
+        assert sorted(row["user_id"] for row in rows) == sorted(ids)
+    
+    def test_bulk_update_by_primary_key(self, db_session: Session):
+        service = BaseService(User)
+        ids = [row["user_id"] for row in service.bulk_create(db_session, phones(3))]
+        
+        updated = service.bulk_update(db_session, [
+            {"user_id": ids[0], "full_name": "A"},
+            {"user_id": ids[1], "full_name": "B"},
+        ])
+        
+        assert updated == 2
+        names = {row["user_id"]: row["full_name"] for row in service.get_many(db_session, ids)}
+        assert names == {ids[0]: "A", ids[1]: "B", ids[2]: None}
+        with pytest.raises(ValidationError):
+            service.bulk_update(db_session, [{"full_name": "no key"}])
+    
+    def test_bulk_update_counts_matched_rows(self, db_session: Session):
+        service = BaseService(User)
+        ids = [row["user_id"] for row in service.bulk_create(db_session, phones(2))]
+        
+        updated = service.bulk_update(db_session, [
+            {"user_id": ids[0], "full_name": "A"},
+            {"user_id": ids[1], "gender": "female"},
+            {"user_id": max(ids) + 1000, "full_name": "Nobody"},
+        ])
+        
+        assert updated == 2
+        rows = {row["user_id"]: (row["full_name"], row["gender"]) for row in service.get_many(db_session, ids)}
+        assert rows == {ids[0]: ("A", None), ids[1]: (None, "female")}
+    
+    def test_delete_where(self, db_session: Session, assert_max_queries):
+        service = BaseService(OTPLog)
+        expired = datetime.utcnow() - timedelta(hours=1)
+        service.bulk_create(db_session, [
+            {"phone": "+919810000000", "otp_code": "123456", "expires_at": expired},
+            {"phone": "+919810000000", "otp_code": "654321", "expires_at": expired, "is_verified": True},
+            {"phone": "+919810000001", "otp_code": "111111", "expires_at": datetime.utcnow() + timedelta(minutes=5)},
+        ])
+        
+        with assert_max_queries(1):
+            deleted = service.delete_where(db_session, OTPLog.expires_at < datetime.utcnow(), is_verified=False)
+        
+        assert deleted == 1
+        with pytest.raises(ValidationError):
+            service.delete_where(db_session)
+    
+    def test_upsert(self, db_session: Session):
+        service = BaseService(User)
+        ids = [row["user_id"] for row in service.bulk_create(db_session, phones(2))]
+        
+        service.upsert(
+            db_session,
+            [{"phone": phones(1)[0]["phone"], "full_name": "Existing"}, {"phone": "+919810000099", "full_name": "New"}],
+            conflict_columns=["phone"]
+        )
+        
+        rows = service.get_many(db_session, ids)
+        assert {row["phone"]: row["full_name"] for row in rows}[phones(1)[0]["phone"]] == "Existing"
+        assert service.exists(db_session, phone="+919810000099")
+    
+    def test_upsert_updates_only_columns_each_row_provides(self, db_session: Session):
+        service = BaseService(User)
+        first, second = phones(2)
+        service.bulk_create(db_session, [dict(first, full_name="First"), dict(second, gender="male")])
+        
+        service.upsert(
+            db_session,
+            [{"phone": first["phone"], "gender": "female"}, {"phone": second["phone"], "full_name": "Second"}],
+            conflict_columns=["phone"]
+        )
+        
+        rows = {user.phone: (user.full_name, user.gender) for user in db_session.query(User).filter(User.phone.in_([first["phone"], second["phone"]]))}
+        assert rows == {first["phone"]: ("First", "female"), second["phone"]: ("Second", "male")}
+        with pytest.raises(ValidationError):
+            service.upsert(db_session, [{"phone": first["phone"]}], conflict_columns=["phone"], update_columns=["full_name"])
+    
+    @pytest.mark.asyncio
+    async def test_async_wrappers(self):
+        from tests.conftest import TestingAsyncSessionLocal
+        service = AsyncBaseService(BaseService(User))
+        async with TestingAsyncSessionLocal() as db:
+            ids = [row["user_id"] for row in await service.bulk_create(db, phones(2, start=50))]
+            rows = await service.get_many(db, ids)
+            deleted = await service.delete_where(db, User.user_id.in_(ids))
+        
+        assert len(rows) == 2
+        assert deleted == 2
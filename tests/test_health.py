@@ -0,0 +1,130 @@
+"""
+Tests for the background health prober and probe endpoints
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.api.v1 import health
+from app.core.health import HealthProber, pool_saturation
+
+
+class FakeRedis:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+
+    def ping(self):
+        if not self.healthy:
+            raise ConnectionError("redis down")
+        return True
+
+
+class TestHealthProber:
+    """Test probing and readiness decisions"""
+
+    @pytest.mark.asyncio
+    async def test_probe_caches_state(self):
+        calls = []
+        prober = HealthProber(database_check=lambda: calls.append(1) or True, redis_client=FakeRedis(), pools=())
+        prober.warmed_up = True
+
+        state = await prober.probe()
+
+        assert state.database is True and state.redis is True
+        assert prober.state is state
+        assert prober.readiness() == []
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_dependencies_are_not_ready(self):
+        def database_down():
+            raise OSError("connection refused")
+
+        prober = HealthProber(database_check=database_down, redis_client=FakeRedis(healthy=False), pools=())
+        prober.warmed_up = True
+
+        await prober.probe()
+
+        assert prober.state.database is False and prober.state.redis is False
+        assert prober.readiness() == ["database: connection refused", "redis: redis down"]
+
+    def test_unprobed_state_is_not_ready(self):
+        prober = HealthProber(pools=())
+
+        assert "health state is stale" in prober.readiness()
+
+    @pytest.mark.asyncio
+    async def test_not_ready_until_warmed_up(self):
+        prober = HealthProber(database_check=lambda: True, pools=())
+        await prober.probe()
+
+        assert prober.readiness() == ["warming up"]
+        prober.warmed_up = True
+        assert prober.readiness() == []
+
+    def test_pool_saturation(self, monkeypatch):
+        engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=2, max_overflow=0)
+        monkeypatch.setattr(health.settings, "database_pool_size", 2)
+        monkeypatch.setattr(health.settings, "database_max_overflow", 0)
+
+        connections = [engine.connect(), engine.connect()]
+        assert pool_saturation([engine.pool]) == 1.0
+        connections.pop().close()
+        assert pool_saturation([engine.pool]) == 0.5
+        connections.pop().close()
+
+    @pytest.mark.asyncio
+    async def test_saturated_pool_is_degraded_until_it_persists(self, monkeypatch):
+        engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=1, max_overflow=0)
+        monkeypatch.setattr(health.settings, "database_pool_size", 1)
+        monkeypatch.setattr(health.settings, "database_max_overflow", 0)
+        monkeypatch.setattr(health.settings, "health_pool_saturation_probes", 3)
+        prober = HealthProber(database_check=lambda: True, pools=[engine.pool])
+        prober.warmed_up = True
+
+        connection = engine.connect()
+        for _ in range(2):
+            await prober.probe()
+            assert prober.readiness() == []
+            assert prober.warnings() == ["connection pool 100% checked out"]
+
+        await prober.probe()
+        assert prober.readiness() == ["connection pool saturated for 3 probes"]
+
+        connection.close()
+        await prober.probe()
+        assert prober.readiness() == [] and prober.warnings() == []
+
+
+class TestHealthEndpoints:
+    """Test the cached health endpoints"""
+
+    def test_live(self, client: TestClient):
+        response = client.get("/api/v1/health/live")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+
+    @pytest.mark.asyncio
+    async def test_ready_and_health(self, client: TestClient, monkeypatch):
+        prober = HealthProber(database_check=lambda: True, pools=())
+        prober.warmed_up = True
+        await prober.probe()
+        monkeypatch.setattr(health, "get_health_prober", lambda: prober)
+
+        ready = client.get("/api/v1/health/ready")
+        summary = client.get("/api/v1/health/")
+
+        assert ready.status_code == 200
+        assert ready.json()["status"] == "ready"
+        assert summary.json()["status"] == "healthy"
+
+    def test_not_ready(self, client: TestClient, monkeypatch):
+        monkeypatch.setattr(health, "get_health_prober", lambda: HealthProber(pools=()))
+
+        response = client.get("/api/v1/health/ready")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "not_ready"
+        assert response.json()["reasons"]
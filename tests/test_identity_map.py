@@ -0,0 +1,74 @@
+"""
+Primary-key lookups and identity map reuse tests
+"""
+from sqlalchemy.orm import Session
+
+from app.core.database import track_queries
+from app.models.auth import Session as UserSession
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.services.base import BaseService
+
+
+class TestIdentityMap:
+    """Test Session.get based lookups"""
+
+    def test_get_resolves_primary_key(self, db_session: Session, assert_max_queries):
+        user = User(phone="+919810000001")
+        db_session.add(user)
+        db_session.commit()
+        user_id = user.user_id
+        db_session.expire_all()
+        service = BaseService(User)
+
+        with track_queries() as stats, assert_max_queries(1):
+            first = service.get(db_session, user_id)
+            second = service.get(db_session, user_id)
+
+        assert first is second is user
+        assert (stats.identity_hits, stats.identity_misses) == (1, 1)
+        assert service.get(db_session, user_id + 1000) is None
+
+    def test_delete_by_primary_key(self, db_session: Session):
+        user = User(phone="+919810000002")
+        db_session.add(user)
+        db_session.commit()
+
+        assert BaseService(User).delete(db_session, user.user_id) is True
+        assert BaseService(User).delete(db_session, user.user_id) is False
+        assert db_session.query(User).count() == 0
+
+    def test_user_with_roles_reused(self, db_session: Session, assert_max_queries):
+        service = AuthService()
+        user_id = service.create_user(db_session, "+919810000003").user_id
+        db_session.expire_all()
+
+        with track_queries() as stats, assert_max_queries(1):
+            loaded = service.get_user_with_roles(db_session, user_id)
+            again = service.get_user_with_roles(db_session, user_id)
+
+        assert loaded is again
+        assert [user_role.role.role_name for user_role in again.user_roles] == ["rider"]
+        assert (stats.identity_hits, stats.identity_misses) == (1, 1)
+
+    def test_new_role_not_served_stale(self, db_session: Session):
+        service = AuthService()
+        user = User(phone="+919810000004")
+        db_session.add(user)
+        db_session.commit()
+        assert service.get_user_with_roles(db_session, user.user_id).user_roles == []
+
+        service.assign_default_role(db_session, user.user_id)
+
+        roles = service.get_user_with_roles(db_session, user.user_id).user_roles
+        assert [user_role.role.role_name for user_role in roles] == ["rider"]
+
+    def test_delete_session_single_statement(self, db_session: Session, assert_max_queries):
+        service = AuthService()
+        user = service.create_user(db_session, "+919810000005")
+        session = service.create_session(db_session, user.user_id)
+
+        with assert_max_queries(1):
+            assert service.delete_session(db_session, session.auth_token) is True
+        assert db_session.query(UserSession).count() == 0
+        assert service.delete_session(db_session, session.auth_token) is False
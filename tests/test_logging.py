@@ -0,0 +1,152 @@
+"""
+Tests for the logging pipeline
+"""
+import json
+import logging
+import queue
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.logging import (
+    JsonFormatter,
+    LogQueueHandler,
+    LogQueueListener,
+    LogQueueStats,
+    RequestIdFilter,
+    request_id_var
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(self.format(record))
+
+
+def make_record(msg, *args, level=logging.INFO, exc_info=None):
+    return logging.LogRecord("app.test", level, __file__, 1, msg, args, exc_info)
+
+
+class TestJsonFormatter:
+    """Test the JSON lines formatter"""
+
+    def test_escapes_message(self):
+        line = JsonFormatter().format(make_record('quote " backslash \\ newline \n %s', "arg"))
+        payload = json.loads(line)
+        assert payload["message"] == 'quote " backslash \\ newline \n arg'
+        assert payload["level"] == "INFO"
+        assert payload["logger"] == "app.test"
+        assert "\n" not in line
+
+    def test_exception_and_extra_fields(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = make_record("failed", level=logging.ERROR, exc_info=sys.exc_info())
+        record.request_id = "abc"
+
+        payload = json.loads(JsonFormatter().format(record))
+        assert payload["request_id"] == "abc"
+        assert "ValueError: boom" in payload["exception"]
+
+    def test_request_id_from_context(self):
+        handler = ListHandler()
+        handler.setFormatter(JsonFormatter())
+        handler.addFilter(RequestIdFilter())
+
+        token = request_id_var.set("req-1")
+        try:
+            handler.handle(make_record("inside"))
+        finally:
+            request_id_var.reset(token)
+        handler.handle(make_record("outside"))
+
+        inside, outside = (json.loads(line) for line in handler.records)
+        assert inside["request_id"] == "req-1"
+        assert "request_id" not in outside
+
+
+class TestLogQueue:
+    """Test the bounded queue handler and listener"""
+
+    def test_drop_new_when_full(self):
+        log_queue = queue.Queue(maxsize=2)
+        stats = LogQueueStats(log_queue)
+        handler = LogQueueHandler(log_queue, (), stats, overflow="drop_new")
+
+        for i in range(5):
+            handler.handle(make_record("message %d", i))
+
+        assert stats.as_dict() == {"enqueued": 2, "dropped": 3, "queue_size": 2, "queue_max": 2}
+        assert log_queue.get_nowait().msg == "message 0"
+
+    def test_drop_oldest_when_full(self):
+        log_queue = queue.Queue(maxsize=2)
+        stats = LogQueueStats(log_queue)
+        handler = LogQueueHandler(log_queue, (), stats, overflow="drop_oldest")
+
+        for i in range(5):
+            handler.handle(make_record("message %d", i))
+
+        assert stats.dropped == 3
+        assert [log_queue.get_nowait().msg for _ in range(2)] == ["message 3", "message 4"]
+
+    def test_caller_record_is_not_modified(self):
+        log_queue = queue.Queue(maxsize=10)
+        handler = LogQueueHandler(log_queue, (), LogQueueStats(log_queue))
+        record = make_record("hello %s", "world")
+
+        handler.handle(record)
+
+        assert (record.msg, record.args) == ("hello %s", ("world",))
+        assert not hasattr(record, "log_handlers")
+        assert log_queue.get_nowait().msg == "hello world"
+
+    def test_stats_under_concurrent_logging(self):
+        log_queue = queue.Queue(maxsize=10)
+        stats = LogQueueStats(log_queue)
+        handler = LogQueueHandler(log_queue, (), stats, overflow="drop_oldest")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: handler.handle(make_record("message %d", i)), range(2000)))
+
+        assert stats.enqueued == 2000
+        assert stats.enqueued - stats.dropped == log_queue.qsize()
+
+    def test_listener_dispatches_to_target_handlers(self):
+        log_queue = queue.Queue(maxsize=100)
+        stats = LogQueueStats(log_queue)
+        everything, errors_only = ListHandler(), ListHandler()
+        errors_only.setLevel(logging.ERROR)
+        handler = LogQueueHandler(log_queue, (everything, errors_only), stats)
+        listener = LogQueueListener(log_queue, [everything, errors_only])
+
+        listener.start()
+        handler.handle(make_record("hello %s", "world"))
+        handler.handle(make_record("bad", level=logging.ERROR))
+        listener.stop()
+
+        assert everything.records == ["hello world", "bad"]
+        assert errors_only.records == ["bad"]
+
+    def test_request_id_survives_the_queue(self):
+        log_queue = queue.Queue(maxsize=100)
+        target = ListHandler()
+        target.setFormatter(JsonFormatter())
+        target.addFilter(RequestIdFilter())
+        handler = LogQueueHandler(log_queue, (target,), LogQueueStats(log_queue))
+        handler.addFilter(RequestIdFilter())
+        listener = LogQueueListener(log_queue, [target])
+
+        listener.start()
+        token = request_id_var.set("req-2")
+        try:
+            handler.handle(make_record("queued"))
+        finally:
+            request_id_var.reset(token)
+        listener.stop()
+
+        assert json.loads(target.records[0])["request_id"] == "req-2"
@@ -0,0 +1,102 @@
+"""
+Tests for Prometheus metrics
+"""
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.core import metrics
+from app.core.database import TimedQueuePool
+from app.main import app
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics:
+    """Test request, rate limit and pool metrics"""
+    
+    def test_request_metrics(self, client: TestClient):
+        labels = {"method": "GET", "route": "/"}
+        before = sample("http_responses_total", status="200", **labels)
+        before_latency = sample("http_request_duration_seconds_count", **labels)
+        
+        assert client.get("/").status_code == 200
+        
+        assert sample("http_responses_total", status="200", **labels) == before + 1
+        assert sample("http_request_duration_seconds_count", **labels) == before_latency + 1
+        assert sample("http_requests_in_progress", **labels) == 0
+    
+    def test_unknown_paths_share_a_label(self, client: TestClient):
+        before = sample("http_responses_total", method="GET", route=metrics.UNMATCHED_ROUTE, status="404")
+        
+        client.get("/no-such-page-1")
+        client.get("/no-such-page-2")
+        
+        assert sample("http_responses_total", method="GET", route=metrics.UNMATCHED_ROUTE, status="404") == before + 2
+    
+    def test_unknown_methods_share_a_label(self, client: TestClient):
+        before = sample("http_responses_total", method=metrics.OTHER_METHOD, route="/", status="405")
+        
+        client.request("FOO", "/")
+        client.request("BAR", "/")
+        
+        assert sample("http_responses_total", method=metrics.OTHER_METHOD, route="/", status="405") == before + 2
+        assert REGISTRY.get_sample_value("http_responses_total", {"method": "FOO", "route": "/", "status": "405"}) is None
+    
+    def test_route_cache_is_bounded(self, client: TestClient, monkeypatch):
+        monkeypatch.setattr(metrics, "MAX_ROUTE_CACHE_ENTRIES", 2)
+        metrics._routes.clear()
+        
+        for method, path in (("GET", "/"), ("GET", "/metrics"), ("GET", "/no-such-page"), ("GET", "/"), ("POST", "/")):
+            client.request(method, path)
+        
+        assert list(metrics._routes) == [("GET", "/"), ("POST", "/")]
+    
+    def test_metrics_endpoint(self, client: TestClient):
+        client.post("/api/v1/auth/request-otp", json={"phone": "+1234567890"})
+        
+        response = TestClient(app, client=("10.0.3.7", 40000)).get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'http_request_duration_seconds_bucket{le="0.005",method="POST",route="/api/v1/auth/request-otp"}' in response.text
+        assert 'otp_sent_total{result="queued"}' in response.text
+        assert "http_request_db_queries_count" in response.text
+    
+    def test_metrics_endpoint_is_internal(self, client: TestClient):
+        public = TestClient(app, client=("203.0.113.9", 40000))
+        proxied = TestClient(app, client=("10.0.0.2", 40000))
+        
+        assert public.get("/metrics").status_code == 404
+        assert proxied.get("/metrics", headers={"X-Forwarded-For": "203.0.113.9"}).status_code == 404
+        assert proxied.get("/metrics").status_code == 200
+    
+    def test_rate_limit_rejections(self, client: TestClient):
+        before = sample("rate_limit_rejections_total", scope="route")
+        
+        responses = [
+            client.post("/api/v1/auth/request-otp", json={"phone": f"+123456789{i}"})
+            for i in range(6)
+        ]
+        
+        assert responses[-1].status_code == 429
+        assert sample("rate_limit_rejections_total", scope="route") == before + 1
+        assert sample(
+            "http_responses_total", method="POST", route="/api/v1/auth/request-otp", status="429"
+        ) >= 1
+    
+    def test_pool_wait_time(self):
+        engine = create_engine("sqlite://", poolclass=TimedQueuePool, pool_size=1)
+        waits = []
+        engine.pool.wait_listeners.append(waits.append)
+        metrics.instrument_pool(engine, "test")
+        
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            assert sample("db_pool_checked_out", pool="test") == 1
+        
+        assert len(waits) == 1 and waits[0] >= 0
+        assert sample("db_pool_checked_out", pool="test") == 0
+        assert sample("db_pool_wait_seconds_count", pool="test") == 1
@@ -0,0 +1,151 @@
+"""
+Middleware tests
+"""
+import logging
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import get_settings
+from app.core.middleware import LoggingMiddleware, RequestPipelineMiddleware
+from app.core.rate_limit import MemoryRateLimitBackend, SlidingWindowRateLimiter
+from app.utils.logging import RequestIdFilter, request_id_var
+
+sync_engine = create_engine("sqlite://")
+async_engine = create_async_engine("sqlite+aiosqlite://", poolclass=NullPool)
+
+
+def build_client(calls: int = 100, query_headers: bool = False) -> TestClient:
+    app = FastAPI()
+    
+    @app.get("/echo")
+    async def echo(request: Request):
+        return {"request_id": request.state.request_id}
+    
+    @app.get("/sync-db")
+    def sync_db(n: int = 1):
+        with sync_engine.connect() as connection:
+            for _ in range(n):
+                connection.execute(text("SELECT 1"))
+        return {}
+    
+    @app.get("/async-db")
+    async def async_db(n: int = 1):
+        async with async_engine.connect() as connection:
+            for _ in range(n):
+                await connection.execute(text("SELECT 1"))
+        return {}
+    
+    app.add_middleware(
+        RequestPipelineMiddleware,
+        calls=calls,
+        period=60,
+        route_limits={},
+        limiter=SlidingWindowRateLimiter(MemoryRateLimitBackend()),
+        query_headers=query_headers
+    )
+    return TestClient(app)
+
+
+class TestRequestPipelineMiddleware:
+    """Test the fused ASGI middleware"""
+    
+    def test_headers_and_request_id(self):
+        """Responses carry the request ID, timing and security headers"""
+        response = build_client().get("/echo")
+        
+        assert response.status_code == 200
+        assert response.headers["X-Request-ID"] == response.json()["request_id"]
+        assert float(response.headers["X-Process-Time"]) >= 0
+        assert response.headers["X-Content-Type-Options"] == "nosniff"
+        assert response.headers["X-Frame-Options"] == "DENY"
+        assert response.headers["Referrer-Policy"] == "strict-origin-when-cross-origin"
+    
+    def test_rate_limited_response(self):
+        """Rejected requests get a bare 429 with Retry-After"""
+        client = build_client(calls=1)
+        client.get("/echo")
+        
+        response = client.get("/echo")
+        
+        assert response.status_code == 429
+        assert response.text == "Rate limit exceeded"
+        assert "Retry-After" in response.headers
+        assert "X-Request-ID" not in response.headers
+    
+    def test_query_headers(self):
+        """Statements from sync and async routes are counted per request"""
+        client = build_client(query_headers=True)
+        
+        assert client.get("/echo").headers["X-DB-Query-Count"] == "0"
+        assert client.get("/sync-db", params={"n": 3}).headers["X-DB-Query-Count"] == "3"
+        response = client.get("/async-db", params={"n": 2})
+        assert response.headers["X-DB-Query-Count"] == "2"
+        assert float(response.headers["X-DB-Query-Time"]) >= float(response.headers["X-DB-Slowest-Query-Time"])
+    
+    def test_query_headers_disabled(self):
+        response = build_client().get("/sync-db")
+        
+        assert "X-DB-Query-Count" not in response.headers
+    
+    def test_repeated_statement_warning(self, monkeypatch, caplog):
+        """A statement repeated past the threshold is reported as a possible N+1"""
+        monkeypatch.setattr(get_settings(), "database_repeated_query_threshold", 3)
+        client = build_client()
+        # The app logger does not propagate to the root logger caplog listens on
+        middleware_logger = logging.getLogger("app.core.middleware")
+        middleware_logger.addHandler(caplog.handler)
+        
+        try:
+            client.get("/sync-db", params={"n": 2})
+            assert "possible N+1" not in caplog.text
+            client.get("/sync-db", params={"n": 3})
+        finally:
+            middleware_logger.removeHandler(caplog.handler)
+        
+        assert "ran the same statement 3 times (possible N+1): SELECT 1" in caplog.text
+    
+    def test_log_records_carry_request_id(self, caplog):
+        """Records logged while handling a request get its ID through RequestIdFilter"""
+        client = build_client()
+        middleware_logger = logging.getLogger("app.core.middleware")
+        caplog.handler.addFilter(RequestIdFilter())
+        middleware_logger.addHandler(caplog.handler)
+        
+        try:
+            response = client.get("/echo")
+        finally:
+            middleware_logger.removeHandler(caplog.handler)
+        
+        records = [record for record in caplog.records if record.name == "app.core.middleware"]
+        assert len(records) == 2
+        assert {record.request_id for record in records} == {response.headers["X-Request-ID"]}
+        assert request_id_var.get() is None
+
+
+class TestLoggingMiddleware:
+    """Test the standalone request logging middleware"""
+    
+    def test_logs_forwarded_client(self, caplog):
+        app = FastAPI()
+        
+        @app.get("/echo")
+        async def echo(request: Request):
+            return {"request_id": request.state.request_id}
+        
+        app.add_middleware(LoggingMiddleware, trusted_proxies=["10.0.0.0/8"])
+        middleware_logger = logging.getLogger("app.core.middleware")
+        middleware_logger.addHandler(caplog.handler)
+        
+        try:
+            response = TestClient(app, client=("10.0.0.2", 40000)).get(
+                "/echo", headers={"X-Forwarded-For": "203.0.113.9"}
+            )
+        finally:
+            middleware_logger.removeHandler(caplog.handler)
+        
+        assert response.headers["X-Request-ID"] == response.json()["request_id"]
+        assert "GET /echo from 203.0.113.9" in caplog.text
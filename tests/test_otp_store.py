@@ -0,0 +1,105 @@
+"""
+OTP store and write-behind otp_logs tests
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import FakeRedis
+from app.models.auth import OTPLog
+from app.services.otp_service import OTPService
+from app.services.otp_store import OTPLogWriter, OTPRecord, RedisOTPStore
+from tests.conftest import engine
+
+
+def make_record(phone="+919810000001", code="123456", minutes=5):
+    created_at = datetime.utcnow().replace(microsecond=0)
+    return OTPRecord(phone=phone, otp_code=code, created_at=created_at, expires_at=created_at + timedelta(minutes=minutes))
+
+
+@pytest.fixture
+def writer(test_db):
+    """Writer on the test engine; it commits on its own connections, so rows are deleted afterwards"""
+    writer = OTPLogWriter(engine, flush_interval=3600)
+    yield writer
+    writer.stop()
+    with engine.begin() as connection:
+        connection.execute(OTPLog.__table__.delete())
+
+
+class TestRedisOTPStore:
+    """Test live OTP state in (fake) Redis"""
+
+    def test_consume_once(self):
+        store = RedisOTPStore(FakeRedis())
+        record = make_record()
+        store.put(record)
+
+        assert store.consume(record.phone, "000000") is None
+        assert store.consume(record.phone, record.otp_code) == record
+        assert store.consume(record.phone, record.otp_code) is None
+
+    def test_resend_during_consume_wins(self):
+        class ResendingRedis(FakeRedis):
+            """Stores a new code right after the first consumer read the old one"""
+            resent = False
+
+            def get(self, name):
+                raw = super().get(name)
+                if not self.resent:
+                    self.resent = True
+                    store.put(make_record(code="654321"))
+                return raw
+
+        store = RedisOTPStore(ResendingRedis())
+        record = make_record()
+        store.put(record)
+
+        assert store.consume(record.phone, record.otp_code) is None
+        assert store.consume(record.phone, "654321") is not None
+
+    def test_expired_code(self):
+        store = RedisOTPStore(FakeRedis())
+        record = make_record(minutes=-1)
+        store.put(record)
+
+        assert store.consume(record.phone, record.otp_code) is None
+
+
+class TestWriteBehind:
+    """Test OTPService with an OTP store and OTPLogWriter"""
+
+    def test_issue_and_verify_without_queries(self, db_session: Session, writer, assert_max_queries):
+        service = OTPService(store=RedisOTPStore(FakeRedis()), log_writer=writer)
+
+        with assert_max_queries(0):
+            otp_log, code = service.create_otp_log(db_session, "+919810000001")
+            assert service.verify_otp(db_session, "+919810000001", "abcdef") is None
+            verified = service.verify_otp(db_session, "+919810000001", code)
+
+        assert otp_log.otp_id is None
+        assert verified.is_verified is True
+        assert writer.flush() == 1
+        row = db_session.query(OTPLog).one()
+        assert (row.phone, row.otp_code, row.is_verified) == ("+919810000001", code, True)
+
+    def test_verify_after_flush_updates_row(self, db_session: Session, writer):
+        service = OTPService(store=RedisOTPStore(FakeRedis()), log_writer=writer)
+        _, code = service.create_otp_log(db_session, "+919810000002")
+        assert writer.flush() == 1
+        assert db_session.query(OTPLog).one().is_verified is False
+
+        service.verify_otp(db_session, "+919810000002", code)
+        assert writer.flush() == 1
+
+        db_session.expire_all()
+        assert db_session.query(OTPLog).one().is_verified is True
+
+    def test_writer_keeps_rows_on_failure(self, writer):
+        writer.issued(make_record())
+        writer.bind = None
+
+        assert writer.flush() == 0
+        assert writer.pending() == 1
+        writer.bind = engine
@@ -0,0 +1,167 @@
+"""
+OTP throttling tests
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import ValidationError
+from app.core.rate_limit import RateLimit
+from app.core.redis_client import FakeRedis
+from app.services.otp_service import OTPService
+from app.services.otp_store import RedisOTPStore
+from app.services import otp_throttle
+from app.services.otp_throttle import MemoryThrottleCounters, OTPThrottle, RedisThrottleCounters
+
+HOURLY = RateLimit(limit=3, window=3600)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_throttle(counters=None, prefix_rate="100/3600"):
+    return OTPThrottle(
+        counters or MemoryThrottleCounters(),
+        prefix_rate=RateLimit.parse(prefix_rate),
+        max_failures=3,
+        lockout=900
+    )
+
+
+class TestThrottleCounters:
+    """Test expiring counters"""
+
+    def test_memory_window_expires(self):
+        clock = FakeClock()
+        counters = MemoryThrottleCounters(clock=clock, sweep_interval=10)
+
+        assert counters.incr("a", 60) == (1, 60)
+        clock.now += 30
+        assert counters.incr("a", 60) == (2, 30)
+        clock.now += 30
+        assert counters.get("a") == (0, 0)
+        assert counters.incr("a", 60) == (1, 60)
+
+        counters.incr("b", 5)
+        clock.now += 11
+        counters.incr("c", 5)
+        assert len(counters) == 2
+        assert counters.get("b") == (0, 0)
+
+    def test_redis_counters(self):
+        client = FakeRedis()
+        counters = RedisThrottleCounters(client)
+
+        assert counters.incr("a", 60)[0] == 1
+        assert counters.incr("a", 60)[0] == 2
+        assert 0 < client.ttl("otp-throttle:a") <= 60
+        counters.delete("a")
+        assert counters.get("a") == (0, 0)
+
+    def test_default_backend_follows_redis_url(self, monkeypatch):
+        monkeypatch.setattr(otp_throttle.settings, "otp_throttle_backend", "auto")
+        monkeypatch.setattr(otp_throttle, "get_redis_client", lambda: None)
+        assert isinstance(otp_throttle.get_otp_throttle.__wrapped__().counters, MemoryThrottleCounters)
+        
+        monkeypatch.setattr(otp_throttle, "get_redis_client", FakeRedis)
+        assert isinstance(otp_throttle.get_otp_throttle.__wrapped__().counters, RedisThrottleCounters)
+
+    def test_concurrent_cooldown_lets_one_through(self):
+        throttle = make_throttle()
+
+        def request(_):
+            try:
+                throttle.check_request("+919810000001", cooldown=60, hourly=HOURLY)
+                return True
+            except ValidationError:
+                return False
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(request, range(32)))
+
+        assert results.count(True) == 1
+
+
+class TestOTPThrottle:
+    """Test request limits and verification lockout"""
+
+    def test_cooldown_and_hourly_limit(self):
+        throttle = make_throttle()
+        throttle.check_request("+919810000001", cooldown=60, hourly=HOURLY)
+
+        with pytest.raises(ValidationError) as error:
+            throttle.check_request("+919810000001", cooldown=60, hourly=HOURLY)
+        assert error.value.error_code == "OTP_COOLDOWN"
+
+        for _ in range(2):
+            throttle.check_request("+919810000001", cooldown=0, hourly=HOURLY)
+        with pytest.raises(ValidationError) as error:
+            throttle.check_request("+919810000001", cooldown=0, hourly=HOURLY)
+        assert error.value.error_code == "OTP_RATE_LIMITED"
+
+    def test_prefix_limit(self):
+        throttle = make_throttle(prefix_rate="2/3600")
+        throttle.check_request("+919810000001", cooldown=60, hourly=HOURLY)
+        throttle.check_request("+919810000002", cooldown=60, hourly=HOURLY)
+
+        with pytest.raises(ValidationError):
+            throttle.check_request("+919810000003", cooldown=60, hourly=HOURLY)
+        throttle.check_request("+919820000003", cooldown=60, hourly=HOURLY)
+
+    def test_lockout_after_failures(self, db_session: Session):
+        service = OTPService(throttle=make_throttle())
+        _, code = service.create_otp_log(db_session, "+919810000001")
+
+        for _ in range(3):
+            assert service.verify_otp(db_session, "+919810000001", "abcdef") is None
+        with pytest.raises(ValidationError) as error:
+            service.verify_otp(db_session, "+919810000001", code)
+        assert error.value.error_code == "OTP_LOCKED"
+
+    def test_concurrent_wrong_codes_are_capped(self):
+        throttle = make_throttle(RedisThrottleCounters(FakeRedis()))
+        comparisons = []
+
+        class CountingStore(RedisOTPStore):
+            def consume(self, phone, otp_code):
+                comparisons.append(otp_code)
+                return super().consume(phone, otp_code)
+
+        service = OTPService(store=CountingStore(FakeRedis()), log_writer=object(), throttle=throttle)
+
+        def guess(index):
+            try:
+                service.verify_otp(None, "+919810000001", f"{index:06d}")
+            except ValidationError:
+                pass
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(guess, range(64)))
+
+        assert len(comparisons) == throttle.max_failures
+
+    def test_success_resets_failures(self, db_session: Session):
+        throttle = make_throttle()
+        service = OTPService(throttle=throttle)
+        _, code = service.create_otp_log(db_session, "+919810000001")
+
+        for _ in range(2):
+            service.verify_otp(db_session, "+919810000001", "abcdef")
+        assert service.verify_otp(db_session, "+919810000001", code) is not None
+        assert throttle.counters.get("failures:+919810000001") == (0, 0)
+
+    def test_request_otp_without_throttle_queries(self, client: TestClient, assert_max_queries):
+        # INSERT and its refresh; the limits are checked without otp_logs reads
+        with assert_max_queries(2):
+            response = client.post("/api/v1/auth/request-otp", json={"phone": "+919810000001"})
+        assert response.status_code == 200
+
+        response = client.post("/api/v1/auth/request-otp", json={"phone": "+919810000001"})
+        assert response.status_code == 400
@@ -0,0 +1,85 @@
+"""
+Keyset pagination tests
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import ValidationError
+from app.models.user import User
+from app.schemas.common import CursorPage
+from app.services.base import BaseService
+from app.utils.helpers import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def users(db_session: Session):
+    """25 users; created_at has duplicates so the primary key tie-breaker matters"""
+    started = datetime(2024, 1, 1)
+    rows = [
+        User(phone=f"+9198000000{i:02d}", created_at=started + timedelta(minutes=i // 3), updated_at=started)
+        for i in range(25)
+    ]
+    db_session.add_all(rows)
+    db_session.flush()
+    return rows
+
+
+class TestKeysetPagination:
+    """Test cursor pages through BaseService.get_page"""
+    
+    def test_walks_every_row_once(self, db_session: Session, users):
+        service = BaseService(User)
+        seen, cursor, queries = [], None, 0
+        while True:
+            page = service.get_page(db_session, cursor=cursor, size=10)
+            seen += [user.user_id for user in page.items]
+            queries += 1
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        
+        assert seen == sorted(user.user_id for user in users)
+        assert queries == 3
+    
+    def test_descending_on_non_unique_column(self, db_session: Session, users):
+        service = BaseService(User)
+        first = service.get_page(db_session, size=4, order_by=["created_at"], descending=True)
+        second = service.get_page(db_session, cursor=first.next_cursor, size=4, order_by=["created_at"], descending=True)
+        
+        ordered = sorted(users, key=lambda user: (user.created_at, user.user_id), reverse=True)
+        assert [user.user_id for user in first.items + second.items] == [user.user_id for user in ordered[:8]]
+    
+    def test_total_is_optional_and_capped(self, db_session: Session, users):
+        service = BaseService(User)
+        
+        assert service.get_page(db_session, size=5).total is None
+        exact = service.get_page(db_session, size=5, with_total=True, filters={"is_active": True})
+        capped = service.get_page(db_session, size=5, with_total=True, total_limit=10)
+        
+        assert (exact.total, exact.total_exact) == (25, True)
+        assert (capped.total, capped.total_exact) == (10, False)
+    
+    def test_cursor_page_schema(self, db_session: Session, users):
+        page = BaseService(User).get_page(db_session, size=20)
+        
+        response = CursorPage.from_page(page)
+        
+        assert response.has_more is True
+        assert response.next_cursor == page.next_cursor
+        assert len(response.items) == 20
+
+
+class TestCursors:
+    """Test cursor encoding"""
+    
+    def test_round_trip(self):
+        values = [datetime(2024, 5, 1, 12, 30), 42, "abc"]
+        
+        assert decode_cursor(encode_cursor(values), 3) == values
+    
+    @pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor([1, 2]), "e30"])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(ValidationError):
+            decode_cursor(cursor, 1)
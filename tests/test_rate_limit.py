@@ -0,0 +1,167 @@
+"""
+Rate limiter tests
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.middleware import RateLimitMiddleware
+from app.core.rate_limit import (
+    MemoryRateLimitBackend,
+    RateLimit,
+    RedisRateLimitBackend,
+    SlidingWindowRateLimiter
+)
+from app.core.redis_client import FakeRedis
+
+
+class FakeClock:
+    """Manually advanced wall clock"""
+    
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSlidingWindowRateLimiter:
+    """Test the sliding-window counter"""
+    
+    def test_limit_within_window(self):
+        """Requests over the limit are rejected and not counted"""
+        clock = FakeClock(1200.0)
+        limiter = SlidingWindowRateLimiter(MemoryRateLimitBackend(), clock=clock)
+        rate = RateLimit(limit=3, window=60)
+        
+        results = [limiter.hit("1.2.3.4", rate) for _ in range(5)]
+        
+        assert [r.allowed for r in results] == [True, True, True, False, False]
+        assert results[2].remaining == 0
+        assert limiter.rejections == 2
+        assert limiter.hit("5.6.7.8", rate).allowed is True
+    
+    def test_previous_window_is_weighted(self):
+        """The previous window counts in proportion to its overlap"""
+        clock = FakeClock(1200.0)
+        limiter = SlidingWindowRateLimiter(MemoryRateLimitBackend(), clock=clock)
+        rate = RateLimit(limit=4, window=60)
+        for _ in range(4):
+            assert limiter.hit("ip", rate).allowed
+        
+        # 15s into the next window, 75% of the previous 4 still count
+        clock.now = 1275.0
+        assert limiter.hit("ip", rate).allowed is True
+        assert limiter.hit("ip", rate).allowed is False
+        
+        # 45s in, only 25% of them do
+        clock.now = 1305.0
+        assert limiter.hit("ip", rate).allowed is True
+        assert limiter.hit("ip", rate).allowed is True
+    
+    def test_idle_keys_are_swept(self):
+        """Memory does not grow with clients that went away"""
+        clock = FakeClock(1200.0)
+        backend = MemoryRateLimitBackend()
+        limiter = SlidingWindowRateLimiter(backend, clock=clock)
+        rate = RateLimit(limit=10, window=60)
+        for i in range(100):
+            limiter.hit(f"10.0.0.{i}", rate)
+        
+        clock.now = 1200.0 + 180
+        limiter.hit("10.0.1.1", rate)
+        
+        assert len(backend) == 1
+    
+    def test_redis_backend_shared_between_limiters(self):
+        """Limiters on the same Redis share counters"""
+        client = FakeRedis()
+        clock = FakeClock(1200.0)
+        rate = RateLimit(limit=2, window=60)
+        first = SlidingWindowRateLimiter(RedisRateLimitBackend(client), clock=clock)
+        second = SlidingWindowRateLimiter(RedisRateLimitBackend(client), clock=clock)
+        
+        assert first.hit("ip", rate).allowed is True
+        assert second.hit("ip", rate).allowed is True
+        assert first.hit("ip", rate).allowed is False
+        assert 0 < client.ttl("ratelimit:ip/60:20") <= 120
+
+
+class TestRateLimitMiddleware:
+    """Test per-route limits in the middleware"""
+    
+    def test_route_limit_is_stricter(self):
+        """A route limit applies on top of the global limit"""
+        app = FastAPI()
+        
+        @app.get("/otp")
+        async def otp():
+            return {"ok": True}
+        
+        @app.get("/other")
+        async def other():
+            return {"ok": True}
+        
+        app.add_middleware(
+            RateLimitMiddleware,
+            calls=100,
+            period=60,
+            route_limits={"/otp": "2/60"},
+            limiter=SlidingWindowRateLimiter(MemoryRateLimitBackend())
+        )
+        client = TestClient(app)
+        
+        assert [client.get("/otp").status_code for _ in range(3)] == [200, 200, 429]
+        assert client.get("/other").status_code == 200
+        assert int(client.get("/otp").headers["Retry-After"]) >= 1
+    
+    def test_rejection_is_not_counted_against_the_other_limit(self):
+        """Route rejections leave the global budget alone, and global ones the route budget"""
+        app = FastAPI()
+        
+        @app.get("/otp")
+        async def otp():
+            return {"ok": True}
+        
+        @app.get("/other")
+        async def other():
+            return {"ok": True}
+        
+        app.add_middleware(
+            RateLimitMiddleware,
+            calls=3,
+            period=60,
+            route_limits={"/otp": "1/60"},
+            limiter=SlidingWindowRateLimiter(MemoryRateLimitBackend(), clock=FakeClock())
+        )
+        client = TestClient(app)
+        
+        assert [client.get("/otp").status_code for _ in range(5)] == [200, 429, 429, 429, 429]
+        assert [client.get("/other").status_code for _ in range(3)] == [200, 200, 429]
+    
+    def test_clients_behind_a_proxy_are_limited_separately(self):
+        """Behind a trusted proxy the limit is keyed on the forwarded client, which others cannot spoof"""
+        app = FastAPI()
+        
+        @app.get("/otp")
+        async def otp():
+            return {"ok": True}
+        
+        app.add_middleware(
+            RateLimitMiddleware,
+            route_limits={"/otp": "1/60"},
+            limiter=SlidingWindowRateLimiter(MemoryRateLimitBackend(), clock=FakeClock()),
+            trusted_proxies=["10.0.0.0/8"]
+        )
+        proxy = TestClient(app, client=("10.0.0.2", 50000))
+        direct = TestClient(app, client=("203.0.113.9", 50000))
+        
+        def forwarded(client, chain):
+            return client.get("/otp", headers={"X-Forwarded-For": chain}).status_code
+        
+        assert forwarded(proxy, "198.51.100.1") == 200
+        assert forwarded(proxy, "198.51.100.2, 10.0.0.7") == 200
+        assert forwarded(proxy, "198.51.100.1") == 429
+        # Only the right-most untrusted hop counts; the rest is client-supplied
+        assert forwarded(proxy, "198.51.100.3, 198.51.100.1") == 429
+        assert forwarded(direct, "198.51.100.4") == 200
+        assert forwarded(direct, "198.51.100.5") == 429
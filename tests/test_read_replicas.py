@@ -0,0 +1,135 @@
+"""
+Read replica routing tests, with SQLite files standing in for the primary and replicas
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, ReplicaSet, RoutingSession, unit_of_work
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.services.base import AsyncBaseService, BaseService
+from app.services.session_cache import SessionCache
+
+
+def sqlite_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def add_user(engine, phone):
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(phone=phone))
+        db.commit()
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """Primary and two replicas, each holding one user that names it"""
+    engines = {}
+    for name in ("primary", "replica1", "replica2"):
+        engines[name] = sqlite_engine(tmp_path / f"{name}.db")
+        add_user(engines[name], f"+91981000000{len(engines)}")
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+
+def make_sessionmaker(primary, replicas):
+    return sessionmaker(bind=primary, autoflush=False, class_=RoutingSession, replicas=replicas)
+
+
+def phones_seen(db):
+    return [user.phone for user in BaseService(User).get_multi(db)]
+
+
+class TestReadReplicas:
+    """Test RoutingSession and read_only() service methods"""
+
+    def test_round_robin(self, databases):
+        replicas = ReplicaSet([databases["replica1"], databases["replica2"]])
+        SessionLocal = make_sessionmaker(databases["primary"], replicas)
+
+        seen = []
+        for _ in range(4):
+            with SessionLocal() as db:
+                seen.append(phones_seen(db))
+
+        assert seen == [["+919810000002"], ["+919810000003"]] * 2
+
+    def test_other_methods_use_primary(self, databases):
+        SessionLocal = make_sessionmaker(databases["primary"], ReplicaSet([databases["replica1"]]))
+
+        with SessionLocal() as db:
+            assert BaseService(User).get(db, 1).phone == "+919810000001"
+            assert db.query(User).count() == 1
+
+    def test_reads_own_writes(self, databases):
+        SessionLocal = make_sessionmaker(databases["primary"], ReplicaSet([databases["replica1"]]))
+        service = AuthService()
+
+        with SessionLocal() as db:
+            assert service.get_user_by_phone(db, "+919810000001") is None
+            service.create_user(db, "+919810000009")
+
+            assert service.get_user_by_phone(db, "+919810000009") is not None
+            assert phones_seen(db) == ["+919810000001", "+919810000009"]
+
+    def test_session_cache_fill_reads_primary(self, databases):
+        SessionLocal = make_sessionmaker(databases["primary"], ReplicaSet([databases["replica1"]]))
+        service = AuthService(session_cache=SessionCache())
+        with SessionLocal() as db:
+            token = service.create_session(db, 1, "test_device").auth_token
+
+        with SessionLocal() as db:
+            assert service.validate_session(db, token).phone == "+919810000001"
+
+    def test_unit_of_work_reads_primary(self, databases):
+        SessionLocal = make_sessionmaker(databases["primary"], ReplicaSet([databases["replica1"]]))
+
+        with SessionLocal() as db, unit_of_work(db):
+            assert phones_seen(db) == ["+919810000001"]
+
+    def test_failover(self, databases, tmp_path):
+        unreachable = create_engine(f"sqlite:///{tmp_path}/missing/replica.db")
+        replicas = ReplicaSet([unreachable, databases["replica2"]])
+        SessionLocal = make_sessionmaker(databases["primary"], replicas)
+
+        with SessionLocal() as db:
+            assert phones_seen(db) == ["+919810000003"]
+        assert not replicas.is_up(unreachable)
+
+        with SessionLocal() as db:
+            assert phones_seen(db) == ["+919810000003"]
+
+        replicas.mark_down(databases["replica2"])
+        with SessionLocal() as db:
+            assert phones_seen(db) == ["+919810000001"]
+
+    def test_no_replicas(self, databases):
+        SessionLocal = make_sessionmaker(databases["primary"], ReplicaSet([]))
+
+        with SessionLocal() as db:
+            assert db.replicas is None
+            assert phones_seen(db) == ["+919810000001"]
+
+    @pytest.mark.asyncio
+    async def test_async_session(self, databases, tmp_path):
+        primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+        replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/replica1.db")
+        SessionLocal = async_sessionmaker(
+            bind=primary,
+            expire_on_commit=False,
+            sync_session_class=RoutingSession,
+            replicas=ReplicaSet([replica.sync_engine])
+        )
+        service = AsyncBaseService(BaseService(User))
+
+        async with SessionLocal() as db:
+            users = await service.get_multi(db)
+            assert [user.phone for user in users] == ["+919810000002"]
+
+        await primary.dispose()
+        await replica.dispose()
@@ -0,0 +1,156 @@
+"""
+Retention sweeper tests, on a SQLite file of their own
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.core.redis_client import FakeRedis
+from app.models.auth import OTPLog, Session as UserSession
+from app.models.user import User
+from app.services.otp_service import OTPService
+from app.services.retention import RedisLease, RetentionSweeper, RetentionTarget, plan_partitions
+
+OTP_LOGS = OTPLog.__table__
+SESSIONS = UserSession.__table__
+
+
+@pytest.fixture
+def retention_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/retention.db")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def add_otp_logs(engine, expired: int, live: int):
+    now = datetime.utcnow()
+    rows = [
+        {"phone": f"+9198100{i:05d}", "otp_code": "123456", "expires_at": now + timedelta(minutes=-60 + i if i < expired else 5)}
+        for i in range(expired + live)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(OTP_LOGS), rows)
+
+
+def count(engine, table) -> int:
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(table)).scalar()
+
+
+def count_deletes(engine) -> list:
+    deletes = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("DELETE"):
+            deletes.append(statement)
+
+    return deletes
+
+
+class TestRetentionSweeper:
+    """Test chunked deletes, lag and the leader lease"""
+
+    @pytest.mark.asyncio
+    async def test_deletes_expired_in_chunks(self, retention_engine):
+        add_otp_logs(retention_engine, expired=25, live=5)
+        deletes = count_deletes(retention_engine)
+        sweeper = RetentionSweeper(retention_engine, [RetentionTarget(OTP_LOGS)], chunk_size=10, pause=0)
+
+        results = await sweeper.sweep()
+
+        assert results["otp_logs"].deleted == 25
+        assert results["otp_logs"].lag_seconds == 0
+        assert len(deletes) == 3
+        assert count(retention_engine, OTP_LOGS) == 5
+
+    @pytest.mark.asyncio
+    async def test_lag_when_sweep_is_bounded(self, retention_engine):
+        add_otp_logs(retention_engine, expired=25, live=0)
+        sweeper = RetentionSweeper(retention_engine, [RetentionTarget(OTP_LOGS)], chunk_size=10, pause=0, max_chunks=1)
+
+        result = (await sweeper.sweep())["otp_logs"]
+
+        assert result.deleted == 10
+        assert result.lag_seconds > 0
+        assert count(retention_engine, OTP_LOGS) == 15
+
+    @pytest.mark.asyncio
+    async def test_grace_and_sessions_without_expiry(self, retention_engine):
+        now = datetime.utcnow()
+        with Session(retention_engine) as db:
+            user = User(phone="+919810000001")
+            db.add(user)
+            db.flush()
+            db.add_all([
+                UserSession(user_id=user.user_id, auth_token="expired", expires_at=now - timedelta(hours=2)),
+                UserSession(user_id=user.user_id, auth_token="recent", expires_at=now - timedelta(minutes=10)),
+                UserSession(user_id=user.user_id, auth_token="forever", expires_at=None)
+            ])
+            db.commit()
+        sweeper = RetentionSweeper(retention_engine, [RetentionTarget(SESSIONS, grace=timedelta(hours=1))], pause=0)
+
+        assert (await sweeper.sweep())["sessions"].deleted == 1
+        with retention_engine.connect() as connection:
+            tokens = connection.execute(select(SESSIONS.c.auth_token).order_by(SESSIONS.c.auth_token)).scalars().all()
+        assert tokens == ["forever", "recent"]
+
+    @pytest.mark.asyncio
+    async def test_only_leader_sweeps(self, retention_engine):
+        add_otp_logs(retention_engine, expired=3, live=0)
+        client = FakeRedis()
+        leader = RetentionSweeper(retention_engine, [RetentionTarget(OTP_LOGS)], lease=RedisLease(client, "retention", ttl=60))
+        follower = RetentionSweeper(retention_engine, [RetentionTarget(OTP_LOGS)], lease=RedisLease(client, "retention", ttl=60))
+
+        assert "otp_logs" in await leader.sweep()
+        assert await follower.sweep() == {}
+        assert leader.lease.acquire()
+
+        await leader.stop()
+        assert "otp_logs" in await follower.sweep()
+
+    def test_lease_lost_to_another_owner_is_left_alone(self):
+        client = FakeRedis()
+        lease = RedisLease(client, "retention", ttl=60)
+        assert lease.acquire()
+
+        # The lease ran out and another instance took it
+        client.set(lease.key, "other", px=60000)
+
+        assert not lease.acquire()
+        lease.release()
+        assert client.get(lease.key) == "other"
+
+    def test_cleanup_expired_otps(self, retention_engine):
+        add_otp_logs(retention_engine, expired=7, live=2)
+
+        with Session(retention_engine) as db:
+            assert OTPService().cleanup_expired_otps(db, chunk_size=3) == 7
+        assert count(retention_engine, OTP_LOGS) == 2
+
+
+class TestPartitionPlan:
+    """Test which day partitions are dropped and added"""
+
+    def test_plan(self):
+        partitions = [
+            ("p20261014", date(2026, 10, 15)),
+            ("p20261015", date(2026, 10, 16)),
+            ("p20261016", date(2026, 10, 17)),
+            ("pmax", None)
+        ]
+
+        drop, add = plan_partitions(partitions, datetime(2026, 10, 16, 12, 0), date(2026, 10, 17), days_ahead=2)
+
+        assert drop == ["p20261014", "p20261015"]
+        assert add == [date(2026, 10, 17), date(2026, 10, 18), date(2026, 10, 19)]
+
+    def test_plan_for_new_partitioning(self):
+        drop, add = plan_partitions([("pmax", None)], datetime(2026, 10, 16), date(2026, 10, 17), days_ahead=1)
+
+        assert drop == []
+        assert add == [date(2026, 10, 17), date(2026, 10, 18)]
@@ -0,0 +1,135 @@
+"""
+Role bitmask authorization and bulk grant/revoke tests
+"""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.deps import auth_service as deps_auth_service, require_roles
+from app.core.exceptions import ValidationError
+from app.core.redis_client import FakeRedis
+from app.services.auth_service import AuthService
+from app.services.role_registry import ROLE_BITS, RoleRegistry, role_mask
+from app.services.session_cache import CachedUser, SessionCache
+
+
+@pytest.fixture
+def service(db_session: Session) -> AuthService:
+    service = AuthService(session_cache=SessionCache(), roles=RoleRegistry())
+    service.create_default_roles(db_session)
+    return service
+
+
+@pytest.fixture
+def staff_app(monkeypatch):
+    """App with one route for admins and support, validating against a private session cache"""
+    cache = SessionCache()
+    monkeypatch.setattr(deps_auth_service.service, "session_cache", cache)
+    app = FastAPI()
+
+    @app.get("/staff")
+    async def staff(user: CachedUser = Depends(require_roles("admin", "support"))):
+        return {"user_id": user.user_id}
+
+    return app, cache
+
+
+def role_names(service: AuthService, db: Session, user_id: int) -> list:
+    user = service.get_user_with_roles(db, user_id)
+    return sorted(user_role.role.role_name for user_role in user.user_roles)
+
+
+class TestRoleMask:
+    """Test role bitmasks"""
+
+    def test_mask(self):
+        assert role_mask(["rider", "admin"]) == ROLE_BITS["rider"] | ROLE_BITS["admin"]
+        with pytest.raises(ValidationError):
+            role_mask(["superuser"])
+
+    def test_cached_user_mask(self, db_session: Session, service: AuthService):
+        user = service.create_user(db_session, "+919810000001")
+        service.grant_roles(db_session, [user.user_id], ["driver"])
+
+        cached = CachedUser.from_user(service.get_user_with_roles(db_session, user.user_id))
+
+        assert cached.role_mask == role_mask(["rider", "driver"])
+        assert cached.has_any_role(role_mask(["driver", "admin"]))
+        assert not cached.has_any_role(role_mask(["admin"]))
+
+
+class TestRequireRoles:
+    """Test the require_roles dependency"""
+
+    def test_cached_session_needs_no_queries(self, db_session: Session, service: AuthService, staff_app, assert_max_queries):
+        app, cache = staff_app
+        admin = service.create_user(db_session, "+919810000001")
+        rider = service.create_user(db_session, "+919810000002")
+        service.grant_roles(db_session, [admin.user_id], ["admin"])
+        cache.set("admin-token", CachedUser.from_user(service.get_user_with_roles(db_session, admin.user_id)))
+        cache.set("rider-token", CachedUser.from_user(service.get_user_with_roles(db_session, rider.user_id)))
+
+        with TestClient(app) as client, assert_max_queries(0):
+            allowed = client.get("/staff", headers={"Authorization": "Bearer admin-token"})
+            forbidden = client.get("/staff", headers={"Authorization": "Bearer rider-token"})
+
+        assert allowed.status_code == 200
+        assert allowed.json() == {"user_id": admin.user_id}
+        assert forbidden.status_code == 403
+
+    def test_missing_token(self, staff_app):
+        app, _ = staff_app
+        with TestClient(app) as client:
+            assert client.get("/staff").status_code == 401
+
+    def test_unknown_role_fails_at_definition(self):
+        with pytest.raises(ValidationError):
+            require_roles("superuser")
+
+
+class TestBulkGrants:
+    """Test granting and revoking roles for many users"""
+
+    def test_grant_skips_existing(self, db_session: Session, service: AuthService, assert_max_queries):
+        users = [service.create_user(db_session, f"+91981000000{i}") for i in range(3)]
+        user_ids = [user.user_id for user in users]
+        service.grant_roles(db_session, user_ids[:1], ["driver"])
+
+        with assert_max_queries(1):
+            assert service.grant_roles(db_session, user_ids, ["driver", "owner"]) == 5
+
+        assert role_names(service, db_session, user_ids[0]) == ["driver", "owner", "rider"]
+        assert service.grant_roles(db_session, user_ids, ["driver"]) == 0
+
+    def test_revoke(self, db_session: Session, service: AuthService, assert_max_queries):
+        users = [service.create_user(db_session, f"+91981000000{i}") for i in range(3)]
+        user_ids = [user.user_id for user in users]
+        service.grant_roles(db_session, user_ids, ["driver"])
+
+        with assert_max_queries(1):
+            assert service.revoke_roles(db_session, user_ids[:2], ["driver", "admin"]) == 2
+
+        assert role_names(service, db_session, user_ids[0]) == ["rider"]
+        assert role_names(service, db_session, user_ids[2]) == ["driver", "rider"]
+
+    def test_grant_invalidates_cached_sessions(self, db_session: Session, service: AuthService):
+        user = service.create_user(db_session, "+919810000001")
+        session = service.create_session(db_session, user.user_id, "test_device")
+        assert not service.validate_session(db_session, session.auth_token).has_any_role(role_mask(["admin"]))
+
+        service.grant_roles(db_session, [user.user_id], ["admin"])
+
+        assert service.validate_session(db_session, session.auth_token).has_any_role(role_mask(["admin"]))
+
+    def test_grant_invalidates_other_processes(self, db_session: Session):
+        client = FakeRedis()
+        service = AuthService(session_cache=SessionCache(version_client=client), roles=RoleRegistry())
+        other = AuthService(session_cache=SessionCache(version_client=client), roles=RoleRegistry())
+        user = service.create_user(db_session, "+919810000001")
+        session = service.create_session(db_session, user.user_id, "test_device")
+        assert not other.validate_session(db_session, session.auth_token).has_any_role(role_mask(["admin"]))
+
+        service.grant_roles(db_session, [user.user_id], ["admin"])
+
+        assert other.validate_session(db_session, session.auth_token).has_any_role(role_mask(["admin"]))
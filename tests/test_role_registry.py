@@ -0,0 +1,85 @@
+"""
+Role catalog tests
+"""
+import re
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import FakeRedis
+from app.models.user import Role
+from app.services.auth_service import AuthService
+from app.services.role_registry import RoleRegistry
+
+ROLES_TABLE = re.compile(r"\b(FROM|INTO|JOIN) roles\b")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def roles_statements(db_session: Session) -> list:
+    statements = []
+
+    @event.listens_for(db_session.get_bind(), "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if ROLES_TABLE.search(statement):
+            statements.append(statement)
+
+    return statements
+
+
+class TestRoleRegistry:
+    """Test the role catalog and its use at signup"""
+
+    def test_signup_does_not_query_roles(self, db_session: Session):
+        service = AuthService(roles=RoleRegistry())
+        service.create_default_roles(db_session)
+        service.create_user(db_session, "+919810000001")
+
+        statements = roles_statements(db_session)
+        user = service.create_user(db_session, "+919810000002")
+
+        assert statements == []
+        assert [user_role.role.role_name for user_role in user.user_roles] == ["rider"]
+
+    def test_create_default_roles_inserts_missing_once(self, db_session: Session):
+        db_session.add(Role(role_name="admin", description="System administrator"))
+        db_session.flush()
+        service = AuthService(roles=RoleRegistry())
+
+        statements = roles_statements(db_session)
+        catalog = service.create_default_roles(db_session)
+
+        assert sorted(catalog.by_name) == ["admin", "driver", "owner", "rider", "support"]
+        assert len([statement for statement in statements if statement.startswith("INSERT")]) == 1
+        assert db_session.query(Role).count() == 5
+        assert service.create_default_roles(db_session).version == catalog.version
+
+    def test_catalog_is_immutable(self, db_session: Session):
+        AuthService(roles=RoleRegistry()).create_default_roles(db_session)
+        catalog = RoleRegistry().catalog(db_session)
+
+        assert catalog.by_id[catalog.role_id("driver")].role_name == "driver"
+        with pytest.raises(TypeError):
+            catalog.by_name["rider"] = None
+
+    def test_version_bump_reloads_other_processes(self, db_session: Session):
+        client, clock = FakeRedis(), FakeClock()
+        registry = RoleRegistry(version_client=client, check_interval=30, clock=clock)
+        other = RoleRegistry(version_client=client, check_interval=30, clock=clock)
+        AuthService(roles=registry).create_default_roles(db_session)
+
+        catalog = registry.catalog(db_session)
+        other.bump()
+        assert registry.catalog(db_session) is catalog
+
+        clock.now += 31
+        reloaded = registry.catalog(db_session)
+        assert reloaded is not catalog
+        assert reloaded.version == catalog.version + 1
@@ -0,0 +1,36 @@
+"""
+Tests for the synthetic data seeder
+"""
+from sqlalchemy import create_engine, text
+
+from scripts.seed_data import phone_for, seed
+
+
+class TestSeedData:
+    """Test bulk seeding into SQLite"""
+
+    def test_seed_is_consistent_and_repeatable(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path}/seed.db")
+
+        counts = seed(engine, users=200, sessions=300, otp_logs=400, batch_size=64, seed_value=7)
+        seed(engine, users=100, sessions=50, otp_logs=0, batch_size=64, seed_value=7)
+
+        assert counts["users"] == 200
+        assert counts["user_roles"] >= 200
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT COUNT(*) FROM users")).scalar() == 300
+            assert connection.execute(text("SELECT COUNT(DISTINCT phone) FROM users")).scalar() == 300
+            assert connection.execute(text("SELECT COUNT(*) FROM sessions")).scalar() == 350
+            orphans = connection.execute(text(
+                "SELECT COUNT(*) FROM sessions s LEFT JOIN users u ON u.user_id = s.user_id "
+                "WHERE u.user_id IS NULL"
+            )).scalar()
+            assert orphans == 0
+            riders = connection.execute(text(
+                "SELECT COUNT(*) FROM user_roles ur JOIN roles r ON r.role_id = ur.role_id WHERE r.role_name = 'rider'"
+            )).scalar()
+            assert riders == 300
+
+    def test_phone_for_is_deterministic(self):
+        assert phone_for(12345) == phone_for(12345)
+        assert phone_for(12345) != phone_for(12346)
@@ -0,0 +1,169 @@
+"""
+Session validation cache tests
+"""
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.redis_client import FakeRedis
+from app.services.auth_service import AuthService
+from app.services.session_cache import SessionCache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+    """Test the bounded TTL+LRU cache"""
+    
+    def test_lru_eviction(self):
+        """Least recently used entry is evicted first"""
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+    
+    def test_expiry(self):
+        """Entries expire after their TTL"""
+        clock = FakeClock()
+        cache = TTLCache(max_entries=10, ttl_seconds=30, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=5)
+        
+        clock.now = 10
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["expirations"] == 1
+
+
+class TestSessionCache:
+    """Test session validation caching in AuthService"""
+    
+    def test_validate_session_hits_cache(self, db_session: Session):
+        """Second validation is served from the cache"""
+        auth_service = AuthService(session_cache=SessionCache())
+        user = auth_service.create_user(db_session, "+1234567890")
+        session = auth_service.create_session(db_session, user.user_id, "test_device")
+        
+        first = auth_service.validate_session(db_session, session.auth_token)
+        second = auth_service.validate_session(db_session, session.auth_token)
+        
+        assert first is second
+        assert first.user_id == user.user_id
+        assert "rider" in first.role_names
+        stats = auth_service.session_cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+    
+    def test_prime_session_cache(self, db_session: Session):
+        """Warmup loads live sessions so their first validation is a cache hit"""
+        auth_service = AuthService(session_cache=SessionCache())
+        user = auth_service.create_user(db_session, "+1234567890")
+        auth_service.assign_default_role(db_session, user.user_id)
+        session = auth_service.create_session(db_session, user.user_id, "test_device")
+        
+        assert auth_service.prime_session_cache(db_session, limit=10) == 1
+        
+        cached = auth_service.validate_session(db_session, session.auth_token)
+        assert cached.user_id == user.user_id
+        assert "rider" in cached.role_names
+        assert auth_service.session_cache.stats()["hits"] == 1
+    
+    def test_prime_skips_temporary_sessions(self, db_session: Session, assert_max_queries):
+        """Pre-profile sessions are not primed; the rest load with their roles in one query"""
+        auth_service = AuthService(session_cache=SessionCache())
+        user = auth_service.create_user(db_session, "+1234567890")
+        auth_service.assign_default_role(db_session, user.user_id)
+        temp_token = auth_service.create_session(db_session, user.user_id, "test_device", is_temp=True).auth_token
+        token = auth_service.create_session(db_session, user.user_id, "test_device").auth_token
+        db_session.expunge_all()
+        
+        with assert_max_queries(1):
+            assert auth_service.prime_session_cache(db_session, limit=10) == 1
+        
+        assert auth_service.session_cache.get(temp_token) is None
+        assert "rider" in auth_service.session_cache.get(token).role_names
+    
+    def test_delete_session_invalidates(self, db_session: Session):
+        """Logging out drops the cached token immediately"""
+        auth_service = AuthService(session_cache=SessionCache())
+        user = auth_service.create_user(db_session, "+1234567890")
+        session = auth_service.create_session(db_session, user.user_id, "test_device")
+        auth_service.validate_session(db_session, session.auth_token)
+        
+        auth_service.delete_session(db_session, session.auth_token)
+        
+        assert auth_service.validate_session(db_session, session.auth_token) is None
+    
+    def test_profile_update_invalidates(self, db_session: Session):
+        """Profile changes are visible on the next validation"""
+        auth_service = AuthService(session_cache=SessionCache())
+        user = auth_service.create_user(db_session, "+1234567890")
+        session = auth_service.create_session(db_session, user.user_id, "test_device")
+        auth_service.validate_session(db_session, session.auth_token)
+        
+        auth_service.update_user_profile(db_session, user.user_id, "Test User", "male")
+        
+        cached_user = auth_service.validate_session(db_session, session.auth_token)
+        assert cached_user.full_name == "Test User"
+        assert auth_service.session_cache.stats()["invalidations"] == 1
+    
+    def test_invalidation_reaches_other_processes(self, db_session: Session):
+        """A user invalidated in one process is dropped from every cache sharing Redis"""
+        client = FakeRedis()
+        auth_service = AuthService(session_cache=SessionCache(version_client=client))
+        other = SessionCache(version_client=client)
+        user = auth_service.create_user(db_session, "+1234567890")
+        session = auth_service.create_session(db_session, user.user_id, "test_device")
+        auth_service.validate_session(db_session, session.auth_token)
+        
+        other.invalidate_user(user.user_id)
+        
+        assert auth_service.session_cache.get(session.auth_token) is None
+        assert auth_service.validate_session(db_session, session.auth_token).user_id == user.user_id
+        assert auth_service.session_cache.get(session.auth_token) is not None
+    
+    def test_logout_reaches_other_processes(self, db_session: Session):
+        """A logged-out token stops validating from every cache sharing Redis"""
+        client = FakeRedis()
+        auth_service = AuthService(session_cache=SessionCache(version_client=client))
+        other = AuthService(session_cache=SessionCache(version_client=client))
+        user = auth_service.create_user(db_session, "+1234567890")
+        token = auth_service.create_session(db_session, user.user_id, "test_device").auth_token
+        other.validate_session(db_session, token)
+        assert other.session_cache.get(token) is not None
+        
+        auth_service.delete_session(db_session, token)
+        
+        assert other.session_cache.get(token) is None
+        assert other.validate_session(db_session, token) is None
+    
+    def test_fill_racing_invalidation_is_stale(self, db_session: Session):
+        """An entry loaded before a concurrent invalidation is not served"""
+        auth_service = AuthService(session_cache=SessionCache(version_client=FakeRedis()))
+        user = auth_service.create_user(db_session, "+1234567890")
+        session = auth_service.create_session(db_session, user.user_id, "test_device")
+        cache = auth_service.session_cache
+        
+        version = cache.user_version(user.user_id)
+        snapshot = auth_service.validate_session(db_session, session.auth_token)
+        cache.invalidate_user(user.user_id)
+        cache.set(session.auth_token, snapshot, expires_at=session.expires_at, version=version)
+        
+        assert cache.get(session.auth_token) is None
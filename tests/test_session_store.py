@@ -0,0 +1,85 @@
+"""
+Session store tests
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import FakeRedis
+from app.models.auth import Session as UserSession
+from app.services.auth_service import AuthService
+from app.services.session_cache import SessionCache
+from app.services.session_store import RedisSessionStore, SessionRecord
+
+
+class TestRedisSessionStore:
+    """Test the Redis session store against FakeRedis"""
+    
+    def test_round_trip_with_native_ttl(self):
+        """Sessions expire with their Redis key"""
+        client = FakeRedis()
+        store = RedisSessionStore(client)
+        expires_at = datetime.utcnow() + timedelta(minutes=10)
+        store.put(SessionRecord(user_id=1, auth_token="token", device_info="ios", expires_at=expires_at))
+        
+        record = store.get("token")
+        assert record.user_id == 1
+        assert record.device_info == "ios"
+        assert abs((record.expires_at - expires_at).total_seconds()) < 1
+        assert 590 <= client.ttl("session:token") <= 601
+        
+        assert store.delete("token") is True
+        assert store.get("token") is None
+    
+    def test_expired_session_not_stored(self):
+        """Already expired sessions are never written"""
+        store = RedisSessionStore(FakeRedis())
+        store.put(SessionRecord(user_id=1, auth_token="old", expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        
+        assert store.get("old") is None
+
+
+class TestAuthServiceSessionStore:
+    """Test AuthService reading sessions through the store"""
+    
+    def test_sessions_served_from_store(self, db_session: Session):
+        """Lookups hit the store and fall back to the database on a miss"""
+        client = FakeRedis()
+        auth_service = AuthService(session_cache=SessionCache(), session_store=RedisSessionStore(client))
+        user = auth_service.create_user(db_session, "+1234567890")
+        session = auth_service.create_session(db_session, user.user_id, "test_device")
+        token = session.auth_token
+        
+        # Served from Redis even with the row gone
+        db_session.query(UserSession).filter(UserSession.auth_token == token).delete()
+        assert auth_service.get_session_by_token(db_session, token).user_id == user.user_id
+        
+        # Database fallback backfills the store
+        other = auth_service.create_session(db_session, user.user_id, "other_device")
+        client.flushall()
+        assert auth_service.get_session_by_token(db_session, other.auth_token).device_info == "other_device"
+        assert client.exists(f"session:{other.auth_token}") == 1
+    
+    def test_delete_session_removes_from_store(self, db_session: Session):
+        """Logout removes the shared session"""
+        store = RedisSessionStore(FakeRedis())
+        auth_service = AuthService(session_cache=SessionCache(), session_store=store)
+        user = auth_service.create_user(db_session, "+1234567890")
+        session = auth_service.create_session(db_session, user.user_id, "test_device")
+        
+        assert auth_service.delete_session(db_session, session.auth_token) is True
+        assert store.get(session.auth_token) is None
+        assert auth_service.get_session_by_token(db_session, session.auth_token) is None
+    
+    def test_logout_race_cannot_restore_session(self, db_session: Session):
+        """A reader that loaded the row before the logout cannot write it back"""
+        store = RedisSessionStore(FakeRedis())
+        auth_service = AuthService(session_cache=SessionCache(), session_store=store)
+        user = auth_service.create_user(db_session, "+1234567890")
+        session = auth_service.create_session(db_session, user.user_id, "test_device")
+        stale = SessionRecord.from_model(session)
+        
+        auth_service.delete_session(db_session, session.auth_token)
+        store.put(stale)
+        
+        assert store.get(session.auth_token) is None
@@ -0,0 +1,124 @@
+"""
+Tests for the SMS outbox and providers
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core.exceptions import ExternalServiceError
+from app.services.sms_service import (
+    JSONBatchSMSProvider,
+    SMSMessage,
+    SMSOutbox,
+    SMSProvider,
+    delivery_error
+)
+
+
+class RecordingProvider(SMSProvider):
+    """Accepts messages after ``failures`` failed calls"""
+
+    name = "recording"
+
+    def __init__(self, max_batch_size=1, failures=0, retryable=True):
+        self.max_batch_size = max_batch_size
+        self.failures = failures
+        self.retryable = retryable
+        self.batches = []
+
+    async def send_batch(self, messages):
+        self.batches.append([message.phone for message in messages])
+        if self.failures:
+            self.failures -= 1
+            raise delivery_error("gateway down", retryable=self.retryable)
+        return [True] * len(messages)
+
+
+class TestSMSOutbox:
+    """Test queueing, batching and retries"""
+
+    @pytest.mark.asyncio
+    async def test_batches_queued_messages(self):
+        provider = RecordingProvider(max_batch_size=10)
+        outbox = SMSOutbox(provider, workers=1)
+
+        for i in range(25):
+            assert outbox.enqueue(SMSMessage(phone=f"+1555000{i:04d}", body="hi"))
+        await outbox.stop()
+
+        assert [len(batch) for batch in provider.batches] == [10, 10, 5]
+        assert not outbox.running
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_failures(self):
+        provider = RecordingProvider(failures=2)
+        outbox = SMSOutbox(provider, workers=1, retry_backoff=0.001)
+
+        outbox.enqueue(SMSMessage(phone="+15550000001", body="hi"))
+        for _ in range(100):
+            if len(provider.batches) == 3:
+                break
+            await asyncio.sleep(0.01)
+        await outbox.stop()
+
+        assert provider.batches == [["+15550000001"]] * 3
+
+    @pytest.mark.asyncio
+    async def test_permanent_failures_are_not_retried(self):
+        provider = RecordingProvider(failures=1, retryable=False)
+        outbox = SMSOutbox(provider, workers=1, retry_backoff=0.001)
+
+        outbox.enqueue(SMSMessage(phone="+15550000001", body="hi"))
+        await outbox.stop()
+
+        assert len(provider.batches) == 1
+
+    @pytest.mark.asyncio
+    async def test_full_outbox_rejects(self):
+        outbox = SMSOutbox(RecordingProvider(), workers=1, max_size=1)
+
+        assert outbox.enqueue(SMSMessage(phone="+15550000001", body="hi"))
+        assert not outbox.enqueue(SMSMessage(phone="+15550000002", body="hi"))
+        await outbox.stop()
+
+
+class TestJSONBatchSMSProvider:
+    """Test the generic HTTP gateway client"""
+
+    @pytest.mark.asyncio
+    async def test_send_batch(self):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            messages = json.loads(request.content)["messages"]
+            return httpx.Response(200, json={
+                "results": [{"id": m["id"], "accepted": m["to"] != "+10000000000"} for m in messages]
+            })
+
+        provider = JSONBatchSMSProvider("http://sms", api_key="key", transport=httpx.MockTransport(handler))
+        messages = [SMSMessage(phone="+15550000001", body="a"), SMSMessage(phone="+10000000000", body="b")]
+
+        assert await provider.send_batch(messages) == [True, False]
+        assert requests[0].headers["Authorization"] == "Bearer key"
+        await provider.close()
+
+    @pytest.mark.asyncio
+    async def test_error_statuses(self):
+        statuses = iter([503, 400])
+        provider = JSONBatchSMSProvider(
+            "http://sms",
+            transport=httpx.MockTransport(lambda request: httpx.Response(next(statuses)))
+        )
+        message = [SMSMessage(phone="+15550000001", body="a")]
+
+        with pytest.raises(ExternalServiceError) as server_error:
+            await provider.send_batch(message)
+        with pytest.raises(ExternalServiceError) as client_error:
+            await provider.send_batch(message)
+
+        assert server_error.value.details["retryable"] is True
+        assert client_error.value.details["retryable"] is False
+        await provider.close()
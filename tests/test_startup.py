@@ -0,0 +1,65 @@
+"""
+Tests for fast boot and startup profiling
+"""
+from sqlalchemy import create_engine, inspect, text
+
+from app.core import database
+from app.core.startup import StartupProfiler
+
+
+class TestFastBoot:
+    """Test the schema version stamp"""
+
+    def test_stamp_skips_create_all(self, tmp_path, monkeypatch, assert_max_queries):
+        engine = create_engine(f"sqlite:///{tmp_path / 'boot.db'}")
+        monkeypatch.setattr(database, "engine", engine)
+
+        assert database.get_schema_version() is None
+        database.init_db(fast_boot=True)
+        assert database.get_schema_version() == database.schema_fingerprint()
+        assert "users" in inspect(engine).get_table_names()
+
+        with assert_max_queries(1):
+            database.init_db(fast_boot=True)
+
+    def test_changed_models_rerun_create_all(self, tmp_path, monkeypatch):
+        engine = create_engine(f"sqlite:///{tmp_path / 'boot.db'}")
+        monkeypatch.setattr(database, "engine", engine)
+        database.stamp_schema_version("outdated")
+
+        database.init_db(fast_boot=True)
+
+        assert "users" in inspect(engine).get_table_names()
+        assert database.get_schema_version() == database.schema_fingerprint()
+
+
+    def test_missing_indexes_are_not_stamped(self, tmp_path, monkeypatch):
+        engine = create_engine(f"sqlite:///{tmp_path / 'boot.db'}")
+        monkeypatch.setattr(database, "engine", engine)
+        database.Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_sessions_expires_at"))
+
+        database.init_db(fast_boot=True)
+        assert database.get_schema_version() is None
+
+        with engine.begin() as connection:
+            connection.execute(text("CREATE INDEX ix_sessions_expires_at ON sessions (expires_at)"))
+        database.init_db(fast_boot=True)
+        assert database.get_schema_version() == database.schema_fingerprint()
+
+
+class TestStartupProfiler:
+    """Test phase timing"""
+
+    def test_report(self):
+        profiler = StartupProfiler()
+
+        with profiler.phase("imports"):
+            pass
+        profiler.record("schema", 0.25)
+        profiler.record("schema", 0.25)
+
+        assert list(profiler.phases) == ["imports", "schema"]
+        assert profiler.phases["schema"] == 0.5
+        assert "schema 500ms" in profiler.report()
@@ -0,0 +1,54 @@
+"""
+Tests for startup warmup
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.core.database import warm_pool
+from app.core.startup import StartupProfiler
+from app.core.warmup import Warmup
+
+
+class TestWarmPool:
+    """Test pre-opening pooled connections"""
+
+    def test_opens_connections_up_to_pool_size(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path}/warm.db", poolclass=QueuePool, pool_size=3, max_overflow=5)
+
+        assert warm_pool(engine, 10) == 3
+        assert engine.pool.checkedin() == 3
+        assert engine.pool.checkedout() == 0
+
+    def test_skips_pools_that_do_not_keep_connections(self):
+        engine = create_engine("sqlite://", poolclass=NullPool)
+
+        assert warm_pool(engine, 5) == 0
+
+
+class TestWarmup:
+    """Test running warmup steps"""
+
+    @pytest.mark.asyncio
+    async def test_runs_steps_in_order_and_survives_failures(self):
+        calls = []
+
+        async def pools():
+            calls.append("pools")
+            return 5
+
+        async def cache():
+            calls.append("cache")
+            raise RuntimeError("database unavailable")
+
+        profiler = StartupProfiler()
+        warmup = Warmup(profiler=profiler)
+        warmup.add("pools", pools)
+        warmup.add("cache", cache)
+
+        results = await warmup.run()
+
+        assert calls == ["pools", "cache"]
+        assert results == {"pools": 5, "cache": None}
+        assert warmup.completed
+        assert list(profiler.phases) == ["warmup pools", "warmup cache"]